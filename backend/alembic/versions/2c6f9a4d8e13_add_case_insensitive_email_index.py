@@ -0,0 +1,35 @@
+"""add case insensitive email index
+
+Revision ID: 2c6f9a4d8e13
+Revises: d5a8e3f71c02
+Create Date: 2026-10-18 18:12:40.118204+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2c6f9a4d8e13"
+down_revision: Union[str, Sequence[str], None] = "d5a8e3f71c02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fails if two users share an email address up to case, those have to be
+    # merged by hand before upgrading
+    op.create_index(
+        "ix_users_email_address_lower",
+        "users",
+        [sa.text("lower(email_address)")],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_email_address_lower", table_name="users")
@@ -0,0 +1,85 @@
+"""store personality test answers in question slots
+
+Revision ID: 3c9a1d7e5b20
+Revises: facc3476c486
+Create Date: 2026-10-18 09:12:40.118204+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSON
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9a1d7e5b20"
+down_revision: Union[str, Sequence[str], None] = "facc3476c486"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PERSONALITY_TEST_TABLES = (
+    "anonymous_personality_test_scores",
+    "therapist_personality_tests",
+)
+CATEGORIES = (
+    "extroversion",
+    "conscientiousness",
+    "openness",
+    "neuroticism",
+    "agreeableness",
+)
+QUESTIONS_PER_CATEGORY = 10
+
+
+def _to_slots(answers):
+    slots = [None] * QUESTIONS_PER_CATEGORY
+
+    for answer in answers or []:
+        if answer and answer["id"].isdigit():
+            slot = int(answer["id"]) - 1
+
+            if 0 <= slot < QUESTIONS_PER_CATEGORY:
+                slots[slot] = answer
+
+    return slots
+
+
+def _from_slots(answers):
+    return [answer for answer in answers or [] if answer is not None]
+
+
+def _rewrite_answers(convert) -> None:
+    connection = op.get_bind()
+
+    for table_name in PERSONALITY_TEST_TABLES:
+        table = sa.table(
+            table_name,
+            sa.column("id", sa.Uuid()),
+            *(sa.column(category, JSON()) for category in CATEGORIES),
+        )
+        rows = connection.execute(
+            sa.select(table.c.id, *(table.c[category] for category in CATEGORIES))
+        ).all()
+
+        for row in rows:
+            connection.execute(
+                table.update()
+                .where(table.c.id == row.id)
+                .values(
+                    {
+                        category: convert(getattr(row, category))
+                        for category in CATEGORIES
+                    }
+                )
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rewrite_answers(_to_slots)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rewrite_answers(_from_slots)
@@ -0,0 +1,57 @@
+"""add score and rank to matches
+
+Revision ID: 4f8d2b7e6c91
+Revises: e91b6d3f4a58
+Create Date: 2026-10-18 21:55:38.261740+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f8d2b7e6c91"
+down_revision: Union[str, Sequence[str], None] = "e91b6d3f4a58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows written before the matches were ranked get a zero score and rank
+    # them by id, the defaults are only there to fill those rows
+    op.add_column(
+        "matches",
+        sa.Column("score", sa.Float(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "matches",
+        sa.Column("rank", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        UPDATE matches SET rank = ranked.rank
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY patient_id ORDER BY id) AS rank
+            FROM matches
+        ) AS ranked
+        WHERE matches.id = ranked.id
+        """
+    )
+    op.alter_column("matches", "score", server_default=None)
+    op.alter_column("matches", "rank", server_default=None)
+    op.create_index(
+        "ix_matches_patient_id_rank",
+        "matches",
+        ["patient_id", "rank"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_matches_patient_id_rank", table_name="matches")
+    op.drop_column("matches", "rank")
+    op.drop_column("matches", "score")
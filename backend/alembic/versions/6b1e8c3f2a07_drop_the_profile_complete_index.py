@@ -0,0 +1,36 @@
+"""drop the profile complete index
+
+Most therapists complete their profile, so the candidate query without a
+filter reads the whole table and the planner never picks this index.
+
+Revision ID: 6b1e8c3f2a07
+Revises: 4f8d2b7e6c91
+Create Date: 2026-10-18 22:14:36.218504+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6b1e8c3f2a07"
+down_revision: Union[str, Sequence[str], None] = "4f8d2b7e6c91"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index("ix_therapists_profile_complete", table_name="therapists")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        "ix_therapists_profile_complete",
+        "therapists",
+        ["id"],
+        postgresql_where=sa.text("is_profile_complete"),
+    )
@@ -0,0 +1,83 @@
+"""add therapist match vectors
+
+Revision ID: 7a3e5c9b1d24
+Revises: 2c6f9a4d8e13
+Create Date: 2026-10-18 19:26:03.482915+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3e5c9b1d24"
+down_revision: Union[str, Sequence[str], None] = "2c6f9a4d8e13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "therapist_match_vectors",
+        sa.Column("therapist_id", sa.Uuid(), nullable=False),
+        sa.Column("traits", postgresql.ARRAY(sa.REAL()), nullable=False),
+        sa.Column("latitude", sa.Float(), nullable=True),
+        sa.Column("longitude", sa.Float(), nullable=True),
+        sa.Column("specializations", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("is_lgbtq_specialization", sa.Boolean(), nullable=False),
+        sa.Column("is_religious_specialization", sa.Boolean(), nullable=False),
+        sa.Column(
+            "therapist_type",
+            postgresql.ENUM(name="therapisttypeoption", create_type=False),
+            nullable=True,
+        ),
+        sa.Column("is_profile_complete", sa.Boolean(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.CheckConstraint(
+            "cardinality(traits) = 5", name="ck_therapist_match_vectors_traits"
+        ),
+        sa.ForeignKeyConstraint(
+            ["therapist_id"], ["therapists.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("therapist_id"),
+    )
+
+    # Traits in PERSONALITY_TRAIT_ORDER
+    op.execute(
+        """
+        INSERT INTO therapist_match_vectors (
+            therapist_id, traits, latitude, longitude, specializations,
+            is_lgbtq_specialization, is_religious_specialization,
+            therapist_type, is_profile_complete
+        )
+        SELECT
+            t.id,
+            ARRAY[
+                s.extroversion, s.conscientiousness, s.openness,
+                s.neuroticism, s.agreeableness
+            ]::real[],
+            t.latitude,
+            t.longitude,
+            COALESCE(t.specializations, '{}'),
+            COALESCE(t.is_lgbtq_specialization, false),
+            COALESCE(t.is_religious_specialization, false),
+            t.therapist_type,
+            t.is_profile_complete
+        FROM therapists t
+        JOIN personality_test_scores s ON s.therapist_id = t.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("therapist_match_vectors")
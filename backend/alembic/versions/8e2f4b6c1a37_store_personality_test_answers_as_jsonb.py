@@ -0,0 +1,51 @@
+"""store personality test answers as jsonb
+
+Revision ID: 8e2f4b6c1a37
+Revises: 3c9a1d7e5b20
+Create Date: 2026-10-18 15:02:11.482913+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSON, JSONB
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e2f4b6c1a37"
+down_revision: Union[str, Sequence[str], None] = "3c9a1d7e5b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PERSONALITY_TEST_TABLES = (
+    "anonymous_personality_test_scores",
+    "therapist_personality_tests",
+)
+CATEGORIES = (
+    "extroversion",
+    "conscientiousness",
+    "openness",
+    "neuroticism",
+    "agreeableness",
+)
+
+
+def _alter_answer_columns(type_, cast: str) -> None:
+    for table_name in PERSONALITY_TEST_TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            for category in CATEGORIES:
+                batch_op.alter_column(
+                    category,
+                    type_=type_,
+                    postgresql_using=f"{category}::{cast}",
+                )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _alter_answer_columns(JSONB(), "jsonb")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _alter_answer_columns(JSON(), "json")
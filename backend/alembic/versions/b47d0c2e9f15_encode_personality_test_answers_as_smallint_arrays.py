@@ -0,0 +1,137 @@
+"""encode personality test answers as smallint arrays
+
+Revision ID: b47d0c2e9f15
+Revises: 8e2f4b6c1a37
+Create Date: 2026-10-18 16:20:37.905114+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b47d0c2e9f15"
+down_revision: Union[str, Sequence[str], None] = "8e2f4b6c1a37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PERSONALITY_TEST_TABLES = (
+    "anonymous_personality_test_scores",
+    "therapist_personality_tests",
+)
+# Order of the bits of answered_mask, ten bits per category
+CATEGORIES = (
+    "extroversion",
+    "conscientiousness",
+    "openness",
+    "neuroticism",
+    "agreeableness",
+)
+QUESTIONS_PER_CATEGORY = 10
+
+
+def _encode(answers):
+    scores = [None] * QUESTIONS_PER_CATEGORY
+
+    for slot, answer in enumerate((answers or [])[:QUESTIONS_PER_CATEGORY]):
+        if answer is not None:
+            scores[slot] = answer["score"]
+
+    return scores
+
+
+def _decode(category, scores):
+    return [
+        None
+        if score is None
+        else {"id": str(slot + 1), "category": category, "score": score}
+        for slot, score in enumerate(scores or [None] * QUESTIONS_PER_CATEGORY)
+    ]
+
+
+def _answered_mask(row):
+    mask = 0
+
+    for category_index, category in enumerate(CATEGORIES):
+        for slot, score in enumerate(row[category]):
+            if score is not None:
+                mask |= 1 << (category_index * QUESTIONS_PER_CATEGORY + slot)
+
+    return mask
+
+
+def _rewrite_columns(table_name, old_type, new_type, convert, with_mask) -> None:
+    connection = op.get_bind()
+
+    with op.batch_alter_table(table_name) as batch_op:
+        for category in CATEGORIES:
+            batch_op.add_column(sa.Column(f"{category}_encoded", new_type))
+
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.Uuid()),
+        *(sa.column(category, old_type) for category in CATEGORIES),
+        *(sa.column(f"{category}_encoded", new_type) for category in CATEGORIES),
+        *((sa.column("answered_mask", sa.BigInteger()),) if with_mask else ()),
+    )
+    rows = connection.execute(
+        sa.select(table.c.id, *(table.c[category] for category in CATEGORIES))
+    ).all()
+
+    for row in rows:
+        values = {
+            category: convert(category, getattr(row, category))
+            for category in CATEGORIES
+        }
+        encoded_values = {
+            f"{category}_encoded": values[category] for category in CATEGORIES
+        }
+
+        if with_mask:
+            encoded_values["answered_mask"] = _answered_mask(values)
+
+        connection.execute(
+            table.update().where(table.c.id == row.id).values(encoded_values)
+        )
+
+    with op.batch_alter_table(table_name) as batch_op:
+        for category in CATEGORIES:
+            batch_op.drop_column(category)
+            batch_op.alter_column(
+                f"{category}_encoded", new_column_name=category, nullable=False
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in PERSONALITY_TEST_TABLES:
+        op.add_column(
+            table_name,
+            sa.Column(
+                "answered_mask", sa.BigInteger(), nullable=False, server_default="0"
+            ),
+        )
+        _rewrite_columns(
+            table_name,
+            JSONB(),
+            ARRAY(sa.SmallInteger()),
+            lambda _category, answers: _encode(answers),
+            with_mask=True,
+        )
+        op.alter_column(table_name, "answered_mask", server_default=None)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in PERSONALITY_TEST_TABLES:
+        _rewrite_columns(
+            table_name,
+            ARRAY(sa.SmallInteger()),
+            JSONB(),
+            _decode,
+            with_mask=False,
+        )
+        op.drop_column(table_name, "answered_mask")
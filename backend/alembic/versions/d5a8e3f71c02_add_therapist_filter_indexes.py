@@ -0,0 +1,47 @@
+"""add therapist filter indexes
+
+Revision ID: d5a8e3f71c02
+Revises: b47d0c2e9f15
+Create Date: 2026-10-18 17:05:52.630441+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a8e3f71c02"
+down_revision: Union[str, Sequence[str], None] = "b47d0c2e9f15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_therapists_specializations",
+        "therapists",
+        ["specializations"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_therapists_profile_complete",
+        "therapists",
+        ["id"],
+        postgresql_where=sa.text("is_profile_complete"),
+    )
+    op.create_index(
+        "ix_therapists_profile_complete_filters",
+        "therapists",
+        ["is_lgbtq_specialization", "is_religious_specialization", "therapist_type"],
+        postgresql_where=sa.text("is_profile_complete"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_therapists_profile_complete_filters", table_name="therapists")
+    op.drop_index("ix_therapists_profile_complete", table_name="therapists")
+    op.drop_index("ix_therapists_specializations", table_name="therapists")
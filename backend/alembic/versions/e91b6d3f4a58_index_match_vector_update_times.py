@@ -0,0 +1,35 @@
+"""index match vector update times
+
+Revision ID: e91b6d3f4a58
+Revises: 7a3e5c9b1d24
+Create Date: 2026-10-18 20:41:17.905362+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e91b6d3f4a58"
+down_revision: Union[str, Sequence[str], None] = "7a3e5c9b1d24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_therapist_match_vectors_updated_at"),
+        "therapist_match_vectors",
+        ["updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_therapist_match_vectors_updated_at"),
+        table_name="therapist_match_vectors",
+    )
@@ -0,0 +1,223 @@
+"""
+Command line entry point for operational tasks.
+
+Usage: python -m backend.cli <command> [options]
+"""
+
+import argparse
+import sys
+
+
+def positive_int(value: str) -> int:
+    """argparse type for a strictly positive integer"""
+    number = int(value)
+
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+
+    return number
+
+
+def build_postal_code_table(args: argparse.Namespace) -> int:
+    """Compile the postal code lookup table used by the geocoder"""
+    from backend.services.location_service import (  # pylint: disable=import-outside-toplevel
+        compile_postal_code_table,
+        geocoder,
+    )
+
+    output_path = args.output or geocoder.table_path
+    compile_postal_code_table(output_path)
+    print(f"Postal code table written to {output_path}")
+
+    return 0
+
+
+def export_therapist_index(args: argparse.Namespace) -> int:
+    """Write the therapist index to a snapshot file that workers load on boot"""
+    # pylint: disable=import-outside-toplevel
+    from sqlmodel import Session
+    from backend.core.config import settings
+    from backend.core.database import engine
+    from backend.services.index_snapshot import export_index_snapshot
+
+    output_path = args.output or settings.therapist_index_snapshot_path
+
+    if not output_path:
+        print(
+            "No output path, pass --output or set THERAPIST_INDEX_SNAPSHOT_PATH",
+            file=sys.stderr,
+        )
+
+        return 1
+
+    with Session(engine) as session:
+        stored = export_index_snapshot(session, output_path)
+
+    print(
+        f"Therapist index of {len(stored.segment)} therapists written to "
+        f"{output_path}"
+    )
+
+    return 0
+
+
+def migrate(args: argparse.Namespace) -> int:
+    """Upgrade the database schema, or check that it is current"""
+    # pylint: disable=import-outside-toplevel
+    from backend.core.database import engine
+    from backend.core.migrations import (
+        SchemaRevisionError,
+        check_schema_revision,
+        run_migrations,
+    )
+
+    if not args.check:
+        run_migrations(engine, args.revision)
+        print(f"Database schema upgraded to {args.revision}")
+
+        return 0
+
+    try:
+        check_schema_revision(engine)
+    except SchemaRevisionError as e:
+        print(e, file=sys.stderr)
+
+        return 1
+
+    print("Database schema is current")
+
+    return 0
+
+
+def profile_imports(args: argparse.Namespace) -> int:
+    """Report the import cost of the API at boot"""
+    # pylint: disable=import-outside-toplevel
+    from backend.core.import_profile import get_package_import_times
+    from backend.core.import_profile import profile_imports as run_profile
+
+    timings = run_profile(args.module)
+    total = max((timing.cumulative_seconds for timing in timings), default=0.0)
+    print(f"Importing {args.module} took {total * 1000:.0f}ms")
+
+    if args.by_package:
+        rows = list(get_package_import_times(timings).items())[: args.limit]
+
+        for package, seconds in rows:
+            print(f"{seconds * 1000:10.1f}ms  {package}")
+
+        return 0
+
+    slowest = sorted(timings, key=lambda timing: -timing.cumulative_seconds)
+
+    print(f"{'cumulative':>12}  {'self':>10}  module")
+    for timing in slowest[: args.limit]:
+        print(
+            f"{timing.cumulative_seconds * 1000:10.1f}ms  "
+            f"{timing.self_seconds * 1000:8.1f}ms  {timing.module}"
+        )
+
+    return 0
+
+
+def rescore(args: argparse.Namespace) -> int:
+    """Recompute the stored personality test scores from the raw answers"""
+    # pylint: disable=import-outside-toplevel
+    from sqlmodel import Session
+    from backend.core.database import engine
+    from backend.services.rescoring import rescore_personality_tests
+
+    with Session(engine) as session:
+        summary = rescore_personality_tests(session, args.chunk_size)
+
+    print(
+        f"Rescored {summary.rescored} personality tests "
+        f"({summary.skipped} incomplete skipped) in {summary.seconds:.1f}s, "
+        f"{summary.rows_per_second:.0f} rows/s"
+    )
+    print(
+        "Running workers apply the rescored match vectors on their next "
+        "therapist index refresh"
+    )
+
+    return 0
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for every command"""
+    parser = argparse.ArgumentParser(prog="python -m backend.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    postal_code_table = commands.add_parser(
+        "build-postal-code-table",
+        help="compile the postal code table so geocoding works without network",
+    )
+    postal_code_table.add_argument(
+        "--output", help="path of the table, defaults to POSTAL_CODE_TABLE_PATH"
+    )
+    postal_code_table.set_defaults(handler=build_postal_code_table)
+
+    export_index_parser = commands.add_parser(
+        "export-therapist-index",
+        help="write the therapist index to a snapshot file for warm starts",
+    )
+    export_index_parser.add_argument(
+        "--output",
+        help="path of the snapshot, defaults to THERAPIST_INDEX_SNAPSHOT_PATH",
+    )
+    export_index_parser.set_defaults(handler=export_therapist_index)
+
+    migrate_parser = commands.add_parser(
+        "migrate",
+        help="upgrade the database schema, run once per deploy before the API",
+    )
+    migrate_parser.add_argument(
+        "--revision", default="head", help="revision to upgrade to"
+    )
+    migrate_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only check that the schema is at the latest revision",
+    )
+    migrate_parser.set_defaults(handler=migrate)
+
+    profile_parser = commands.add_parser(
+        "profile-imports",
+        help="report the cumulative import time of each module at boot",
+    )
+    profile_parser.add_argument(
+        "--module", default="backend.main", help="module to import"
+    )
+    profile_parser.add_argument(
+        "--limit", type=int, default=25, help="number of modules to report"
+    )
+    profile_parser.add_argument(
+        "--by-package",
+        action="store_true",
+        help="total the import time of each top level package instead",
+    )
+    profile_parser.set_defaults(handler=profile_imports)
+
+    rescore_parser = commands.add_parser(
+        "rescore",
+        help="recompute every stored personality test score from its answers",
+    )
+    rescore_parser.add_argument(
+        "--chunk-size",
+        type=positive_int,
+        default=1000,
+        help="number of tests streamed and scored per batch",
+    )
+    rescore_parser.set_defaults(handler=rescore)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run a command"""
+    args = get_parser().parse_args(argv)
+
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -9,6 +10,36 @@ class Settings(BaseSettings):
     db_port: int = Field(alias="DB_PORT")
     db_name: str = Field(alias="DB_NAME")
     secret_key: str = Field(alias="SECRET_KEY")
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    db_echo: bool = Field(default=False, alias="DB_ECHO")
+    db_migrations_on_startup: Literal["check", "upgrade", "skip"] = Field(
+        default="check", alias="DB_MIGRATIONS_ON_STARTUP"
+    )
+    password_hash_workers: int = Field(default=2, alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(
+        default=64, alias="PASSWORD_HASH_MAX_PENDING"
+    )
+    verified_token_cache_size: int = Field(
+        default=4096, alias="VERIFIED_TOKEN_CACHE_SIZE"
+    )
+    identity_cache_size: int = Field(default=1024, alias="IDENTITY_CACHE_SIZE")
+    identity_cache_ttl_seconds: float = Field(
+        default=5.0, alias="IDENTITY_CACHE_TTL_SECONDS"
+    )
+    postal_code_table_path: str | None = Field(
+        default=None, alias="POSTAL_CODE_TABLE_PATH"
+    )
+    therapist_index_snapshot_path: str | None = Field(
+        default=None, alias="THERAPIST_INDEX_SNAPSHOT_PATH"
+    )
+    therapist_index_refresh_seconds: float = Field(
+        default=30.0, alias="THERAPIST_INDEX_REFRESH_SECONDS"
+    )
+    query_count_header: bool = Field(default=False, alias="QUERY_COUNT_HEADER")
 
     class Config:
         env_file = ".env"
@@ -21,3 +52,8 @@ DATABASE_URL = (
     f"postgresql+psycopg2://{settings.db_user}:{settings.db_password}"
     f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
 )
+
+ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://{settings.db_user}:{settings.db_password}"
+    f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
+)
@@ -1,29 +1,42 @@
-from typing import Annotated
+from typing import Annotated, AsyncIterator
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
-from alembic import command
-from alembic.config import Config
-from passlib.context import CryptContext
-from backend.models.match import *  # pylint: disable=wildcard-import
-from backend.models.user import *  # pylint: disable=wildcard-import
-from backend.core.config import DATABASE_URL
-
-engine = create_engine(DATABASE_URL, echo="debug")
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import match, user  # pylint: disable=unused-import
+from backend.core.config import DATABASE_URL, ASYNC_DATABASE_URL, settings
+from backend.core.pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    PoolMetrics,
+)
+
+POOL_OPTIONS = {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+    "pool_pre_ping": settings.db_pool_pre_ping,
+    "echo": settings.db_echo,
+}
+
+engine = create_engine(DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS
+)
+
+pool_metrics = PoolMetrics(engine)
+pool_metrics.listen()
+async_pool_metrics = PoolMetrics(async_engine)
+async_pool_metrics.listen()
 model = SQLModel.metadata
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 def create_db_and_tables():
     """Create database and tables"""
     model.create_all(engine)
 
 
-def run_migrations():
-    alembic_cfg = Config("alembic.ini")
-    command.upgrade(alembic_cfg, "head")
-
-
 def get_session() -> Session:
     """Provide a database session"""
     with Session(engine) as session:
@@ -31,3 +44,16 @@ def get_session() -> Session:
 
 
 SessionDep = Annotated[Session, Depends(get_session)]
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """
+    Provide an async database session.
+    Instances stay loaded after a commit, since an expired attribute cannot be
+    lazy loaded outside of an await.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
@@ -0,0 +1,86 @@
+"""
+Import time profile of the API.
+
+Every worker, and every pod added by the autoscaler, pays the import cost of
+backend.main before it serves a request. The profile imports a module in a
+fresh interpreter with `-X importtime` and reports the cumulative cost of
+each module, which includes everything it imported first.
+"""
+
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+IMPORT_TIME_PREFIX = "import time:"
+
+
+@dataclass
+class ImportTiming:
+    """Time spent importing a module, in seconds"""
+
+    module: str
+    self_seconds: float
+    cumulative_seconds: float
+    depth: int
+
+    @property
+    def package(self) -> str:
+        """Top level package of the module"""
+        return self.module.split(".")[0]
+
+
+def parse_import_times(lines: Iterable[str]) -> list[ImportTiming]:
+    """Parse the `-X importtime` report written to stderr"""
+    timings = []
+
+    for line in lines:
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+
+        self_us, cumulative_us, name = line[len(IMPORT_TIME_PREFIX) :].split("|")
+
+        # The header row has labels instead of timings
+        if not self_us.strip().isdigit():
+            continue
+
+        module = name.lstrip()
+        timings.append(
+            ImportTiming(
+                module=module.strip(),
+                self_seconds=int(self_us) / 1e6,
+                cumulative_seconds=int(cumulative_us) / 1e6,
+                depth=(len(name) - len(module) - 1) // 2,
+            )
+        )
+
+    return timings
+
+
+def profile_imports(module: str = "backend.main") -> list[ImportTiming]:
+    """Import a module in a new interpreter and return the time of every import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    return parse_import_times(result.stderr.splitlines())
+
+
+def get_package_import_times(timings: list[ImportTiming]) -> dict[str, float]:
+    """Total import time of each top level package, slowest first"""
+    package_times: dict[str, float] = {}
+
+    for timing in timings:
+        package_times[timing.package] = (
+            package_times.get(timing.package, 0.0) + timing.self_seconds
+        )
+
+    return dict(sorted(package_times.items(), key=lambda item: -item[1]))
@@ -0,0 +1,90 @@
+"""
+Schema migrations, run once per deploy instead of once per worker.
+
+`python -m backend.cli migrate` upgrades the schema while holding a Postgres
+advisory lock, so concurrent deploys apply each migration exactly once. On
+startup a worker only compares the revision stamped in the database with the
+head of the migration scripts. The check takes the same lock in shared mode,
+so a worker that boots during a migration waits for it to finish instead of
+reading a half-migrated schema.
+"""
+
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Connection, Engine, text
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+ALEMBIC_CONFIG_PATH = Path(__file__).resolve().parents[1] / "alembic.ini"
+
+# Arbitrary application wide key of the advisory lock held while migrating
+MIGRATION_LOCK_KEY = 727_150_331
+
+
+class SchemaRevisionError(RuntimeError):
+    """The database schema is not at the revision the code expects"""
+
+
+def get_alembic_config(connection: Connection | None = None) -> Config:
+    """Alembic configuration, running against the given connection if any"""
+    alembic_cfg = Config(str(ALEMBIC_CONFIG_PATH))
+    alembic_cfg.attributes["connection"] = connection
+
+    return alembic_cfg
+
+
+def get_head_revisions() -> set[str]:
+    """Head revisions of the migration scripts"""
+    return set(ScriptDirectory.from_config(get_alembic_config()).get_heads())
+
+
+def get_current_revisions(connection: Connection) -> set[str]:
+    """Revisions stamped in the database"""
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def run_migrations(engine: Engine, revision: str = "head"):
+    """Upgrade the schema to a revision while holding the migration lock"""
+    with engine.connect() as connection:
+        logger.info("Waiting for the migration lock")
+        connection.execute(
+            text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+        )
+        connection.commit()
+
+        try:
+            with connection.begin():
+                command.upgrade(get_alembic_config(connection), revision)
+        finally:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY}
+            )
+            connection.commit()
+
+    logger.info("Database schema upgraded to %s", revision)
+
+
+def check_schema_revision(engine: Engine):
+    """Raise SchemaRevisionError unless the database is at the script heads"""
+    head_revisions = get_head_revisions()
+
+    with engine.connect() as connection:
+        # Waits for a migration in progress, released when the transaction ends
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock_shared(:key)"),
+            {"key": MIGRATION_LOCK_KEY},
+        )
+        current_revisions = get_current_revisions(connection)
+
+    if current_revisions != head_revisions:
+        raise SchemaRevisionError(
+            f"Database schema is at {sorted(current_revisions) or 'no revision'}, "
+            f"expected {sorted(head_revisions)}. "
+            "Run `python -m backend.cli migrate` before starting the API."
+        )
+
+    logger.info("Database schema is at %s", sorted(current_revisions))
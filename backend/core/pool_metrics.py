@@ -0,0 +1,172 @@
+"""
+Connection pool instrumentation.
+
+Pool events count checkouts, checkins and the connections opened and closed,
+and keep the time each pooled connection was opened so their age can be
+reported. The time spent waiting for a connection is measured by the
+Instrumented pool classes around Pool.connect, which is where a request
+blocks when every connection is checked out.
+"""
+
+from threading import Lock
+from time import monotonic, perf_counter
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from backend.schemas.monitoring import DatabasePoolStats
+
+# A checkout slower than this had to wait for a connection to be returned
+# or opened.
+CHECKOUT_WAIT_THRESHOLD_SECONDS = 0.005
+
+
+class PoolMetrics:
+    """Counters of a connection pool, updated from its pool events"""
+
+    def __init__(self, engine: Engine | AsyncEngine):
+        self.engine = getattr(engine, "sync_engine", engine)
+        self._lock = Lock()
+        self._connected_at: dict[int, float] = {}
+        self.checkouts = 0
+        self.checkins = 0
+        self.peak_checked_out = 0
+        self.overflow_checkouts = 0
+        self.waits = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.invalidations = 0
+
+    def listen(self):
+        """
+        Register the pool event listeners on the engine. Listeners on the
+        engine carry over to the pool created when the engine is disposed.
+        """
+        engine = self.engine
+
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+        if isinstance(engine.pool, InstrumentedPoolMixin):
+            engine.pool.metrics = self
+
+    def _on_connect(self, _dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_opened += 1
+            self._connected_at[id(connection_record)] = monotonic()
+
+    def _on_checkout(self, _dbapi_connection, _connection_record, _proxy):
+        pool = self.engine.pool
+
+        with self._lock:
+            self.checkouts += 1
+            checked_out = pool.checkedout() if isinstance(pool, QueuePool) else 0
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+            if isinstance(pool, QueuePool) and checked_out > pool.size():
+                self.overflow_checkouts += 1
+
+    def _on_checkin(self, _dbapi_connection, _connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_close(self, _dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_closed += 1
+            self._connected_at.pop(id(connection_record), None)
+
+    def _on_invalidate(self, _dbapi_connection, _connection_record, _exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_checkout(self, seconds: float, timed_out: bool = False):
+        """Record the time a request took to get a connection from the pool"""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+
+            if seconds >= CHECKOUT_WAIT_THRESHOLD_SECONDS:
+                self.waits += 1
+                self.total_wait_seconds += seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def stats(self) -> DatabasePoolStats:
+        """Current pool occupancy together with the counters"""
+        pool = self.engine.pool
+        now = monotonic()
+
+        with self._lock:
+            ages = [now - connected_at for connected_at in self._connected_at.values()]
+            is_queue_pool = isinstance(pool, QueuePool)
+
+            return DatabasePoolStats(
+                pool_class=type(pool).__name__,
+                size=pool.size() if is_queue_pool else 0,
+                max_overflow=getattr(pool, "max_overflow", 0),
+                checked_out=pool.checkedout() if is_queue_pool else 0,
+                checked_in=pool.checkedin() if is_queue_pool else 0,
+                overflow=max(pool.overflow(), 0) if is_queue_pool else 0,
+                checkouts=self.checkouts,
+                checkins=self.checkins,
+                peak_checked_out=self.peak_checked_out,
+                overflow_checkouts=self.overflow_checkouts,
+                waits=self.waits,
+                mean_wait_seconds=(
+                    self.total_wait_seconds / self.waits if self.waits else 0.0
+                ),
+                max_wait_seconds=self.max_wait_seconds,
+                timeouts=self.timeouts,
+                connections_opened=self.connections_opened,
+                connections_closed=self.connections_closed,
+                invalidations=self.invalidations,
+                open_connections=len(ages),
+                mean_connection_age_seconds=sum(ages) / len(ages) if ages else 0.0,
+                max_connection_age_seconds=max(ages, default=0.0),
+            )
+
+
+class InstrumentedPoolMixin:
+    """Time every checkout of a pool and report it to the pool's metrics"""
+
+    metrics: PoolMetrics | None = None
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+
+    def connect(self):
+        """Check out a connection, recording how long it took"""
+        if self.metrics is None:
+            return super().connect()
+
+        started = perf_counter()
+        timed_out = False
+
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.record_checkout(perf_counter() - started, timed_out)
+
+    def recreate(self):
+        """Keep reporting to the same metrics after the engine is disposed"""
+        pool = super().recreate()
+        pool.metrics = self.metrics
+
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    """QueuePool that reports its checkout times"""
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that reports its checkout times"""
@@ -0,0 +1,49 @@
+"""
+Per-request count of the SQL statements sent to the database.
+
+Every engine reports its statements through before_cursor_execute. The count
+lives in a context variable set for the duration of a request, so statements
+issued from the threadpool and from the async session land on the request
+that issued them.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+
+@dataclass
+class QueryCount:
+    """Statements executed within a count_queries block"""
+
+    statements: int = 0
+
+
+_query_count: ContextVar[QueryCount | None] = ContextVar("query_count", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(
+    _connection, _cursor, _statement, _parameters, _context, _executemany
+):
+    query_count = _query_count.get()
+
+    if query_count is not None:
+        query_count.statements += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCount]:
+    """Count the statements executed on any engine within the block"""
+    query_count = QueryCount()
+    token = _query_count.set(query_count)
+
+    try:
+        yield query_count
+    finally:
+        _query_count.reset(token)
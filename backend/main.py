@@ -1,17 +1,115 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from .routers.users.users import router as user_router
 from backend.routers.scores.scores import router as scores_router
-from backend.models import *  # pylint: disable=wildcard-import
-from backend.core.database import run_migrations
+from backend.routers.matches.matches import router as matches_router
+from backend.routers.monitoring.monitoring import router as monitoring_router
+from backend.core.config import settings
+from backend.core.database import async_engine, engine
+from backend.core.logging import get_logger
+from backend.core.query_counter import QUERY_COUNT_HEADER, count_queries
+from backend.routers.users.exceptions import GeocodingServiceError
+from backend.services.location_service import geocoder
+from backend.services.passwords import password_hasher
+
+logger = get_logger(__name__)
+
+
+def prepare_database_schema():
+    """
+    Check the schema revision, or upgrade it when DB_MIGRATIONS_ON_STARTUP
+    is set to upgrade. Deploys run `python -m backend.cli migrate` first.
+    """
+    # pylint: disable=import-outside-toplevel
+    from backend.core.migrations import check_schema_revision, run_migrations
+
+    if settings.db_migrations_on_startup == "upgrade":
+        run_migrations(engine)
+    elif settings.db_migrations_on_startup == "check":
+        check_schema_revision(engine)
+
+
+def warm_start_therapist_index():
+    """
+    Load the therapist index from the snapshot at THERAPIST_INDEX_SNAPSHOT_PATH,
+    exported by `python -m backend.cli export-therapist-index`. Without a
+    snapshot the index is loaded from the database on the first match.
+    """
+    # pylint: disable=import-outside-toplevel
+    from sqlmodel import Session
+    from backend.services.index_snapshot import warm_start_therapist_index as load
+
+    path = settings.therapist_index_snapshot_path
+
+    if not path:
+        return
+
+    if not os.path.exists(path):
+        logger.warning("Therapist index snapshot %s is missing", path)
+        return
+
+    try:
+        with Session(engine) as session:
+            load(session, path)
+    except Exception:
+        logger.exception("Unable to load the therapist index snapshot %s", path)
+
+
+def refresh_therapist_index():
+    """Apply the match vectors written by the other workers to a loaded index"""
+    # pylint: disable=import-outside-toplevel
+    from sqlmodel import Session
+    from backend.services.therapist_index import therapist_index
+
+    if not therapist_index.is_loaded:
+        return
+
+    with Session(engine) as session:
+        therapist_index.refresh(session)
+
+
+async def refresh_therapist_index_periodically():
+    """
+    Poll the match vectors every THERAPIST_INDEX_REFRESH_SECONDS, so scores and
+    profiles written through another worker reach this worker's index
+    """
+    while True:
+        await asyncio.sleep(settings.therapist_index_refresh_seconds)
+
+        try:
+            await asyncio.to_thread(refresh_therapist_index)
+        except Exception:
+            logger.exception("Unable to refresh the therapist index")
 
 
 @asynccontextmanager
 async def lifespan(app_: FastAPI):
-    run_migrations()
+    await asyncio.to_thread(prepare_database_schema)
+    await asyncio.to_thread(warm_start_therapist_index)
+
+    refresh_task = (
+        asyncio.create_task(refresh_therapist_index_periodically())
+        if settings.therapist_index_refresh_seconds > 0
+        else None
+    )
+
+    # The postal code table is compiled at deploy time and only mapped here
+    try:
+        geocoder.load()
+    except GeocodingServiceError as e:
+        logger.warning(str(e))
+
     yield
 
+    if refresh_task is not None:
+        refresh_task.cancel()
+
+    await async_engine.dispose()
+    password_hasher.shutdown()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -24,8 +122,27 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+
+async def count_database_queries(request: Request, call_next):
+    """Report the number of SQL statements a request executed"""
+    with count_queries() as query_count:
+        response = await call_next(request)
+
+    response.headers[QUERY_COUNT_HEADER] = str(query_count.statements)
+
+    return response
+
+
+# A debugging aid for the tests and local profiling, not for production
+if settings.query_count_header:
+    app.middleware("http")(count_database_queries)
+
+
 app.include_router(scores_router)
 app.include_router(user_router)
+app.include_router(matches_router)
+app.include_router(monitoring_router)
 
 
 @app.get("/")
@@ -1,10 +1,66 @@
+from datetime import datetime
+from typing import List
 from uuid import UUID
+from sqlalchemy import REAL, CheckConstraint, Column, DateTime, Index, String, func
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlmodel import Field, SQLModel
+from backend.routers.users.user_types import TherapistTypeOption
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER
 
 
 class Match(SQLModel, table=True):
+    """A therapist ranked for a patient when the patient registered"""
+
     __tablename__ = "matches"
+    __table_args__ = (
+        # The patient dashboard reads the matches of a patient in rank order
+        Index("ix_matches_patient_id_rank", "patient_id", "rank", unique=True),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     patient_id: UUID | None = Field(default=None, foreign_key="patients.id")
     therapist_id: UUID | None = Field(default=None, foreign_key="therapists.id")
+    score: float
+    rank: int
+
+
+class TherapistMatchVector(SQLModel, table=True):
+    """
+    Denormalized match features of a scored therapist, maintained by the
+    services that write personality test scores and therapist profiles.
+
+    traits holds the calculated scores as float4 in PERSONALITY_TRAIT_ORDER so
+    the matching engine reads them into NumPy without building Decimals.
+    """
+
+    __tablename__ = "therapist_match_vectors"
+    __table_args__ = (
+        CheckConstraint(
+            f"cardinality(traits) = {len(PERSONALITY_TRAIT_ORDER)}",
+            name="ck_therapist_match_vectors_traits",
+        ),
+    )
+
+    therapist_id: UUID = Field(
+        foreign_key="therapists.id", primary_key=True, ondelete="CASCADE"
+    )
+    traits: List[float] = Field(sa_column=Column(ARRAY(REAL), nullable=False))
+    latitude: float | None = Field(default=None)
+    longitude: float | None = Field(default=None)
+    specializations: List[str] = Field(
+        default_factory=list, sa_column=Column(ARRAY(String))
+    )
+    is_lgbtq_specialization: bool = Field(default=False)
+    is_religious_specialization: bool = Field(default=False)
+    therapist_type: TherapistTypeOption | None = Field(default=None)
+    is_profile_complete: bool = Field(default=False)
+    updated_at: datetime | None = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            index=True,
+            server_default=func.now(),
+            onupdate=func.now(),
+        ),
+    )
@@ -1,22 +1,33 @@
 from uuid import UUID, uuid4
 from typing import Optional, List
 from decimal import Decimal
-from pydantic import EmailStr, ConfigDict, field_validator, ValidationError
-from sqlalchemy import Column, String
-from sqlalchemy.dialects.postgresql import ARRAY, JSON
+from pydantic import EmailStr, ConfigDict, field_validator
+from sqlalchemy import BigInteger, Column, Index, SmallInteger, String, func, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlmodel import Field, SQLModel, Relationship
 from backend.schemas.users import CanadianPostalCode
 from backend.routers.users.user_types import (
     GenderOption,
     TherapistTypeOption,
 )
-from backend.schemas.scores import PersonalityTestQuestion
+from backend.types.personality_test_codec import (
+    QUESTIONS_PER_CATEGORY,
+    empty_category,
+)
 
 
 class User(SQLModel, table=True):
     """Base user model"""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Emails are matched case insensitively, see get_user_by_email
+        Index(
+            "ix_users_email_address_lower",
+            func.lower(text("email_address")),
+            unique=True,
+        ),
+    )
 
     id: UUID | None = Field(default_factory=uuid4, primary_key=True)
     first_name: str
@@ -60,6 +71,19 @@ class Therapist(ProfileMixin, table=True):
     """Therapist model"""
 
     __tablename__ = "therapists"
+    __table_args__ = (
+        Index(
+            "ix_therapists_specializations", "specializations", postgresql_using="gin"
+        ),
+        # Only therapists with a completed profile are ever matched
+        Index(
+            "ix_therapists_profile_complete_filters",
+            "is_lgbtq_specialization",
+            "is_religious_specialization",
+            "therapist_type",
+            postgresql_where=text("is_profile_complete"),
+        ),
+    )
 
     id: UUID | None = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID | None = Field(default=None, foreign_key="users.id", unique=True)
@@ -96,13 +120,27 @@ class Patient(ProfileMixin, table=True):
 
 
 class PersonalityTestScoreBaseMixin(SQLModel):
-    """Mixin for the personality test score for patients and therapists."""
+    """
+    Mixin for the personality test answers of patients and therapists, encoded
+    by backend.types.personality_test_codec
+    """
 
-    neuroticism: list[dict] = Field(sa_type=JSON, default_factory=list)
-    openness: list[dict] = Field(sa_type=JSON, default_factory=list)
-    extroversion: list[dict] = Field(sa_type=JSON, default_factory=list)
-    conscientiousness: list[dict] = Field(sa_type=JSON, default_factory=list)
-    agreeableness: list[dict] = Field(sa_type=JSON, default_factory=list)
+    neuroticism: list[int | None] = Field(
+        sa_type=ARRAY(SmallInteger), default_factory=empty_category
+    )
+    openness: list[int | None] = Field(
+        sa_type=ARRAY(SmallInteger), default_factory=empty_category
+    )
+    extroversion: list[int | None] = Field(
+        sa_type=ARRAY(SmallInteger), default_factory=empty_category
+    )
+    conscientiousness: list[int | None] = Field(
+        sa_type=ARRAY(SmallInteger), default_factory=empty_category
+    )
+    agreeableness: list[int | None] = Field(
+        sa_type=ARRAY(SmallInteger), default_factory=empty_category
+    )
+    answered_mask: int = Field(default=0, sa_type=BigInteger)
 
     model_config = ConfigDict(validate_assignment=True)  # type: ignore
 
@@ -110,13 +148,12 @@ class PersonalityTestScoreBaseMixin(SQLModel):
         "neuroticism", "openness", "extroversion", "conscientiousness", "agreeableness"
     )
     @classmethod
-    def validate_questions(cls, v: list[dict]):
-        """validate that each item in the list conforms to PersonalityTestQuestion"""
-        for item in v:
-            try:
-                PersonalityTestQuestion(**item)
-            except ValidationError as e:
-                raise ValueError(f"Invalid question format: {e}") from e
+    def validate_question_slots(cls, v: list[int | None]):
+        """validate that a category holds one score slot per question"""
+        if len(v) != QUESTIONS_PER_CATEGORY:
+            raise ValueError(
+                f"Invalid question slots: expected {QUESTIONS_PER_CATEGORY} slots"
+            )
         return v
 
 
@@ -0,0 +1,18 @@
+class InvalidMatchCursorError(ValueError):
+    """Raised when a match page cursor cannot be decoded."""
+
+
+class IncompletePersonalityTestError(ValueError):
+    """Raised when a personality test has no completed category to match on."""
+
+
+class MissingPatientLocationError(ValueError):
+    """Raised when matches are filtered by distance for a patient without a location."""
+
+
+class IndexSnapshotFormatError(ValueError):
+    """Raised when a file is not a readable therapist index snapshot."""
+
+
+class MatchCreationError(Exception):
+    """Raised when the matches of a patient cannot be stored."""
@@ -0,0 +1,107 @@
+"""Router for ranking therapists against a patient's personality test."""
+
+from typing import Annotated
+from fastapi import APIRouter, status, HTTPException, Depends, Query
+from backend.core.database import AsyncSessionDep, SessionDep
+from backend.models.user import AnonymousPatient, Patient
+from backend.routers.users.dependencies import (
+    get_anonymous_patient_with_personality_test,
+    get_patient_by_user_id,
+)
+from backend.routers.matches.exceptions import (
+    InvalidMatchCursorError,
+    IncompletePersonalityTestError,
+    MissingPatientLocationError,
+)
+from backend.schemas.matches import TherapistMatchPage, TherapistMatchRead
+from backend.services.matching import (
+    DEFAULT_MATCH_LIMIT,
+    get_patient_matches,
+    get_therapist_match_page,
+)
+from backend.services.scores import calculate_completed_trait_scores
+from backend.core.logging import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+MAX_MATCH_PAGE_SIZE = 50
+MAX_MATCH_RADIUS_KM = 500
+
+
+@router.get(
+    "/anonymous-sessions/matches",
+    status_code=status.HTTP_200_OK,
+    response_model=TherapistMatchPage,
+)
+def get_anonymous_session_matches(
+    anonymous_patient: Annotated[
+        AnonymousPatient, Depends(get_anonymous_patient_with_personality_test)
+    ],
+    session: SessionDep,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_MATCH_PAGE_SIZE)] = DEFAULT_MATCH_LIMIT,
+    radius_km: Annotated[float | None, Query(gt=0, le=MAX_MATCH_RADIUS_KM)] = None,
+):
+    """
+    Get a page of therapists ranked against the anonymous patient's personality test.
+    Categories that are not fully answered yet are left out of the ranking.
+    With radius_km only therapists within that distance of the patient are ranked.
+    """
+    personality_test = anonymous_patient.personality_test
+
+    if not personality_test:
+        logger.warning("Personality test not found on the anonymous patient")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Personality test not found on the anonymous patient",
+        )
+
+    try:
+        trait_scores = calculate_completed_trait_scores(personality_test)
+
+        if not trait_scores:
+            raise IncompletePersonalityTestError(
+                "At least one personality test category must be completed"
+            )
+
+        location = None
+
+        if radius_km is not None:
+            if (
+                anonymous_patient.latitude is None
+                or anonymous_patient.longitude is None
+            ):
+                raise MissingPatientLocationError(
+                    "A postal code is required to filter matches by distance"
+                )
+
+            location = (anonymous_patient.latitude, anonymous_patient.longitude)
+
+        return get_therapist_match_page(
+            trait_scores, session, cursor, limit, location, radius_km
+        )
+
+    except (
+        InvalidMatchCursorError,
+        IncompletePersonalityTestError,
+        MissingPatientLocationError,
+    ) as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        logger.exception("Unable to rank therapists for the anonymous patient")
+        raise HTTPException(status_code=500, detail="Unable to rank therapists") from e
+
+
+@router.get(
+    "/patients/me/matches",
+    status_code=status.HTTP_200_OK,
+    response_model=list[TherapistMatchRead],
+)
+async def get_current_patient_matches(
+    patient: Annotated[Patient, Depends(get_patient_by_user_id)],
+    session: AsyncSessionDep,
+):
+    """Get the therapists matched to the patient when they registered, best first"""
+    return await get_patient_matches(patient, session)
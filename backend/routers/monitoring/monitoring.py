@@ -0,0 +1,23 @@
+"""Router for operational metrics of the API."""
+
+from fastapi import APIRouter, status
+from backend.core.database import pool_metrics, async_pool_metrics
+from backend.schemas.monitoring import DatabasePoolsRead
+
+router = APIRouter()
+
+
+@router.get(
+    "/monitoring/database-pools",
+    status_code=status.HTTP_200_OK,
+    response_model=DatabasePoolsRead,
+)
+async def get_database_pool_stats():
+    """
+    Get the occupancy and counters of the database connection pools.
+    Rising waits and checked out connections close to size + max_overflow
+    show the pool running out before requests start timing out.
+    """
+    return DatabasePoolsRead(
+        sync_pool=pool_metrics.stats(), async_pool=async_pool_metrics.stats()
+    )
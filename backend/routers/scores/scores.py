@@ -3,17 +3,21 @@
 from typing import Annotated
 from fastapi import APIRouter, status, HTTPException, Depends
 from sqlalchemy.exc import SQLAlchemyError
-from backend.core.database import SessionDep
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.core.database import AsyncSessionDep
 from backend.models.user import AnonymousPatient, Therapist, TherapistPersonalityTest
 from backend.routers.users.dependencies import (
-    get_anonymous_patient,
-    get_therapist_by_user_id,
+    get_anonymous_patient_with_personality_test,
+    get_therapist_with_raw_personality_test,
+    get_therapist_with_raw_personality_test_for_update,
+    get_therapist_with_personality_tests_for_update,
 )
 from backend.routers.scores.exceptions import TestScoreCreationError
 from backend.schemas.scores import (
     AnonymousPersonalityTestRead,
     TherapistPersonalityTestRead,
     PersonalityTestQuestion,
+    PersonalityTestAnswerBatch,
 )
 from backend.services.scores import (
     create_therapist_personality_test_instance,
@@ -25,9 +29,11 @@ from backend.services.scores import (
     get_is_personality_test_complete,
     format_personality_test,
     add_therapist_personality_test_score,
+    set_personality_test_answers,
 )
 
 from backend.core.logging import get_logger
+from backend.services.identity_cache import identity_cache
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -38,9 +44,11 @@ logger = get_logger(__name__)
     status_code=status.HTTP_201_CREATED,
     response_model=TherapistPersonalityTestRead,
 )
-def create_therapist_personality_test(
-    therapist: Annotated[Therapist, Depends(get_therapist_by_user_id)],
-    session: SessionDep,
+async def create_therapist_personality_test(
+    therapist: Annotated[
+        Therapist, Depends(get_therapist_with_raw_personality_test_for_update)
+    ],
+    session: AsyncSessionDep,
 ):
     """Create a personality test record for a therapist."""
 
@@ -53,7 +61,8 @@ def create_therapist_personality_test(
     try:
         personality_test = TherapistPersonalityTest(therapist_id=therapist.id)
 
-        create_therapist_personality_test_instance(personality_test, session)
+        await create_therapist_personality_test_instance(personality_test, session)
+        identity_cache.invalidate(str(therapist.user_id))
         logger.info("Personality test created")
 
         return TherapistPersonalityTestRead(
@@ -75,8 +84,8 @@ def create_therapist_personality_test(
     status_code=status.HTTP_200_OK,
     response_model=TherapistPersonalityTestRead,
 )
-def get_therapist_personality_test(
-    therapist: Annotated[Therapist, Depends(get_therapist_by_user_id)]
+async def get_therapist_personality_test(
+    therapist: Annotated[Therapist, Depends(get_therapist_with_raw_personality_test)]
 ):
     """
     Get the personality test answers of the therapist.
@@ -95,10 +104,12 @@ def get_therapist_personality_test(
     status_code=status.HTTP_200_OK,
     response_model=TherapistPersonalityTestRead,
 )
-def patch_therapist_personality_test(
+async def patch_therapist_personality_test(
     data: PersonalityTestQuestion,
-    therapist: Annotated[Therapist, Depends(get_therapist_by_user_id)],
-    session: SessionDep,
+    therapist: Annotated[
+        Therapist, Depends(get_therapist_with_personality_tests_for_update)
+    ],
+    session: AsyncSessionDep,
 ):
     """
     Patch route to update the answers of the therapist personality test.
@@ -110,58 +121,108 @@ def patch_therapist_personality_test(
             status_code=400, detail="Therapist personality test not found"
         )
 
-    raw_personality_test_scores = therapist.raw_personality_scores
-
     try:
         updated_test_category_obj = update_therapist_personality_test_category(
-            data, raw_personality_test_scores
+            data, therapist.raw_personality_scores
         )
 
-        logger.info("Persisting the updated therapist personality test to the DB")
+        return await _save_therapist_personality_test(
+            updated_test_category_obj, therapist, session
+        )
+
+    except (TestScoreCreationError, ValueError) as e:
+        logger.exception(str(e))
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except Exception as e:
+        logger.exception("Unable to save the updated therapist personality test")
+        raise HTTPException(
+            status_code=500,
+            detail="Unable to save the updated therapist personality test",
+        ) from e
+
+
+@router.patch(
+    "/therapists/me/personality-test/batch",
+    status_code=status.HTTP_200_OK,
+    response_model=TherapistPersonalityTestRead,
+)
+async def patch_therapist_personality_test_batch(
+    data: PersonalityTestAnswerBatch,
+    therapist: Annotated[
+        Therapist, Depends(get_therapist_with_personality_tests_for_update)
+    ],
+    session: AsyncSessionDep,
+):
+    """
+    Patch route to save a batch of answers of the therapist personality test
+    in one transaction.
+    """
+    if not therapist.raw_personality_scores:
+        raise HTTPException(
+            status_code=400, detail="Therapist personality test not found"
+        )
 
-        updated_therapist_personality_test = patch_therapist_test_score_category(
-            updated_test_category_obj, raw_personality_test_scores, session
+    try:
+        updated_test_categories = set_personality_test_answers(
+            data, therapist.raw_personality_scores
         )
 
-        is_personality_test_complete = get_is_personality_test_complete(
-            raw_personality_test_scores
+        return await _save_therapist_personality_test(
+            updated_test_categories, therapist, session
+        )
+
+    except (TestScoreCreationError, ValueError) as e:
+        logger.exception(str(e))
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except Exception as e:
+        logger.exception("Unable to save the therapist personality test answers")
+        raise HTTPException(
+            status_code=500,
+            detail="Unable to save the therapist personality test answers",
+        ) from e
+
+
+async def _save_therapist_personality_test(
+    updated_categories: dict, therapist: Therapist, session: AsyncSession
+) -> TherapistPersonalityTestRead:
+    """
+    Persist the updated answer categories, and calculate the personality test
+    scores once every question has been answered.
+    """
+    raw_personality_test_scores = therapist.raw_personality_scores
+
+    try:
+        logger.info("Persisting the updated therapist personality test to the DB")
+
+        updated_therapist_personality_test = await patch_therapist_test_score_category(
+            updated_categories, raw_personality_test_scores, session
         )
 
-        if is_personality_test_complete:
+        if get_is_personality_test_complete(raw_personality_test_scores):
             logger.info(
                 """Therapist personality test is complete.
                 Calculating and saving the personality test scores."""
             )
 
             formatted_personality_test_score = format_personality_test(
-                therapist.raw_personality_scores
+                raw_personality_test_scores
             )
 
-            therapist_test_update = add_therapist_personality_test_score(
+            therapist_test_update = await add_therapist_personality_test_score(
                 therapist, formatted_personality_test_score, session
             )
 
-            return TherapistPersonalityTestRead(
-                **(
-                    therapist_test_update.model_dump()
-                    if therapist_test_update
-                    else updated_therapist_personality_test.model_dump()
+            if therapist_test_update:
+                return TherapistPersonalityTestRead(
+                    **therapist_test_update.model_dump()
                 )
-            )
-
-    except (TestScoreCreationError, ValueError) as e:
-        logger.exception(str(e))
-        raise HTTPException(status_code=404, detail=str(e)) from e
-    except Exception as e:
-        logger.exception("Unable to save the updated therapist personality test")
-        raise HTTPException(
-            status_code=500,
-            detail="Unable to save the updated therapist personality test",
-        ) from e
 
-    return TherapistPersonalityTestRead(
-        **updated_therapist_personality_test.model_dump()
-    )
+        return TherapistPersonalityTestRead(
+            **updated_therapist_personality_test.model_dump()
+        )
+    finally:
+        # The cached therapist holds the answers and scores that were just saved
+        identity_cache.invalidate(str(therapist.user_id))
 
 
 # TODO: The below post route should be refactored
@@ -171,9 +232,11 @@ def patch_therapist_personality_test(
     status_code=status.HTTP_201_CREATED,
     response_model=AnonymousPersonalityTestRead,
 )
-def create_anonymous_session_test_scores(
-    anonymous_patient: Annotated[AnonymousPatient, Depends(get_anonymous_patient)],
-    session: SessionDep,
+async def create_anonymous_session_test_scores(
+    anonymous_patient: Annotated[
+        AnonymousPatient, Depends(get_anonymous_patient_with_personality_test)
+    ],
+    session: AsyncSessionDep,
 ):
     """Create a test score for an anonymous session."""
     if anonymous_patient.personality_test:
@@ -186,7 +249,9 @@ def create_anonymous_session_test_scores(
     logger.info("Creating anonymous session test score to db")
 
     try:
-        test_score = create_anonymous_session_test_score(anonymous_patient, session)
+        test_score = await create_anonymous_session_test_score(
+            anonymous_patient, session
+        )
         logger.info("Anonymous test score created")
 
     except TestScoreCreationError as e:
@@ -211,8 +276,10 @@ def create_anonymous_session_test_scores(
     status_code=status.HTTP_200_OK,
     response_model=AnonymousPersonalityTestRead,
 )
-def get_anonymous_session_personality_test(
-    anonymous_patient: Annotated[AnonymousPatient, Depends(get_anonymous_patient)],
+async def get_anonymous_session_personality_test(
+    anonymous_patient: Annotated[
+        AnonymousPatient, Depends(get_anonymous_patient_with_personality_test)
+    ],
 ):
     """Get answers to a personality test"""
     personality_test = anonymous_patient.personality_test
@@ -233,10 +300,12 @@ def get_anonymous_session_personality_test(
     status_code=status.HTTP_200_OK,
     response_model=AnonymousPersonalityTestRead,
 )
-def patch_personality_test(
+async def patch_personality_test(
     data: PersonalityTestQuestion,
-    anonymous_patient: Annotated[AnonymousPatient, Depends(get_anonymous_patient)],
-    session: SessionDep,
+    anonymous_patient: Annotated[
+        AnonymousPatient, Depends(get_anonymous_patient_with_personality_test)
+    ],
+    session: AsyncSessionDep,
 ):
     """patch route to update the answers of the personality test"""
     personality_test = anonymous_patient.personality_test
@@ -250,7 +319,7 @@ def patch_personality_test(
         updated_personality_test_object = update_anonymous_session_test_score_category(
             data, personality_test
         )
-        patch_anonymous_test_score_persist = patch_anonymous_test_score_category(
+        patch_anonymous_test_score_persist = await patch_anonymous_test_score_category(
             updated_personality_test_object, personality_test, session
         )
         return patch_anonymous_test_score_persist
@@ -267,3 +336,44 @@ def patch_personality_test(
         raise HTTPException(
             status_code=500, detail="Error on personality test patch"
         ) from e
+
+
+@router.patch(
+    "/anonymous-sessions/personality-tests/batch",
+    status_code=status.HTTP_200_OK,
+    response_model=AnonymousPersonalityTestRead,
+)
+async def patch_personality_test_batch(
+    data: PersonalityTestAnswerBatch,
+    anonymous_patient: Annotated[
+        AnonymousPatient, Depends(get_anonymous_patient_with_personality_test)
+    ],
+    session: AsyncSessionDep,
+):
+    """patch route to save a batch of answers of the personality test at once"""
+    personality_test = anonymous_patient.personality_test
+
+    if not personality_test:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Personality test not found"
+        )
+
+    try:
+        updated_test_categories = set_personality_test_answers(data, personality_test)
+
+        return await patch_anonymous_test_score_category(
+            updated_test_categories, personality_test, session
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        ) from e
+    except Exception as e:
+        logger.exception("Error on personality test batch patch")
+        raise HTTPException(
+            status_code=500, detail="Error on personality test batch patch"
+        ) from e
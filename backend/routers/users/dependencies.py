@@ -1,16 +1,17 @@
 from typing import Annotated
+from uuid import UUID
 from fastapi.security import OAuth2PasswordBearer
 import jwt
 from fastapi import status, Depends, HTTPException
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlmodel import select
-from backend.core.database import SessionDep
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.core.database import AsyncSessionDep
 from backend.models.user import AnonymousPatient, Patient, Therapist, User
 from backend.core.logging import get_logger
-from ...services.users import (
-    SECRET_KEY,
-    ALGORITHM,
-    get_user_by_id,
-)
+from backend.services.identity_cache import detached_copy, identity_cache
+from ...services.users import decode_access_token, get_user_by_id
 
 logger = get_logger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -25,7 +26,7 @@ def get_current_session_id(token: str = Depends(oauth2_scheme)):
                 detail="Anonymous session cookie is missing.",
             )
 
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         session_id = payload.get("sub")
 
         if not session_id:
@@ -43,14 +44,18 @@ def get_current_session_id(token: str = Depends(oauth2_scheme)):
         ) from e
 
 
-def get_anonymous_patient(
-    db_session: SessionDep, session_id: Annotated[str, Depends(get_current_session_id)]
+async def _get_anonymous_patient(
+    db_session: AsyncSession, session_id: str, *options: ORMOption
 ) -> AnonymousPatient | None:
-    """gets an anonymous patient by session id"""
+    """gets an anonymous patient by session id, with the given loader options"""
 
     try:
-        anonymous_patient = db_session.exec(
-            select(AnonymousPatient).where(AnonymousPatient.session_id == session_id)
+        anonymous_patient = (
+            await db_session.exec(
+                select(AnonymousPatient)
+                .where(AnonymousPatient.session_id == session_id)
+                .options(*options)
+            )
         ).first()
 
         if not anonymous_patient:
@@ -69,93 +74,204 @@ def get_anonymous_patient(
         ) from e
 
 
-def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], session: SessionDep
-) -> User:
-    """Get the current user based on the token"""
-    credentials_exception = HTTPException(
+async def get_anonymous_patient(
+    db_session: AsyncSessionDep,
+    session_id: Annotated[str, Depends(get_current_session_id)],
+) -> AnonymousPatient | None:
+    """gets an anonymous patient by session id"""
+    return await _get_anonymous_patient(db_session, session_id)
+
+
+async def get_anonymous_patient_with_personality_test(
+    db_session: AsyncSessionDep,
+    session_id: Annotated[str, Depends(get_current_session_id)],
+) -> AnonymousPatient | None:
+    """gets an anonymous patient by session id together with its personality test"""
+    return await _get_anonymous_patient(
+        db_session, session_id, joinedload(AnonymousPatient.personality_test)
+    )
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _get_token_subject(token: str) -> str:
+    """Get the user id an access token was issued to"""
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
+        payload = decode_access_token(token)
+    except jwt.InvalidTokenError as e:
+        logger.exception("Invalid token error")
+        raise _credentials_exception() from e
 
-        if user_id is None:
-            raise credentials_exception
+    user_id = payload.get("sub")
 
-        user = get_user_by_id(user_id, session)
+    try:
+        return str(UUID(user_id))
+    except (TypeError, ValueError) as e:
+        logger.exception("Invalid token subject")
+        raise _credentials_exception() from e
 
-        if user is None:
-            raise credentials_exception
 
-    except jwt.InvalidTokenError as e:
-        logger.exception("Invalid token error")
-        raise credentials_exception from e
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)], session: AsyncSessionDep
+) -> User:
+    """Get the current user based on the token"""
+    user_id = _get_token_subject(token)
+
+    try:
+        user = await get_user_by_id(user_id, session)
     except Exception as e:
         logger.exception("Error retrieving current user")
-        raise credentials_exception from e
+        raise _credentials_exception() from e
+
+    if user is None:
+        raise _credentials_exception()
 
     return user
 
 
-def get_patient_by_user_id(
-    user: Annotated[User, Depends(get_current_user)], db_session: SessionDep
-) -> Patient | None:
-    """Retrieve a patient by user ID."""
+async def _get_current_profile(
+    token: str,
+    db_session: AsyncSession,
+    model: type[Patient] | type[Therapist],
+    relationships: tuple[str, ...] = (),
+    use_cache: bool = True,
+) -> Patient | Therapist:
+    """
+    Resolve an access token to the patient or therapist profile of its user in
+    a single query, joining the given relationships. Resolved profiles are kept
+    in the identity cache, and a cached profile is merged into the session
+    without querying the database.
+
+    Invalidating the cache only reaches the current process, so routes that
+    write the profile pass use_cache=False and always read it fresh.
+    """
+    user_id = _get_token_subject(token)
+    profile_name = model.__name__.lower()
+
+    cached_profile = (
+        identity_cache.get(user_id, (model, relationships)) if use_cache else None
+    )
 
-    if not user.id:
-        return None
+    if cached_profile is not None:
+        return await db_session.merge(cached_profile, load=False)
 
     try:
-        patient = db_session.exec(
-            select(Patient).where(Patient.user_id == user.id)
+        row = (
+            await db_session.exec(
+                select(User.id, model)
+                .outerjoin(model, model.user_id == User.id)
+                .where(User.id == user_id)
+                .options(
+                    *(
+                        joinedload(getattr(model, relationship))
+                        for relationship in relationships
+                    )
+                )
+            )
         ).first()
 
     except Exception as e:
-        logger.exception("Unable to get patient by user id")
+        logger.exception("Unable to get %s by user id", profile_name)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error retrieving patient data.",
+            detail=f"Error retrieving {profile_name} data.",
         ) from e
 
-    if not patient:
-        logger.exception("Patient id not found")
+    if row is None:
+        logger.error("User not found for token subject: %s", user_id)
+        raise _credentials_exception()
+
+    _, profile = row
+
+    if profile is None:
+        logger.error("%s not found for user_id: %s", model.__name__, user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Patient not found",
+            detail=f"{model.__name__} not found",
         )
 
-    return patient
+    identity_cache.set(
+        user_id, (model, relationships), detached_copy(profile, relationships)
+    )
 
+    return profile
+
+
+async def get_patient_by_user_id(
+    token: Annotated[str, Depends(oauth2_scheme)], db_session: AsyncSessionDep
+) -> Patient:
+    """Retrieve a patient by user ID."""
+    return await _get_current_profile(token, db_session, Patient)
 
-def get_therapist_by_user_id(
-    user: Annotated[User, Depends(get_current_user)], db_session: SessionDep
-) -> Therapist | None:
+
+async def get_therapist_by_user_id(
+    token: Annotated[str, Depends(oauth2_scheme)], db_session: AsyncSessionDep
+) -> Therapist:
     """Retrieve a therapist by user ID."""
+    return await _get_current_profile(token, db_session, Therapist)
 
-    if not user.id:
-        return None
 
-    try:
-        therapist = db_session.exec(
-            select(Therapist).where(Therapist.user_id == user.id)
-        ).first()
+async def get_therapist_for_update(
+    token: Annotated[str, Depends(oauth2_scheme)], db_session: AsyncSessionDep
+) -> Therapist:
+    """Retrieve a therapist by user ID from the database, bypassing the cache."""
+    return await _get_current_profile(token, db_session, Therapist, use_cache=False)
 
-    except Exception as e:
-        logger.exception("Unable to get therapist by user id")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error retrieving therapist data.",
-        ) from e
 
-    if not therapist:
-        logger.error("Therapist not found for user_id: %s", user.id)
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Therapist not found",
-        )
+async def get_therapist_with_raw_personality_test(
+    token: Annotated[str, Depends(oauth2_scheme)], db_session: AsyncSessionDep
+) -> Therapist:
+    """Retrieve a therapist by user ID together with the personality test answers."""
+    return await _get_current_profile(
+        token, db_session, Therapist, ("raw_personality_scores",)
+    )
+
 
-    return therapist
+async def get_therapist_with_raw_personality_test_for_update(
+    token: Annotated[str, Depends(oauth2_scheme)], db_session: AsyncSessionDep
+) -> Therapist:
+    """
+    Retrieve a therapist by user ID together with the personality test answers
+    from the database, bypassing the cache.
+    """
+    return await _get_current_profile(
+        token, db_session, Therapist, ("raw_personality_scores",), use_cache=False
+    )
+
+
+async def get_therapist_with_personality_tests(
+    token: Annotated[str, Depends(oauth2_scheme)], db_session: AsyncSessionDep
+) -> Therapist:
+    """
+    Retrieve a therapist by user ID together with the personality test answers
+    and the calculated scores.
+    """
+    return await _get_current_profile(
+        token,
+        db_session,
+        Therapist,
+        ("raw_personality_scores", "personality_test"),
+    )
+
+
+async def get_therapist_with_personality_tests_for_update(
+    token: Annotated[str, Depends(oauth2_scheme)], db_session: AsyncSessionDep
+) -> Therapist:
+    """
+    Retrieve a therapist by user ID together with the personality test answers
+    and the calculated scores from the database, bypassing the cache.
+    """
+    return await _get_current_profile(
+        token,
+        db_session,
+        Therapist,
+        ("raw_personality_scores", "personality_test"),
+        use_cache=False,
+    )
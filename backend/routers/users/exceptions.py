@@ -14,9 +14,17 @@ class UserCreationError(Exception):
     """Raised when there is an error creating a new user."""
 
 
+class UserAlreadyExistsError(UserCreationError):
+    """Raised when a user with the same email address already exists."""
+
+
 class PatientCreationError(Exception):
     """Raised when there is an error creating a new patient."""
 
 
 class TherapistUpdateError(Exception):
     """Raised when there is an error in updating the therapist model."""
+
+
+class PasswordHashingBusyError(Exception):
+    """Raised when too many password hashes are waiting for a worker."""
@@ -6,7 +6,7 @@ from datetime import timedelta
 from typing import Annotated
 from fastapi import APIRouter, status, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from backend.core.database import SessionDep
+from backend.core.database import AsyncSessionDep
 from backend.models.user import AnonymousPatient, Patient, Therapist
 from backend.core.logging import get_logger
 from backend.routers.users.user_types import UserOption
@@ -20,7 +20,10 @@ from backend.schemas.users import (
 )
 from backend.schemas.dashboard import TherapistDashboardRead
 from backend.routers.scores.exceptions import PersonalityTestScoreCreationError
+from backend.routers.matches.exceptions import MatchCreationError
 
+from backend.services.identity_cache import identity_cache
+from backend.services.matching import create_patient_matches
 from backend.services.scores import (
     create_patient_personality_test_score,
     format_personality_test,
@@ -31,15 +34,20 @@ from .exceptions import (
     PatientNotFoundError,
     InvalidPostalCodeError,
     GeocodingServiceError,
+    UserAlreadyExistsError,
     UserCreationError,
     PatientCreationError,
     TherapistUpdateError,
+    PasswordHashingBusyError,
 )
 
 from .dependencies import (
     get_anonymous_patient,
+    get_anonymous_patient_with_personality_test,
     get_patient_by_user_id,
     get_therapist_by_user_id,
+    get_therapist_for_update,
+    get_therapist_with_personality_tests,
 )
 
 from ...services.users import (
@@ -63,14 +71,27 @@ router = APIRouter()
 logger = get_logger(__name__)
 
 
+def _password_hashing_busy(error: PasswordHashingBusyError) -> HTTPException:
+    """503 asking the client to retry once the password hashers have capacity"""
+    logger.warning("Password hashing is saturated")
+
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    session: SessionDep,
+    session: AsyncSessionDep,
 ) -> Token:
     """Authenticate and create token"""
     try:
-        user = authenticate_user(session, form_data.username, form_data.password)
+        user = await authenticate_user(session, form_data.username, form_data.password)
+    except PasswordHashingBusyError as e:
+        raise _password_hashing_busy(e) from e
     except ValueError as e:
         logger.exception("Unable to authenticate user")
         raise HTTPException(
@@ -143,10 +164,12 @@ async def login_for_access_token(
 @router.post(
     "/patients", status_code=status.HTTP_201_CREATED, response_model=PatientRead
 )
-def register_patient(
+async def register_patient(
     data: UserCreate,
-    session: SessionDep,
-    anonymous_patient: Annotated[AnonymousPatient, Depends(get_anonymous_patient)],
+    session: AsyncSessionDep,
+    anonymous_patient: Annotated[
+        AnonymousPatient, Depends(get_anonymous_patient_with_personality_test)
+    ],
 ):
     """Register a new patient."""
     if not anonymous_patient:
@@ -155,7 +178,7 @@ def register_patient(
             status_code=400, detail="No anonymous patient found in session"
         )
 
-    existing_user = get_user_by_email(data.email_address, session)
+    existing_user = await get_user_by_email(data.email_address, session)
 
     is_patient_in_user_roles = (
         UserOption.PATIENT.value in (existing_user.roles or [])
@@ -172,29 +195,48 @@ def register_patient(
     logger.info("Registering patient")
 
     try:
-        user = existing_user if existing_user else create_user(data, session)
+        user = existing_user if existing_user else await create_user(data, session)
 
-        patient = create_patient(anonymous_patient, user.id, session)
+        patient = await create_patient(anonymous_patient, user.id, session)
 
         if existing_user:
-            update_user_roles(user, data.user_type, session)
+            await update_user_roles(user, data.user_type, session)
 
         formatted_personality_test_score = format_personality_test(
             anonymous_patient.personality_test
         )
 
-        patient_with_personality_test_score = create_patient_personality_test_score(
-            patient, formatted_personality_test_score, session
+        patient_with_personality_test_score = (
+            await create_patient_personality_test_score(
+                patient, formatted_personality_test_score, session
+            )
         )
 
+        try:
+            await create_patient_matches(
+                patient_with_personality_test_score,
+                formatted_personality_test_score,
+                session,
+            )
+        except MatchCreationError:
+            # The patient and their scores are already committed, so the
+            # registration succeeds with an empty match list
+            logger.warning("Registered a patient without stored matches")
+
         return PatientRead(
             id=patient_with_personality_test_score.id,
         )
 
+    except PasswordHashingBusyError as e:
+        raise _password_hashing_busy(e) from e
+
     except ValueError as e:
         logger.exception("Issue with data on the creation of the patient")
         raise HTTPException(status_code=400, detail=str(e)) from e
 
+    except UserAlreadyExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
     except (
         UserCreationError,
         PatientCreationError,
@@ -209,10 +251,10 @@ def register_patient(
     status_code=status.HTTP_201_CREATED,
     response_model=TherapistRead,
 )
-def register_therapist(data: UserCreate, session: SessionDep):
+async def register_therapist(data: UserCreate, session: AsyncSessionDep):
     """Register a new therapist."""
 
-    existing_user = get_user_by_email(data.email_address, session)
+    existing_user = await get_user_by_email(data.email_address, session)
 
     is_therapist_in_user_roles = (
         UserOption.THERAPIST.value in (existing_user.roles or [])
@@ -229,12 +271,12 @@ def register_therapist(data: UserCreate, session: SessionDep):
     logger.info("Registering therapist: %s", data.email_address)
 
     try:
-        user = existing_user if existing_user else create_user(data, session)
+        user = existing_user if existing_user else await create_user(data, session)
 
-        therapist = create_therapist(data, user.id, session)
+        therapist = await create_therapist(data, user.id, session)
 
         if existing_user:
-            update_user_roles(user, data.user_type, session)
+            await update_user_roles(user, data.user_type, session)
 
         logger.info("Created therapist")
 
@@ -244,9 +286,13 @@ def register_therapist(data: UserCreate, session: SessionDep):
         return TherapistRead(
             id=therapist.id,
         )
+    except PasswordHashingBusyError as e:
+        raise _password_hashing_busy(e) from e
     except ValueError as e:
         logger.exception("Issue with data on therapist creation")
         raise HTTPException(status_code=400, detail=str(e)) from e
+    except UserAlreadyExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
     except UserCreationError as e:
         logger.exception("Error creating therapist user")
         raise HTTPException(status_code=500, detail=str(e)) from e
@@ -260,8 +306,8 @@ def register_therapist(data: UserCreate, session: SessionDep):
     status_code=status.HTTP_201_CREATED,
     response_model=AnonymousSessionToken,
 )
-def create_anonymous_session(
-    db_session: SessionDep,
+async def create_anonymous_session(
+    db_session: AsyncSessionDep,
 ) -> AnonymousSessionToken:
     """Creates an anonymous patient session and returns a token."""
     session_id = str(uuid4())
@@ -273,7 +319,7 @@ def create_anonymous_session(
 
         logger.info("Creating the anonymous session")
 
-        create_anonymous_patient_session(session_id, db_session)
+        await create_anonymous_patient_session(session_id, db_session)
 
         return AnonymousSessionToken(access_token=access_token, user_id=session_id)
 
@@ -290,17 +336,17 @@ def create_anonymous_session(
     status_code=status.HTTP_200_OK,
     response_model=AnonymousSessionPatientResponse,
 )
-def patch_anonymous_patient(
+async def patch_anonymous_patient(
     data: AnonymousSessionPatientBase,
     anonymous_patient: Annotated[AnonymousPatient, Depends(get_anonymous_patient)],
-    db_session: SessionDep,
+    db_session: AsyncSessionDep,
 ):
     """updates an anonymous patient session via session id from cookie and patch data"""
 
     try:
         logger.info("Creating the anonymous session")
 
-        updated_anonymous_session = patch_anonymous_patient_session(
+        updated_anonymous_session = await patch_anonymous_patient_session(
             anonymous_patient, data, db_session
         )
 
@@ -320,7 +366,7 @@ def patch_anonymous_patient(
 
 
 @router.get("/anonymous-sessions", response_model=AnonymousSessionPatientResponse)
-def get_anonymous_patient_data(
+async def get_anonymous_patient_data(
     anonymous_patient: Annotated[AnonymousPatient, Depends(get_anonymous_patient)]
 ):
     """retrive an anonymous session"""
@@ -332,7 +378,7 @@ def get_anonymous_patient_data(
 
 
 @router.get("/patients/me", response_model=PatientRead)
-def get_patient_profile(
+async def get_patient_profile(
     current_patient: Annotated[Patient, Depends(get_patient_by_user_id)],
 ):
     """get the current user's profile"""
@@ -344,7 +390,7 @@ def get_patient_profile(
     "/therapists/me",
     response_model=TherapistRead,
 )
-def get_therapist_profile(
+async def get_therapist_profile(
     therapist: Annotated[Therapist, Depends(get_therapist_by_user_id)]
 ):
     """get the current therapist's profile"""
@@ -353,17 +399,18 @@ def get_therapist_profile(
 
 
 @router.patch("/therapists/me", response_model=TherapistRead)
-def patch_therapist_profile(
+async def patch_therapist_profile(
     data: TherapistBase,
-    therapist: Annotated[Therapist, Depends(get_therapist_by_user_id)],
-    session: SessionDep,
+    therapist: Annotated[Therapist, Depends(get_therapist_for_update)],
+    session: AsyncSessionDep,
 ):
     """patch the current therapist's profile"""
 
     try:
         logger.info("Updating the therapist model")
 
-        updated_therapist_model = patch_therapist_model(therapist, data, session)
+        updated_therapist_model = await patch_therapist_model(therapist, data, session)
+        identity_cache.invalidate(str(therapist.user_id))
 
     except ValueError as e:
         logger.exception("Issue with data on therapist patch")
@@ -381,8 +428,8 @@ def patch_therapist_profile(
 
 
 @router.get("/therapists/me/dashboard", response_model=TherapistDashboardRead)
-def get_therapist_dashboard(
-    therapist: Annotated[Therapist, Depends(get_therapist_by_user_id)]
+async def get_therapist_dashboard(
+    therapist: Annotated[Therapist, Depends(get_therapist_with_personality_tests)]
 ):
     """Get the data needed for the therapist dashboard"""
     return TherapistDashboardRead(
@@ -1,10 +1,11 @@
 from sqlmodel import SQLModel
-from backend.models.user import TherapistPersonalityTest, PersonalityTestScore
+from backend.models.user import PersonalityTestScore
+from backend.schemas.scores import TherapistPersonalityTestRead
 
 
 class TherapistDashboardRead(SQLModel):
     """Read the therapist dashboard model"""
 
-    personality_test_scores: TherapistPersonalityTest | None
+    personality_test_scores: TherapistPersonalityTestRead | None
     completed_personality_test: PersonalityTestScore | None
     is_profile_complete: bool = False
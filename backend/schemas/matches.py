@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+from uuid import UUID
+import numpy as np
+from sqlmodel import SQLModel
+
+
+@dataclass
+class TherapistMatch:
+    """docstring for a ranked therapist match"""
+
+    therapist_id: UUID
+    score: float
+    rank: int
+
+
+@dataclass
+class MatchCursor:
+    """docstring for the position of the last match of a page"""
+
+    score: float
+    therapist_id: UUID
+    rank: int
+
+
+@dataclass
+class TherapistTraitMatrix:
+    """docstring for the trait scores of a therapist pool as one contiguous matrix"""
+
+    therapist_ids: list[UUID]
+    traits: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.therapist_ids)
+
+
+class TherapistMatchRead(SQLModel):
+    """Read model for a ranked therapist match"""
+
+    therapist_id: UUID
+    score: float
+    rank: int
+
+
+class TherapistMatchPage(SQLModel):
+    """A page of ranked therapist matches"""
+
+    matches: list[TherapistMatchRead]
+    next_cursor: str | None = None
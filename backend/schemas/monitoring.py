@@ -0,0 +1,33 @@
+from sqlmodel import SQLModel
+
+
+class DatabasePoolStats(SQLModel):
+    """Occupancy and counters of a database connection pool"""
+
+    pool_class: str
+    size: int
+    max_overflow: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    checkins: int
+    peak_checked_out: int
+    overflow_checkouts: int
+    waits: int
+    mean_wait_seconds: float
+    max_wait_seconds: float
+    timeouts: int
+    connections_opened: int
+    connections_closed: int
+    invalidations: int
+    open_connections: int
+    mean_connection_age_seconds: float
+    max_connection_age_seconds: float
+
+
+class DatabasePoolsRead(SQLModel):
+    """Stats of the sync and async database pools"""
+
+    sync_pool: DatabasePoolStats
+    async_pool: DatabasePoolStats
@@ -1,6 +1,9 @@
 from dataclasses import dataclass
 from uuid import UUID
+from typing import Annotated
+from pydantic import Field, ValidationInfo, field_validator
 from sqlmodel import SQLModel
+from backend.types.personality_test_codec import decode_category
 from backend.types.scores_types import PersonalityTestCategory
 
 
@@ -12,6 +15,12 @@ class PersonalityTestQuestion(SQLModel):
     score: int
 
 
+# A page of answers submitted at once, at most one full test
+PersonalityTestAnswerBatch = Annotated[
+    list[PersonalityTestQuestion], Field(min_length=1, max_length=50)
+]
+
+
 class PersonalityTestBase(SQLModel):
     """Base model for the anonymous personality test"""
 
@@ -21,6 +30,22 @@ class PersonalityTestBase(SQLModel):
     neuroticism: list[PersonalityTestQuestion]
     agreeableness: list[PersonalityTestQuestion]
 
+    @field_validator(
+        "extroversion",
+        "conscientiousness",
+        "openness",
+        "neuroticism",
+        "agreeableness",
+        mode="before",
+    )
+    @classmethod
+    def decode_question_slots(cls, value, info: ValidationInfo):
+        """Stored categories hold one score per question slot, None if unanswered"""
+        if all(answer is None or isinstance(answer, int) for answer in value):
+            return decode_category(info.field_name, value)
+
+        return [answer for answer in value if answer is not None]
+
 
 class AnonymousPersonalityTestRead(PersonalityTestBase):
     """Docstring for AnonymousPersonalityTestRead"""
@@ -65,3 +90,17 @@ class AggregateScores:
     openness: list[float]
     neuroticism: list[float]
     agreeableness: list[float]
+
+
+@dataclass
+class RescoreSummary:
+    """Outcome of a bulk rescoring run"""
+
+    rescored: int
+    skipped: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput of the run in rescored rows per second"""
+        return self.rescored / self.seconds if self.seconds else 0.0
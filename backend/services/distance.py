@@ -0,0 +1,146 @@
+"""
+Vectorized great-circle distances.
+
+Distances are computed with NumPy broadcasting in float64 and returned as float32
+kilometres. With max_km, points outside a cheap latitude/longitude bounding box
+of the radius are set to inf without any trigonometry.
+"""
+
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _lon_spans(latitudes: np.ndarray, radius_km: float) -> np.ndarray:
+    """Half widths in degrees of the longitude range enclosing a radius"""
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    lat_span = math.degrees(angular_radius)
+
+    with np.errstate(divide="ignore"):
+        ratio = math.sin(angular_radius) / np.cos(np.radians(latitudes))
+
+    reaches_pole = (
+        (np.abs(latitudes) + lat_span >= 90)
+        | (ratio >= 1)
+        | (angular_radius >= math.pi / 2)
+    )
+
+    return np.where(
+        reaches_pole, 180.0, np.degrees(np.arcsin(np.clip(ratio, 0.0, 1.0)))
+    )
+
+
+def bounding_box_spans(latitude: float, radius_km: float) -> tuple[float, float]:
+    """
+    Half widths in degrees of the latitude/longitude box enclosing a radius.
+
+    The longitude span is 180 when the circle reaches a pole.
+    """
+    if radius_km < 0:
+        raise ValueError("Radius must not be negative")
+
+    lat_span = math.degrees(radius_km / EARTH_RADIUS_KM)
+
+    return lat_span, float(_lon_spans(np.float64(latitude), radius_km))
+
+
+def _within_bounding_box(lat1, lon1, lat2, lon2, radius_km: float) -> np.ndarray:
+    """
+    Whether the points 2 are inside the bounding box of a radius around points 1.
+
+    Arguments broadcast against each other.
+    """
+    if radius_km < 0:
+        raise ValueError("Radius must not be negative")
+
+    lat_span = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lon_spans = _lon_spans(lat1, radius_km)
+
+    # wrap the longitude difference into [-180, 180) so boxes crossing the
+    # antimeridian are handled
+    lon_delta = np.abs(np.mod(lon2 - lon1 + 180, 360) - 180)
+
+    return (np.abs(lat2 - lat1) <= lat_span) & (
+        (lon_spans >= 180) | (lon_delta <= lon_spans)
+    )
+
+
+def _haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_km(
+    latitude: float,
+    longitude: float,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    max_km: float | None = None,
+) -> np.ndarray:
+    """
+    Distances in km from one point to arrays of points.
+
+    With max_km, points outside the bounding box of the radius are inf. Points
+    inside the box but beyond max_km keep their exact distance.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+
+    if max_km is None:
+        return _haversine(latitude, longitude, latitudes, longitudes).astype(np.float32)
+
+    distances = np.full(latitudes.shape, np.inf, dtype=np.float32)
+    inside = _within_bounding_box(
+        np.float64(latitude), np.float64(longitude), latitudes, longitudes, max_km
+    )
+    distances[inside] = _haversine(
+        latitude, longitude, latitudes[inside], longitudes[inside]
+    )
+
+    return distances
+
+
+def pairwise_haversine_km(
+    latitudes_a: np.ndarray,
+    longitudes_a: np.ndarray,
+    latitudes_b: np.ndarray,
+    longitudes_b: np.ndarray,
+    max_km: float | None = None,
+) -> np.ndarray:
+    """
+    (M x N) distances in km between M points and N points.
+
+    With max_km, pairs outside each other's bounding box are inf without
+    computing their distance.
+    """
+    latitudes_a = np.asarray(latitudes_a, dtype=np.float64)[:, np.newaxis]
+    longitudes_a = np.asarray(longitudes_a, dtype=np.float64)[:, np.newaxis]
+    latitudes_b = np.asarray(latitudes_b, dtype=np.float64)[np.newaxis, :]
+    longitudes_b = np.asarray(longitudes_b, dtype=np.float64)[np.newaxis, :]
+
+    if max_km is None:
+        return _haversine(latitudes_a, longitudes_a, latitudes_b, longitudes_b).astype(
+            np.float32
+        )
+
+    inside = _within_bounding_box(
+        latitudes_a, longitudes_a, latitudes_b, longitudes_b, max_km
+    )
+    rows, columns = np.nonzero(inside)
+
+    distances = np.full(inside.shape, np.inf, dtype=np.float32)
+    distances[rows, columns] = _haversine(
+        latitudes_a[rows, 0],
+        longitudes_a[rows, 0],
+        latitudes_b[0, columns],
+        longitudes_b[0, columns],
+    )
+
+    return distances
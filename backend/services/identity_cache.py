@@ -0,0 +1,101 @@
+"""
+Short lived cache of the profiles resolved from access tokens.
+
+Dashboard and personality test endpoints are polled constantly, and every
+request resolves the same token to the same therapist. Entries are detached
+copies of the loaded profile, keyed by the token subject and the loader
+variant, and are merged into each request's session without a query. Every
+write to a profile invalidates the subject, and the TTL bounds how stale a
+profile can be when it is changed by another process.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Hashable
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import SQLModel
+from backend.core.config import settings
+
+
+def detached_copy(instance: SQLModel, relationships: tuple[str, ...] = ()) -> SQLModel:
+    """
+    Copy a loaded instance and the given relationships into detached instances
+    that can be merged into any session with load=False.
+    """
+    copy = type(instance)(**instance.model_dump())
+
+    for relationship in relationships:
+        related = getattr(instance, relationship)
+        setattr(copy, relationship, detached_copy(related) if related else None)
+
+    make_transient_to_detached(copy)
+
+    return copy
+
+
+class IdentityCache:
+    """LRU cache whose entries expire after a fixed time to live"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, SQLModel]] = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def is_enabled(self) -> bool:
+        """A time to live of zero turns the cache off"""
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, subject: str, variant: Hashable) -> SQLModel | None:
+        """The cached profile of a token subject, None when missing or expired"""
+        key = (subject, variant)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            expires_at, profile = entry
+
+            if expires_at <= monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return profile
+
+    def set(self, subject: str, variant: Hashable, profile: SQLModel):
+        """Cache a detached profile, evicting the least recently used entry"""
+        if not self.is_enabled:
+            return
+
+        with self._lock:
+            self._entries[(subject, variant)] = (
+                monotonic() + self.ttl_seconds,
+                profile,
+            )
+            self._entries.move_to_end((subject, variant))
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str):
+        """Drop every cached profile of a token subject"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == subject]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache(
+    max_size=settings.identity_cache_size,
+    ttl_seconds=settings.identity_cache_ttl_seconds,
+)
@@ -0,0 +1,246 @@
+"""
+Binary snapshot of the therapist index for warm starts.
+
+Loading the index reads every therapist from Postgres, which every worker
+would otherwise do at the same time on boot. The exporter writes the index
+to a single file instead: a JSON header followed by one 64 byte aligned
+section per array. Workers memory-map the file as the read-only base of their
+index, so the trait and coordinate arrays are shared through the page cache,
+and then refresh the index from the database: therapists whose match vector
+changed since the export go to the small overlay and deleted ones are hidden,
+without copying the mapped arrays.
+
+Layout:
+    MAGIC, header length (uint32 LE), JSON header, padding, sections
+
+The header holds the format version, the export time, the row count, the
+specialization and therapist type vocabularies and the dtype, shape and
+offset of every section. Flags and specializations are stored as bitsets,
+therapist types as indexes into their vocabulary and ids as raw UUID bytes.
+"""
+
+import json
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+from backend.routers.matches.exceptions import IndexSnapshotFormatError
+from backend.services.therapist_index import (
+    TherapistFeatureIndex,
+    TherapistIndexSegment,
+    TherapistIndexSnapshot,
+    build_segment,
+    load_therapist_features,
+    therapist_index,
+)
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b"TMINDEX\x00"
+FORMAT_VERSION = 1
+SECTION_ALIGNMENT = 64
+
+IS_LGBTQ_SPECIALIZATION = 1
+IS_RELIGIOUS_SPECIALIZATION = 2
+IS_PROFILE_COMPLETE = 4
+
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+@dataclass(frozen=True)
+class StoredIndexSnapshot:
+    """A therapist index snapshot read back from a file"""
+
+    exported_at: datetime
+    segment: TherapistIndexSegment
+
+
+def _align(offset: int) -> int:
+    return -(-offset // SECTION_ALIGNMENT) * SECTION_ALIGNMENT
+
+
+def _encode_sections(segment: TherapistIndexSegment) -> tuple[dict, list, list]:
+    """Vocabularies and arrays of the sections of a segment"""
+    specializations = sorted(set().union(*segment.specializations))
+    therapist_types = sorted({value for value in segment.therapist_types if value})
+
+    columns = {
+        specialization: column for column, specialization in enumerate(specializations)
+    }
+
+    specialization_bits = np.zeros((len(segment), len(specializations)), dtype=np.uint8)
+    for row, row_specializations in enumerate(segment.specializations):
+        for specialization in row_specializations:
+            specialization_bits[row, columns[specialization]] = 1
+
+    flags = (
+        segment.is_lgbtq_specialization * IS_LGBTQ_SPECIALIZATION
+        | segment.is_religious_specialization * IS_RELIGIOUS_SPECIALIZATION
+        | segment.is_profile_complete * IS_PROFILE_COMPLETE
+    ).astype(np.uint8)
+
+    arrays = {
+        "therapist_ids": np.frombuffer(
+            b"".join(therapist_id.bytes for therapist_id in segment.therapist_ids),
+            dtype=np.uint8,
+        ).reshape(-1, 16),
+        "traits": np.asarray(segment.traits, dtype=np.float32),
+        "coordinates": np.asarray(segment.coordinates, dtype=np.float32),
+        "flags": flags,
+        "specializations": np.packbits(specialization_bits, axis=1),
+        "therapist_types": np.array(
+            [
+                therapist_types.index(value) if value else -1
+                for value in segment.therapist_types
+            ],
+            dtype=np.int8,
+        ),
+    }
+
+    return (
+        {"specializations": specializations, "therapist_types": therapist_types},
+        list(arrays),
+        list(arrays.values()),
+    )
+
+
+def write_index_snapshot(
+    segment: TherapistIndexSegment, path: str, exported_at: datetime
+):
+    """
+    Write a segment to path. The file is written next to it and moved into
+    place, so workers never map a partially written snapshot.
+    """
+    vocabularies, names, arrays = _encode_sections(segment)
+
+    def _header(data_offset: int) -> bytes:
+        offset = data_offset
+        sections = {}
+
+        for name, array in zip(names, arrays):
+            sections[name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": offset,
+            }
+            offset = _align(offset + array.nbytes)
+
+        return json.dumps(
+            {
+                "format_version": FORMAT_VERSION,
+                "exported_at": exported_at.isoformat(),
+                "count": len(segment),
+                **vocabularies,
+                "sections": sections,
+            }
+        ).encode()
+
+    # The header length depends on the offsets it records, which only grow
+    # with it, so recompute until it fits in front of the first section
+    data_offset = 0
+    header = _header(data_offset)
+    while len(MAGIC) + _HEADER_LENGTH.size + len(header) > data_offset:
+        data_offset = _align(len(MAGIC) + _HEADER_LENGTH.size + len(header))
+        header = _header(data_offset)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".idx", delete=False) as fh:
+        fh.write(MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+
+        for array in arrays:
+            fh.write(b"\x00" * (_align(fh.tell()) - fh.tell()))
+            fh.write(np.ascontiguousarray(array).tobytes())
+
+    os.replace(fh.name, path)
+    logger.info("Exported %s therapists to %s", len(segment), path)
+
+
+def read_index_snapshot(path: str) -> StoredIndexSnapshot:
+    """Memory-map a snapshot file, the trait and coordinate arrays stay mapped"""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    prefix = len(MAGIC) + _HEADER_LENGTH.size
+
+    if data.size < prefix or bytes(data[: len(MAGIC)]) != MAGIC:
+        raise IndexSnapshotFormatError(f"{path} is not a therapist index snapshot")
+
+    (header_length,) = _HEADER_LENGTH.unpack(bytes(data[len(MAGIC) : prefix]))
+    header = json.loads(bytes(data[prefix : prefix + header_length]))
+
+    if header.get("format_version") != FORMAT_VERSION:
+        raise IndexSnapshotFormatError(
+            f"Unsupported snapshot format version {header.get('format_version')}"
+        )
+
+    def _section(name: str) -> np.ndarray:
+        section = header["sections"][name]
+        dtype = np.dtype(section["dtype"])
+        nbytes = int(np.prod(section["shape"])) * dtype.itemsize
+        start = section["offset"]
+
+        return data[start : start + nbytes].view(dtype).reshape(section["shape"])
+
+    specializations = header["specializations"]
+    therapist_types = header["therapist_types"]
+    flags = _section("flags")
+    specialization_bits = np.unpackbits(
+        _section("specializations"), axis=1, count=len(specializations)
+    ).astype(bool)
+    therapist_ids = tuple(
+        UUID(bytes=row.tobytes()) for row in _section("therapist_ids")
+    )
+
+    segment = TherapistIndexSegment(
+        therapist_ids=therapist_ids,
+        traits=_section("traits"),
+        coordinates=_section("coordinates"),
+        specializations=tuple(
+            frozenset(specializations[column] for column in np.flatnonzero(row_bits))
+            for row_bits in specialization_bits
+        ),
+        is_lgbtq_specialization=(flags & IS_LGBTQ_SPECIALIZATION).astype(bool),
+        is_religious_specialization=(flags & IS_RELIGIOUS_SPECIALIZATION).astype(bool),
+        therapist_types=tuple(
+            therapist_types[index] if index >= 0 else None
+            for index in _section("therapist_types").tolist()
+        ),
+        is_profile_complete=(flags & IS_PROFILE_COMPLETE).astype(bool),
+        positions={therapist_id: row for row, therapist_id in enumerate(therapist_ids)},
+    )
+
+    return StoredIndexSnapshot(
+        exported_at=datetime.fromisoformat(header["exported_at"]), segment=segment
+    )
+
+
+def export_index_snapshot(session: Session, path: str) -> StoredIndexSnapshot:
+    """
+    Export every therapist to a snapshot file. The export time is read from
+    the database clock in the same transaction as the therapists.
+    """
+    exported_at = session.exec(select(func.now())).one()
+    segment = build_segment(load_therapist_features(session))
+
+    write_index_snapshot(segment, path, exported_at)
+
+    return StoredIndexSnapshot(exported_at=exported_at, segment=segment)
+
+
+def warm_start_therapist_index(
+    session: Session, path: str, index: TherapistFeatureIndex = therapist_index
+) -> TherapistIndexSnapshot:
+    """
+    Load the index from a snapshot file, then refresh it with the therapists
+    whose match vector changed or was deleted since the export
+    """
+    stored = read_index_snapshot(path)
+    index.load_snapshot(stored.segment, synced_at=stored.exported_at)
+
+    return index.refresh(session)
@@ -1,16 +1,189 @@
 """ location service """
-import ssl
+import os
+import string
+import tempfile
+from threading import Lock
 import numpy as np
-import pgeocode
-import certifi
+from backend.core.config import settings
 from backend.core.logging import get_logger
+from backend.routers.users.exceptions import GeocodingServiceError
 
 logger = get_logger(__name__)
 
-ssl._create_default_https_context = lambda: ssl.create_default_context(
-    cafile=certifi.where()
+# Canadian forward sortation areas (FSA) are a letter, a digit and a letter, so
+# every FSA maps to one slot of a dense 26 x 10 x 26 table.
+FSA_LENGTH = 3
+FSA_SLOTS = (
+    len(string.ascii_uppercase) * len(string.digits) * len(string.ascii_uppercase)
 )
 
+DEFAULT_POSTAL_CODE_TABLE_PATH = os.path.join(
+    os.environ.get(
+        "PGEOCODE_DATA_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pgeocode")
+    ),
+    "CA-fsa-coordinates.npy",
+)
+
+
+def normalize_postal_code(postal_code: str) -> str:
+    """Upper case a postal code and strip the separator, e.g. 'm5a 4l1' -> 'M5A4L1'"""
+    return "".join(postal_code.split()).replace("-", "").upper()
+
+
+def get_fsa_slot(postal_code: str) -> int | None:
+    """Slot of the forward sortation area of a postal code in the lookup table"""
+    fsa = normalize_postal_code(postal_code)[:FSA_LENGTH]
+
+    if len(fsa) != FSA_LENGTH:
+        return None
+
+    first, digit, third = fsa
+
+    if (
+        first not in string.ascii_uppercase
+        or digit not in string.digits
+        or third not in string.ascii_uppercase
+    ):
+        return None
+
+    return (
+        string.ascii_uppercase.index(first) * len(string.digits)
+        + string.digits.index(digit)
+    ) * len(string.ascii_uppercase) + string.ascii_uppercase.index(third)
+
+
+def build_postal_code_table(coordinates: dict[str, tuple[float, float]]) -> np.ndarray:
+    """Build a lookup table from postal code -> (latitude, longitude) pairs"""
+    table = np.full((FSA_SLOTS, 2), np.nan, dtype=np.float64)
+
+    for postal_code, location in coordinates.items():
+        slot = get_fsa_slot(postal_code)
+
+        if slot is not None:
+            table[slot] = location
+
+    return table
+
+
+def compile_postal_code_table(output_path: str) -> np.ndarray:
+    """
+    Compile the pgeocode Canadian dataset into a lookup table saved at output_path.
+
+    pgeocode downloads the dataset on first use and caches it on disk, so this
+    only needs network access when that cache is empty.
+    """
+    # pandas and pgeocode are only needed here, not by the API workers
+    # pylint: disable=import-outside-toplevel
+    import ssl
+    import certifi
+    import pgeocode
+
+    ssl._create_default_https_context = lambda: ssl.create_default_context(
+        cafile=certifi.where()
+    )
+
+    data = pgeocode.Nominatim("ca")._data_frame  # pylint: disable=protected-access
+    data = data.dropna(subset=["postal_code", "latitude", "longitude"])
+
+    table = build_postal_code_table(
+        {
+            postal_code: (latitude, longitude)
+            for postal_code, latitude, longitude in zip(
+                data["postal_code"], data["latitude"], data["longitude"]
+            )
+        }
+    )
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+
+    # write to a temporary file first so concurrent workers never mmap a
+    # partially written table
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".npy", delete=False) as fh:
+        np.save(fh, table)
+
+    os.replace(fh.name, output_path)
+    logger.info("Compiled %s postal code areas to %s", len(data), output_path)
+
+    return table
+
+
+class PostalCodeGeocoder:
+    """Process-wide geocoder backed by a memory-mapped postal code table"""
+
+    def __init__(self, table_path: str | None = None) -> None:
+        self._lock = Lock()
+        self._table_path = table_path
+        self._table: np.ndarray | None = None
+
+    @property
+    def table_path(self) -> str:
+        """Location of the compiled postal code table"""
+        return (
+            self._table_path
+            or settings.postal_code_table_path
+            or DEFAULT_POSTAL_CODE_TABLE_PATH
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the postal code table is loaded"""
+        return self._table is not None
+
+    def load(self) -> np.ndarray:
+        """
+        Memory-map the postal code table compiled by
+        `python -m backend.cli build-postal-code-table`. The table is never
+        compiled here, so a missing table fails without blocking the request.
+        """
+        with self._lock:
+            if self._table is not None:
+                return self._table
+
+            table_path = self.table_path
+
+            if not os.path.exists(table_path):
+                raise GeocodingServiceError(
+                    f"Postal code table {table_path} is missing, run "
+                    "`python -m backend.cli build-postal-code-table`"
+                )
+
+            self._table = np.load(table_path, mmap_mode="r")
+            logger.info("Loaded the postal code table from %s", table_path)
+
+            return self._table
+
+    def load_table(self, table: np.ndarray) -> None:
+        """Use an already built lookup table"""
+        if table.shape != (FSA_SLOTS, 2):
+            raise ValueError("Invalid postal code table shape")
+
+        with self._lock:
+            self._table = table
+
+    def clear(self) -> None:
+        """Unload the postal code table"""
+        with self._lock:
+            self._table = None
+
+    def lookup(self, postal_code: str) -> tuple[float, float] | None:
+        """Coordinates of a postal code, or None if the postal code is unknown"""
+        table = self._table if self._table is not None else self.load()
+        slot = get_fsa_slot(postal_code)
+
+        if slot is None:
+            return None
+
+        latitude, longitude = table[slot]
+
+        if np.isnan(latitude) or np.isnan(longitude):
+            return None
+
+        return float(latitude), float(longitude)
+
+
+geocoder = PostalCodeGeocoder()
+
 
 def get_coordinates_from_postal_code(
     postal_code: str | None,
@@ -32,15 +205,14 @@ def get_coordinates_from_postal_code(
         return None
 
     try:
-        nomi = pgeocode.Nominatim("ca")
-        location = nomi.query_postal_code(postal_code)
+        location = geocoder.lookup(postal_code)
 
-        if np.isnan(location["longitude"]) or np.isnan(location["latitude"]):
+        if location is None:
             return None
 
         return {
-            "latitude": float(location["latitude"]),
-            "longitude": float(location["longitude"]),
+            "latitude": location[0],
+            "longitude": location[1],
         }
     except Exception as e:
         logger.exception("Unable to find location: %s", e)
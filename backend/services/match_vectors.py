@@ -0,0 +1,57 @@
+"""
+Maintenance of the therapist_match_vectors table.
+
+The statements are built here and executed by the caller inside the same
+transaction as the write they mirror, so the table never disagrees with the
+committed scores and profiles. They run unchanged on sync and async sessions.
+"""
+
+from sqlalchemy import Insert, Update, func, update
+from sqlalchemy.dialects.postgresql import insert
+from backend.models.match import TherapistMatchVector
+from backend.models.user import Therapist
+from backend.schemas.scores import Scores
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER as TRAIT_ORDER
+
+
+def scores_to_traits(scores: Scores) -> list[float]:
+    """Calculated scores as a trait vector in PERSONALITY_TRAIT_ORDER"""
+    return [float(getattr(scores, trait)) for trait in TRAIT_ORDER]
+
+
+def _therapist_filters(therapist: Therapist) -> dict:
+    return {
+        "latitude": therapist.latitude,
+        "longitude": therapist.longitude,
+        "specializations": therapist.specializations or [],
+        "is_lgbtq_specialization": bool(therapist.is_lgbtq_specialization),
+        "is_religious_specialization": bool(therapist.is_religious_specialization),
+        "therapist_type": therapist.therapist_type,
+        "is_profile_complete": bool(therapist.is_profile_complete),
+    }
+
+
+def upsert_match_vector(therapist: Therapist, scores: Scores) -> Insert:
+    """Insert or replace the match vector of a therapist that was just scored"""
+    if not therapist.id:
+        raise ValueError("Therapist id not provided")
+
+    values = {"traits": scores_to_traits(scores), **_therapist_filters(therapist)}
+    statement = insert(TherapistMatchVector).values(therapist_id=therapist.id, **values)
+
+    return statement.on_conflict_do_update(
+        index_elements=[TherapistMatchVector.therapist_id],
+        set_={**values, "updated_at": func.now()},
+    )
+
+
+def update_match_vector_filters(therapist: Therapist) -> Update:
+    """
+    Copy the filter columns of a therapist profile into its match vector, a
+    therapist without a score has no vector and nothing is updated
+    """
+    return (
+        update(TherapistMatchVector)
+        .where(TherapistMatchVector.therapist_id == therapist.id)
+        .values(**_therapist_filters(therapist))
+    )
@@ -0,0 +1,341 @@
+"""Vectorized matching of patients against the therapist pool."""
+
+import asyncio
+import base64
+import json
+from dataclasses import asdict
+from uuid import UUID
+import numpy as np
+from sqlalchemy import Select, String, cast, delete, insert
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.core.database import engine
+from backend.models.match import Match
+from backend.models.user import Patient, Therapist
+from backend.routers.users.user_types import TherapistTypeOption
+from backend.schemas.matches import (
+    MatchCursor,
+    TherapistMatch,
+    TherapistMatchPage,
+    TherapistMatchRead,
+    TherapistTraitMatrix,
+)
+from backend.routers.matches.exceptions import (
+    InvalidMatchCursorError,
+    MatchCreationError,
+)
+from backend.schemas.scores import Scores
+from backend.services.therapist_index import (
+    TherapistIndexSnapshot,
+    therapist_index,
+)
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER as TRAIT_ORDER
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MATCH_LIMIT = 10
+# Matches stored for a patient at registration
+PATIENT_MATCH_LIMIT = 20
+
+
+def scores_to_vector(scores: Scores) -> np.ndarray:
+    """Convert calculated personality scores into a trait vector"""
+    if not scores:
+        raise ValueError("Scores not provided")
+
+    return np.array([getattr(scores, trait) for trait in TRAIT_ORDER], dtype=np.float32)
+
+
+def select_candidate_therapists(
+    therapy_needs: list[str] | None = None,
+    is_lgbtq_specialization: bool | None = None,
+    is_religious_specialization: bool | None = None,
+    therapist_type: TherapistTypeOption | None = None,
+) -> Select:
+    """
+    Ids of the therapists with a completed profile that pass a patient's
+    filters. Therapy needs are served by the GIN index on specializations and
+    the LGBTQ, religious and type filters by the partial filter index. Most
+    profiles are complete, so the unfiltered query reads the whole table.
+    """
+    statement = select(Therapist.id).where(col(Therapist.is_profile_complete))
+
+    if therapy_needs:
+        statement = statement.where(
+            col(Therapist.specializations).overlap(cast(therapy_needs, ARRAY(String)))
+        )
+
+    if is_lgbtq_specialization:
+        statement = statement.where(col(Therapist.is_lgbtq_specialization))
+
+    if is_religious_specialization:
+        statement = statement.where(col(Therapist.is_religious_specialization))
+
+    if therapist_type:
+        statement = statement.where(Therapist.therapist_type == therapist_type)
+
+    return statement
+
+
+def score_trait_matrix(patient_traits: np.ndarray, traits: np.ndarray) -> np.ndarray:
+    """
+    Score a patient trait vector against every row of a trait matrix in one pass.
+
+    The score is a similarity in (0, 1] derived from the euclidean distance
+    between the trait vectors; 1 is an exact match. Traits the patient has no
+    score for (NaN) are left out of the distance.
+    """
+    answered = ~np.isnan(patient_traits)
+
+    if not answered.all():
+        patient_traits = patient_traits[answered]
+        traits = traits[:, answered]
+
+    differences = traits - patient_traits
+    distances = np.sqrt(np.einsum("ij,ij->i", differences, differences))
+
+    return 1.0 / (1.0 + distances)
+
+
+def top_k_indices(scores: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Indices of the highest scores in descending order without a full sort.
+
+    Ties are broken by index so that consecutive pages never overlap.
+    """
+    if limit <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if limit >= scores.size:
+        return np.argsort(-scores, kind="stable")
+
+    negated = -scores
+    boundary = np.partition(negated, limit - 1)[limit - 1]
+    above = np.flatnonzero(negated < boundary)
+    ties = np.flatnonzero(negated == boundary)[: limit - above.size]
+    candidates = np.concatenate([above, ties])
+
+    return candidates[np.lexsort((candidates, negated[candidates]))]
+
+
+def rank_trait_vector(
+    patient_traits: np.ndarray,
+    trait_matrix: TherapistTraitMatrix,
+    limit: int = DEFAULT_MATCH_LIMIT,
+    after: MatchCursor | None = None,
+) -> list[TherapistMatch]:
+    """
+    Rank the therapists of a trait matrix against a patient trait vector.
+
+    Therapists are ordered by descending score and then by id. With after only
+    the therapists ranked strictly below that position are returned, so a page
+    resumes where the previous one ended even if the pool changed in between.
+    """
+    if len(trait_matrix) == 0 or np.isnan(patient_traits).all():
+        return []
+
+    scores = score_trait_matrix(patient_traits, trait_matrix.traits)
+    therapist_ids = trait_matrix.therapist_ids
+    rows = np.arange(scores.size)
+
+    if after is not None:
+        remaining = scores < after.score
+        for row in np.flatnonzero(scores == after.score):
+            remaining[row] = therapist_ids[row] > after.therapist_id
+        rows = rows[remaining]
+
+    ranked = rows[top_k_indices(scores[rows], limit)]
+
+    if ranked.size:
+        # top_k_indices breaks ties by row, pull in every row tied with the
+        # last one so the page can break them by id instead
+        boundary = scores[ranked[-1]]
+        tied = rows[scores[rows] == boundary]
+        ranked = np.concatenate([ranked[scores[ranked] > boundary], tied])
+
+    ranked = sorted(ranked, key=lambda row: (-scores[row], therapist_ids[row]))
+    first_rank = after.rank + 1 if after is not None else 1
+
+    return [
+        TherapistMatch(
+            therapist_id=therapist_ids[index],
+            score=float(scores[index]),
+            rank=rank,
+        )
+        for rank, index in enumerate(ranked[:limit], start=first_rank)
+    ]
+
+
+def rank_therapists(
+    patient_scores: Scores,
+    trait_matrix: TherapistTraitMatrix,
+    limit: int = DEFAULT_MATCH_LIMIT,
+) -> list[TherapistMatch]:
+    """Rank the therapists of a trait matrix against a patient's scores"""
+    return rank_trait_vector(scores_to_vector(patient_scores), trait_matrix, limit)
+
+
+def get_top_therapist_matches(
+    patient_scores: Scores, session: Session, limit: int = DEFAULT_MATCH_LIMIT
+) -> list[TherapistMatch]:
+    """Rank the indexed therapist pool against a patient's scores"""
+    snapshot = therapist_index.ensure_loaded(session)
+
+    return rank_therapists(patient_scores, snapshot.trait_matrix(), limit)
+
+
+def _refresh_therapist_index() -> TherapistIndexSnapshot:
+    """Refresh the therapist index on a session of its own"""
+    with Session(engine) as session:
+        return therapist_index.refresh(session)
+
+
+async def create_patient_matches(
+    patient: Patient,
+    patient_scores: Scores,
+    session: AsyncSession,
+    limit: int = PATIENT_MATCH_LIMIT,
+) -> list[TherapistMatch]:
+    """
+    Rank the indexed therapists that pass the patient's filters against a new
+    patient and store the top matches with a single multi-row INSERT,
+    replacing any earlier ones.
+
+    The index is refreshed first in a worker thread, so therapists scored
+    through another worker are ranked too without blocking the event loop.
+    """
+    if not patient or not patient.id:
+        raise ValueError("Patient not provided")
+
+    try:
+        snapshot = await asyncio.to_thread(_refresh_therapist_index)
+        matches = rank_therapists(
+            patient_scores,
+            snapshot.trait_matrix_matching(
+                therapy_needs=patient.therapy_needs,
+                is_lgbtq_specialization=patient.is_lgbtq_therapist_preference,
+                is_religious_specialization=patient.is_religious_therapist_preference,
+            ),
+            limit,
+        )
+
+        await session.exec(delete(Match).where(col(Match.patient_id) == patient.id))
+
+        if matches:
+            await session.exec(
+                insert(Match).values(
+                    [
+                        {
+                            "patient_id": patient.id,
+                            "therapist_id": match.therapist_id,
+                            "score": match.score,
+                            "rank": match.rank,
+                        }
+                        for match in matches
+                    ]
+                )
+            )
+
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.exception("Unable to store the matches of a patient")
+        raise MatchCreationError("Unable to store the patient matches") from e
+
+    return matches
+
+
+async def get_patient_matches(
+    patient: Patient, session: AsyncSession
+) -> list[TherapistMatchRead]:
+    """The matches stored for a patient in rank order"""
+    rows = await session.exec(
+        select(Match.therapist_id, Match.score, Match.rank)
+        .where(Match.patient_id == patient.id)
+        .order_by(col(Match.rank))
+    )
+
+    return [
+        TherapistMatchRead(therapist_id=therapist_id, score=score, rank=rank)
+        for therapist_id, score, rank in rows.all()
+    ]
+
+
+def encode_match_cursor(match: TherapistMatch) -> str:
+    """Encode the last match of a page into an opaque cursor for the next page"""
+    payload = json.dumps(
+        {
+            "score": match.score,
+            "therapist_id": str(match.therapist_id),
+            "rank": match.rank,
+        }
+    ).encode()
+
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_match_cursor(cursor: str | None) -> MatchCursor | None:
+    """
+    Decode a match page cursor into the position the next page resumes after.
+    The position is a score and therapist id rather than an offset, so the
+    cursor stays valid on every worker and across changes to the pool.
+    """
+    if not cursor:
+        return None
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after = MatchCursor(
+            score=float(payload["score"]),
+            therapist_id=UUID(payload["therapist_id"]),
+            rank=int(payload["rank"]),
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise InvalidMatchCursorError("Invalid match cursor") from e
+
+    if after.rank < 1 or not np.isfinite(after.score):
+        raise InvalidMatchCursorError("Invalid match cursor")
+
+    return after
+
+
+def get_therapist_match_page(
+    trait_scores: dict[str, float],
+    session: Session,
+    cursor: str | None = None,
+    limit: int = DEFAULT_MATCH_LIMIT,
+    location: tuple[float, float] | None = None,
+    radius_km: float | None = None,
+) -> TherapistMatchPage:
+    """
+    Return one page of the indexed therapist pool ranked against trait scores.
+
+    Traits missing from trait_scores are ignored, so a partially answered test
+    can already be matched on the categories that were completed. With a
+    location and radius_km only the therapists within the radius are scored.
+    """
+    after = decode_match_cursor(cursor)
+    snapshot = therapist_index.ensure_loaded(session)
+
+    if radius_km is None:
+        trait_matrix = snapshot.trait_matrix()
+    elif location is None:
+        raise ValueError("A location is required to filter matches by distance")
+    else:
+        trait_matrix = snapshot.trait_matrix_within_radius(
+            location[0], location[1], radius_km
+        )
+
+    patient_traits = np.array(
+        [trait_scores.get(trait, np.nan) for trait in TRAIT_ORDER], dtype=np.float32
+    )
+    matches = rank_trait_vector(patient_traits, trait_matrix, limit + 1, after)
+    has_next_page = len(matches) > limit
+    matches = matches[:limit]
+
+    return TherapistMatchPage(
+        matches=[TherapistMatchRead(**asdict(match)) for match in matches],
+        next_cursor=encode_match_cursor(matches[-1]) if has_next_page else None,
+    )
@@ -0,0 +1,110 @@
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow, a hash or a verification holds a CPU for a few
+hundred milliseconds. The async routes hand them to a bounded process pool
+so a burst of logins cannot stall every other request served by the worker,
+and requests beyond the queue limit are turned away instead of piling up.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cache
+from threading import Lock
+from backend.core.config import settings
+from backend.routers.users.exceptions import PasswordHashingBusyError
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@cache
+def get_password_context():
+    """
+    The bcrypt context, created on first use since hashing normally happens in
+    the worker processes and the API process never needs passlib.
+    """
+    from passlib.context import CryptContext  # pylint: disable=import-outside-toplevel
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def verify_password(plain_password, hashed_password):
+    """verify inputted user password to hashed password"""
+    return get_password_context().verify(plain_password, hashed_password)
+
+
+def get_password_hash(password):
+    """hash user password"""
+    return get_password_context().hash(password)
+
+
+class PasswordHasher:
+    """Awaitable bcrypt hashing on a bounded pool of worker processes"""
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of hashes and verifications submitted but not finished"""
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Workers are spawned rather than forked from the threaded server
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+            return self._executor
+
+    async def _run(self, function, *args):
+        if self._pending >= self.max_pending:
+            logger.warning("Password hashing queue is full (%d)", self._pending)
+            raise PasswordHashingBusyError("Too many password requests in progress")
+
+        self._pending += 1
+
+        try:
+            executor = self._get_executor()
+
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, function, *args
+            )
+        except BrokenProcessPool:
+            logger.exception("A password hashing worker died, restarting the pool")
+            self.shutdown(wait=False)
+            raise
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in a worker process"""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash in a worker process"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes, they are started again on the next use"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
@@ -0,0 +1,139 @@
+"""
+Bulk rescoring of stored personality test scores.
+
+When the scoring key changes every PersonalityTestScore has to be recomputed
+from the raw answers. The raw tests are streamed through a server-side cursor
+in fixed size chunks, each chunk is scored with one call to the scoring
+kernel and written back with a single executemany UPDATE keyed by primary
+key, so memory stays bounded by the chunk size however large the table is.
+The therapist match vectors are updated in the same transaction, which stamps
+their updated_at, so every worker applies the new traits to its in-memory
+therapist index on its next refresh.
+
+Only therapist scores can be rescored: a patient's PersonalityTestScore is
+calculated from the anonymous session's answers at registration and is not
+linked back to them, and anonymous sessions are scored on request.
+"""
+
+from time import perf_counter
+from typing import Iterator, Sequence
+import numpy as np
+from sqlalchemy import Row, update
+from sqlmodel import Session, select
+from backend.models.match import TherapistMatchVector
+from backend.models.user import PersonalityTestScore, TherapistPersonalityTest
+from backend.schemas.scores import RescoreSummary
+from backend.services.scores import (
+    personality_test_answer_matrix,
+    score_answer_matrix,
+)
+from backend.services.therapist_index import therapist_index
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER as TRAIT_ORDER
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_RESCORE_CHUNK_SIZE = 1000
+
+
+def stream_therapist_personality_tests(
+    session: Session, chunk_size: int = DEFAULT_RESCORE_CHUNK_SIZE
+) -> Iterator[Sequence[Row]]:
+    """
+    Yield chunks of (score id, therapist id, raw answers) rows for every scored
+    therapist.
+
+    yield_per makes the driver use a server-side cursor, so only one chunk is
+    held in memory at a time.
+    """
+    statement = (
+        select(
+            PersonalityTestScore.id,
+            PersonalityTestScore.therapist_id,
+            *(getattr(TherapistPersonalityTest, trait) for trait in TRAIT_ORDER),
+        )
+        .join(
+            PersonalityTestScore,
+            PersonalityTestScore.therapist_id == TherapistPersonalityTest.therapist_id,
+        )
+        .order_by(PersonalityTestScore.id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    yield from session.execute(statement).partitions()
+
+
+def score_personality_test_chunk(rows: Sequence[Row]) -> tuple[list[dict], int]:
+    """
+    Score a chunk of raw tests, returning the update parameters and the number
+    of tests skipped because a category is incomplete
+    """
+    trait_scores = score_answer_matrix(personality_test_answer_matrix(rows))
+    is_complete = ~np.isnan(trait_scores).any(axis=1)
+
+    updates = [
+        {
+            "id": row.id,
+            **{
+                trait: round(float(score), 3)
+                for trait, score in zip(TRAIT_ORDER, scores)
+            },
+        }
+        for row, scores, complete in zip(rows, trait_scores, is_complete)
+        if complete
+    ]
+
+    return updates, len(rows) - len(updates)
+
+
+def rescore_personality_tests(
+    session: Session, chunk_size: int = DEFAULT_RESCORE_CHUNK_SIZE
+) -> RescoreSummary:
+    """
+    Recompute every therapist PersonalityTestScore from its raw answers.
+
+    The raw tests are read on a separate connection so that the session can
+    commit after each chunk without closing the server-side cursor. An index
+    loaded in this process is refreshed once every chunk is written.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer")
+
+    rescored = skipped = 0
+    started = perf_counter()
+
+    with Session(session.get_bind()) as reader:
+        for rows in stream_therapist_personality_tests(reader, chunk_size):
+            updates, chunk_skipped = score_personality_test_chunk(rows)
+
+            if updates:
+                therapist_ids = {row.id: row.therapist_id for row in rows}
+                session.execute(update(PersonalityTestScore), updates)
+                session.execute(
+                    update(TherapistMatchVector),
+                    [
+                        {
+                            "therapist_id": therapist_ids[values["id"]],
+                            "traits": [values[trait] for trait in TRAIT_ORDER],
+                        }
+                        for values in updates
+                    ],
+                )
+                session.commit()
+
+            rescored += len(updates)
+            skipped += chunk_skipped
+            elapsed = perf_counter() - started
+            logger.info(
+                "Rescored %d personality tests (%d skipped), %.0f rows/s",
+                rescored,
+                skipped,
+                rescored / elapsed if elapsed else 0.0,
+            )
+
+    if therapist_index.is_loaded:
+        therapist_index.refresh(session)
+
+    return RescoreSummary(
+        rescored=rescored, skipped=skipped, seconds=perf_counter() - started
+    )
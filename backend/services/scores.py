@@ -1,7 +1,11 @@
 from decimal import Decimal
+import numpy as np
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.attributes import set_committed_value
 from backend.models.user import (
     AnonymousPersonalityTestScore,
     AnonymousPatient,
@@ -16,165 +20,128 @@ from backend.routers.scores.exceptions import (
     TestScoreUpdateError,
     PersonalityTestScoreCreationError,
 )
+from backend.services.match_vectors import upsert_match_vector
+from backend.services.therapist_index import therapist_index
+from backend.types.personality_test_codec import (
+    PERSONALITY_TEST_LENGTH,
+    get_answer_bit,
+    get_question_slot,
+)
+from backend.types.scores_types import (
+    PERSONALITY_TRAIT_ORDER as TRAIT_ORDER,
+    PersonalityTestCategory,
+)
 from backend.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 ScoresType = list[float]
 
-PERSONALITY_TEST_LENGTH = 50
-
-PERSONALITY_TRAITS = frozenset(
-    [
-        "extroversion",
-        "openness",
-        "neuroticism",
-        "conscientiousness",
-        "agreeableness",
-    ]
+# Order in which incomplete categories are reported
+PERSONALITY_TRAITS_ERROR_ORDER = (
+    "extroversion",
+    "openness",
+    "agreeableness",
+    "neuroticism",
+    "conscientiousness",
 )
 
 
-def _calculate_extroversion_score(scores: ScoresType) -> float | None:
-    """Calculates the decimal score for extroversion"""
-    if not scores or len(scores) < 10:
-        return None
+# The instrument as data: each trait score is
+# (offset + sum(sign * answer) over the trait's ten questions) / 10.
+# Rows follow PERSONALITY_TRAIT_ORDER, columns the question numbers 1 to 10.
+PERSONALITY_TEST_SIGNS = np.array(
+    [
+        [1, -1, 1, -1, 1, -1, 1, -1, 1, -1],  # extroversion
+        [1, -1, 1, -1, 1, -1, 1, -1, 1, 1],  # conscientiousness
+        [1, -1, 1, -1, 1, -1, 1, 1, 1, 1],  # openness
+        [-1, 1, -1, 1, -1, -1, -1, -1, -1, -1],  # neuroticism
+        [-1, 1, -1, 1, -1, 1, -1, 1, 1, 1],  # agreeableness
+    ],
+    dtype=np.float64,
+)
+PERSONALITY_TEST_OFFSETS = np.array([20, 14, 8, 38, 14], dtype=np.float64)
 
-    scores_sum = (
-        20
-        + scores[0]
-        - scores[1]
-        + scores[2]
-        - scores[3]
-        + scores[4]
-        - scores[5]
-        + scores[6]
-        - scores[7]
-        + scores[8]
-        - scores[9]
-    )
-    return scores_sum / 10
+QUESTIONS_PER_TRAIT = PERSONALITY_TEST_SIGNS.shape[1]
 
 
-def _calculate_agreeableness_score(scores: ScoresType) -> float | None:
-    """Calculates the decimal score for agreeableness"""
-    if not scores or len(scores) < 10:
-        return None
+def score_answer_matrix(answers: np.ndarray) -> np.ndarray:
+    """
+    Score many personality tests in one matrix operation.
 
-    scores_sum = (
-        14
-        - scores[0]
-        + scores[1]
-        - scores[2]
-        + scores[3]
-        - scores[4]
-        + scores[5]
-        - scores[6]
-        + scores[7]
-        + scores[8]
-        + scores[9]
+    answers is an (M x 50) array holding the answer to question q of trait t
+    in column t * 10 + q - 1, with NaN for unanswered questions. Returns an
+    (M x 5) array of trait scores; a trait with an unanswered question is NaN.
+    """
+    answers = np.asarray(answers, dtype=np.float64).reshape(
+        -1, len(TRAIT_ORDER), QUESTIONS_PER_TRAIT
     )
-    return scores_sum / 10
+    weighted_sums = np.einsum("mtq,tq->mt", answers, PERSONALITY_TEST_SIGNS)
 
+    return (PERSONALITY_TEST_OFFSETS + weighted_sums) / 10
 
-def _calculate_openness_score(scores: ScoresType) -> float | None:
-    """Calculates the decimal score for openness"""
-    if not scores or len(scores) < 10:
-        return None
 
-    scores_sum = (
-        8
-        + scores[0]
-        - scores[1]
-        + scores[2]
-        - scores[3]
-        + scores[4]
-        - scores[5]
-        + scores[6]
-        + scores[7]
-        + scores[8]
-        + scores[9]
+def personality_test_answer_matrix(
+    personality_tests: list[AnonymousPersonalityTestScore | TherapistPersonalityTest],
+) -> np.ndarray:
+    """Lay out the answers of personality tests as an (M x 50) answer array"""
+    answers = np.full(
+        (len(personality_tests), len(TRAIT_ORDER) * QUESTIONS_PER_TRAIT), np.nan
     )
-    return scores_sum / 10
 
+    for row, personality_test in enumerate(personality_tests):
+        for trait_index, trait in enumerate(TRAIT_ORDER):
+            start = trait_index * QUESTIONS_PER_TRAIT
+            # None becomes NaN when converted to a float array
+            answers[row, start : start + QUESTIONS_PER_TRAIT] = np.array(
+                getattr(personality_test, trait), dtype=np.float64
+            )
 
-def _calculate_neuroticism_score(scores: ScoresType) -> float | None:
-    """Calculates the decimal score for neuroticism"""
+    return answers
 
-    if not scores or len(scores) < 10:
-        return None
 
-    scores_sum = (
-        38
-        - scores[0]
-        + scores[1]
-        - scores[2]
-        + scores[3]
-        - scores[4]
-        - scores[5]
-        - scores[6]
-        - scores[7]
-        - scores[8]
-        - scores[9]
+def _scores_from_row(trait_scores: np.ndarray) -> Scores:
+    return Scores(
+        **{trait: float(score) for trait, score in zip(TRAIT_ORDER, trait_scores)}
     )
-    return scores_sum / 10
 
 
-def _calculate_conscientiousness_score(scores: ScoresType) -> float | None:
-    """Calculates the decimal score for conscientiousness"""
-    if not scores or len(scores) < 10:
-        return None
+def calculate_completed_trait_scores(
+    personality_test: AnonymousPersonalityTestScore | TherapistPersonalityTest | None,
+) -> dict[str, float]:
+    """Calculate the scores of the categories that have been fully answered"""
+    if not personality_test:
+        raise ValueError("Personality test not provided")
 
-    scores_sum = (
-        14
-        + scores[0]
-        - scores[1]
-        + scores[2]
-        - scores[3]
-        + scores[4]
-        - scores[5]
-        + scores[6]
-        - scores[7]
-        + scores[8]
-        + scores[9]
-    )
-    return scores_sum / 10
+    trait_scores = score_answer_matrix(
+        personality_test_answer_matrix([personality_test])
+    )[0]
+
+    return {
+        trait: float(score)
+        for trait, score in zip(TRAIT_ORDER, trait_scores)
+        if not np.isnan(score)
+    }
 
 
-# TODO: Refactor to break out the logic to calculated the personality test score
-# into its own method.
 def format_personality_test(
     personality_test: AnonymousPersonalityTestScore | TherapistPersonalityTest | None,
 ) -> Scores:
-    """Filters for the scores in each of the personality test categries"""
+    """Calculate the trait scores of a completed personality test"""
     if not personality_test:
         raise ValueError("Personality test not provided")
 
-    personality_test_dict = personality_test.model_dump()
-
-    personality_test_score_aggregate = AggregateScores(
-        extroversion=[
-            entry["score"] for entry in personality_test_dict["extroversion"]
-        ],
-        conscientiousness=[
-            entry["score"] for entry in personality_test_dict["conscientiousness"]
-        ],
-        agreeableness=[
-            entry["score"] for entry in personality_test_dict["agreeableness"]
-        ],
-        neuroticism=[entry["score"] for entry in personality_test_dict["neuroticism"]],
-        openness=[entry["score"] for entry in personality_test_dict["openness"]],
-    )
+    trait_scores = score_answer_matrix(
+        personality_test_answer_matrix([personality_test])
+    )[0]
 
-    calculated_personality_test_score = calculate_test_scores(
-        personality_test_score_aggregate
-    )
+    _raise_for_incomplete_traits(trait_scores)
 
-    return calculated_personality_test_score
+    return _scores_from_row(trait_scores)
 
 
-def create_patient_personality_test_score(
-    patient: Patient, scores: Scores, session: Session
+async def create_patient_personality_test_score(
+    patient: Patient, scores: Scores, session: AsyncSession
 ):
     """create a personality test score record for a patient"""
     if not patient:
@@ -184,7 +151,7 @@ def create_patient_personality_test_score(
         raise ValueError("Scores not provided")
 
     try:
-        patient.personality_test = PersonalityTestScore(
+        personality_test_score = PersonalityTestScore(
             extroversion=Decimal(scores.extroversion),
             conscientiousness=Decimal(scores.conscientiousness),
             agreeableness=Decimal(scores.agreeableness),
@@ -193,12 +160,12 @@ def create_patient_personality_test_score(
             patient_id=patient.id,
         )
 
-        session.add(patient)
-        session.commit()
-        session.refresh(patient)
+        session.add(personality_test_score)
+        await session.commit()
+        await session.refresh(patient)
 
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.exception("Unable to create a personality test score")
         raise PersonalityTestScoreCreationError(
             "Unable to create a personality test score"
@@ -207,64 +174,42 @@ def create_patient_personality_test_score(
     return patient
 
 
+def _raise_for_incomplete_traits(trait_scores: np.ndarray):
+    """Raise for the first trait whose score could not be calculated"""
+    for trait in PERSONALITY_TRAITS_ERROR_ORDER:
+        if np.isnan(trait_scores[TRAIT_ORDER.index(trait)]):
+            raise HTTPException(
+                status_code=400,
+                detail=f"{trait.capitalize()} score could not be calculated "
+                "due to invalid scores list.",
+            )
+
+
 def calculate_test_scores(scores: AggregateScores) -> Scores:
     """Calculate each category's decimal score from all of the personality test answers"""
     if not scores:
         return None
 
-    traits_results: Scores = Scores(
-        extroversion=0.0,
-        openness=0.0,
-        neuroticism=0.0,
-        conscientiousness=0.0,
-        agreeableness=0.0,
-    )
+    answers = np.full(len(TRAIT_ORDER) * QUESTIONS_PER_TRAIT, np.nan)
 
-    extroversion_score = _calculate_extroversion_score(scores.extroversion)
-    openness_score = _calculate_openness_score(scores.openness)
-    agreeableness_score = _calculate_agreeableness_score(scores.agreeableness)
-    neuroticism_score = _calculate_neuroticism_score(scores.neuroticism)
-    conscientiousness_score = _calculate_conscientiousness_score(
-        scores.conscientiousness
-    )
+    for trait_index, trait in enumerate(TRAIT_ORDER):
+        trait_answers = getattr(scores, trait) or []
 
-    if not extroversion_score:
-        raise HTTPException(
-            status_code=400,
-            detail="Extroversion score could not be calculated due to invalid scores list.",
-        )
-    if not openness_score:
-        raise HTTPException(
-            status_code=400,
-            detail="Openness score could not be calculated due to invalid scores list.",
-        )
-    if not agreeableness_score:
-        raise HTTPException(
-            status_code=400,
-            detail="Agreeableness score could not be calculated due to invalid scores list.",
-        )
-    if not neuroticism_score:
-        raise HTTPException(
-            status_code=400,
-            detail="Neuroticism score could not be calculated due to invalid scores list.",
-        )
-    if not conscientiousness_score:
-        raise HTTPException(
-            status_code=400,
-            detail="Conscientiousness score could not be calculated due to invalid scores list.",
-        )
+        if len(trait_answers) >= QUESTIONS_PER_TRAIT:
+            start = trait_index * QUESTIONS_PER_TRAIT
+            answers[start : start + QUESTIONS_PER_TRAIT] = trait_answers[
+                :QUESTIONS_PER_TRAIT
+            ]
+
+    trait_scores = score_answer_matrix(answers)[0]
 
-    traits_results.openness = openness_score
-    traits_results.extroversion = extroversion_score
-    traits_results.agreeableness = agreeableness_score
-    traits_results.neuroticism = neuroticism_score
-    traits_results.conscientiousness = conscientiousness_score
+    _raise_for_incomplete_traits(trait_scores)
 
-    return traits_results
+    return _scores_from_row(trait_scores)
 
 
-def create_anonymous_session_test_score(
-    anonymous_session: AnonymousPatient, session: Session
+async def create_anonymous_session_test_score(
+    anonymous_session: AnonymousPatient, session: AsyncSession
 ):
     """Create a test score for an anonymous session."""
     if not anonymous_session.id:
@@ -274,17 +219,17 @@ def create_anonymous_session_test_score(
             anonymous_patient_id=anonymous_session.id
         )
         session.add(personality_test_score)
-        session.commit()
-        session.refresh(personality_test_score)
+        await session.commit()
+        await session.refresh(personality_test_score)
 
         return personality_test_score
     except SQLAlchemyError as e:
-        session.rollback()
+        await session.rollback()
         raise TestScoreCreationError("Failed to create test score") from e
 
 
-def create_therapist_personality_test_instance(
-    personality_test: TherapistPersonalityTest, session: Session
+async def create_therapist_personality_test_instance(
+    personality_test: TherapistPersonalityTest, session: AsyncSession
 ) -> TherapistPersonalityTest:
     """Commit the therapist test resource to the DB"""
     if not personality_test:
@@ -292,43 +237,65 @@ def create_therapist_personality_test_instance(
 
     try:
         session.add(personality_test)
-        session.commit()
-        session.refresh(personality_test)
+        await session.commit()
+        await session.refresh(personality_test)
 
         return personality_test
     except SQLAlchemyError as e:
-        session.rollback()
+        await session.rollback()
         logger.exception("Error in saving a therapist test score")
         raise TestScoreCreationError("Failed to create a therapist test score") from e
 
 
-def get_anonymous_test_score(
-    anonymous_test_score_id: str, session: Session
+async def get_anonymous_test_score(
+    anonymous_test_score_id: str, session: AsyncSession
 ) -> AnonymousPersonalityTestScore | None:
     """Retrieve an anonymous patient's test score from the corresponding table"""
     try:
         statement = select(AnonymousPersonalityTestScore).where(
             anonymous_test_score_id == AnonymousPersonalityTestScore.id
         )
-        anonymous_test_score = session.exec(statement).first()
+        anonymous_test_score = (await session.exec(statement)).first()
 
         return anonymous_test_score
     except Exception as e:
         raise ValueError("Unable to retrieve anonymous test score") from e
 
 
-def _get_existing_answer(data: dict, category_answers: list[dict]) -> int | None:
-    """Helper function to check if a question has already been answered in a category"""
-    for idx, answer in enumerate(category_answers):
-        if data["id"] == answer["id"]:
-            return idx
+def set_personality_test_answers(
+    answers: list[PersonalityTestQuestion],
+    personality_test: AnonymousPersonalityTestScore | TherapistPersonalityTest,
+) -> dict[str, list[int | None]]:
+    """
+    Place the answer scores in their question slots, returning only the
+    changed categories.
+    """
+    updated_categories = {}
+
+    for answer in answers:
+        slot = get_question_slot(answer.id)
+
+        if slot is None:
+            raise ValueError("Invalid question id")
 
-    return None
+        category = PersonalityTestCategory(answer.category).value
+
+        if category not in updated_categories:
+            category_scores = getattr(personality_test, category, None)
+
+            if category_scores is None:
+                raise ValueError("Invalid category index")
+
+            updated_categories[category] = list(category_scores)
+
+        updated_categories[category][slot] = answer.score
+
+    return updated_categories
 
 
 def update_anonymous_session_test_score_category(
     data: PersonalityTestQuestion, personality_test: AnonymousPersonalityTestScore
-) -> dict[str, list[PersonalityTestQuestion]]:
+) -> dict[str, list[int | None]]:
     """Update a category of an anonymous session test score."""
     if not personality_test:
         raise ValueError("Personality test id not found")
@@ -336,28 +303,12 @@ def update_anonymous_session_test_score_category(
     if not data:
         raise ValueError("Updated data is not present")
 
-    personality_test_obj = personality_test.model_dump()
-    personality_test_answer = data.model_dump()
-    category_answers = personality_test_obj.get(data.category)
-
-    if category_answers is None:
-        raise ValueError("Invalid category index")
-
-    existing_answer_index = _get_existing_answer(
-        personality_test_answer, category_answers
-    )
-
-    if existing_answer_index is not None:
-        category_answers[existing_answer_index] = personality_test_answer
-    else:
-        category_answers.append(personality_test_answer)
-
-    return {data.category: category_answers}
+    return set_personality_test_answers([data], personality_test)
 
 
 def update_therapist_personality_test_category(
     answer: PersonalityTestQuestion, personality_test: TherapistPersonalityTest
-):
+) -> dict[str, list[int | None]]:
     """Update a category of a therapist personality test model."""
     if answer is None:
         raise ValueError("No update provided for the test")
@@ -365,25 +316,66 @@ def update_therapist_personality_test_category(
     if personality_test is None:
         raise ValueError("Personality test not provided")
 
-    answer_to_object = answer.model_dump()
-    personality_test_to_object = personality_test.model_dump()
-    category_answers = personality_test_to_object.get(answer.category)
+    return set_personality_test_answers([answer], personality_test)
+
 
-    if category_answers is None:
-        raise ValueError("Invalid category index")
+def get_answer_column_updates(
+    personality_test: AnonymousPersonalityTestScore | TherapistPersonalityTest,
+    updated_categories: dict[str, list[int | None]],
+) -> tuple[dict, int]:
+    """
+    SET clauses of the changed answers, each written as one array element,
+    together with the answered mask after the update
+    """
+    model = type(personality_test)
+    values = {}
+    answered_bits = 0
 
-    existing_answer_index = _get_existing_answer(answer_to_object, category_answers)
+    for category, category_scores in updated_categories.items():
+        column = getattr(model, category)
+        stored_scores = getattr(personality_test, category)
 
-    if existing_answer_index is not None:
-        category_answers[existing_answer_index] = answer_to_object
-    else:
-        category_answers.append(answer_to_object)
+        for slot, (stored, score) in enumerate(zip(stored_scores, category_scores)):
+            if stored != score:
+                # Postgres arrays are indexed from 1, like the question ids
+                values[column[slot + 1]] = score
+                answered_bits |= get_answer_bit(category, slot)
 
-    return {answer.category: category_answers}
+    if answered_bits:
+        values[model.answered_mask] = model.answered_mask.op("|")(answered_bits)
 
+    return values, personality_test.answered_mask | answered_bits
+
+
+async def save_personality_test_answers(
+    updated_categories: dict[str, list[int | None]],
+    personality_test: AnonymousPersonalityTestScore | TherapistPersonalityTest,
+    session: AsyncSession,
+):
+    """
+    Write the changed answers in place and commit. The instance is updated
+    to the saved answers without reading the row back.
+    """
+    values, answered_mask = get_answer_column_updates(
+        personality_test, updated_categories
+    )
 
-def patch_therapist_test_score_category(
-    data: dict, personality_test: TherapistPersonalityTest, session: Session
+    if values:
+        model = type(personality_test)
+        await session.exec(
+            update(model).where(model.id == personality_test.id).values(values)
+        )
+
+    await session.commit()
+
+    for category, category_scores in updated_categories.items():
+        set_committed_value(personality_test, category, category_scores)
+
+    set_committed_value(personality_test, "answered_mask", answered_mask)
+
+
+async def patch_therapist_test_score_category(
+    data: dict, personality_test: TherapistPersonalityTest, session: AsyncSession
 ) -> TherapistPersonalityTest:
     """Persist the category update to the DB"""
     if data is None:
@@ -391,26 +383,22 @@ def patch_therapist_test_score_category(
     if personality_test is None:
         raise ValueError("Personality test not provided")
 
-    updated_personality_test = personality_test.sqlmodel_update(data)
-
     try:
-        session.add(updated_personality_test)
-        session.commit()
-        session.refresh(updated_personality_test)
+        await save_personality_test_answers(data, personality_test, session)
     except SQLAlchemyError as e:
-        session.rollback()
+        await session.rollback()
         logger.exception("Unable to persist the therapist personality test score")
         raise TestScoreUpdateError(
             "Unable to persist the personality test to the DB"
         ) from e
 
-    return updated_personality_test
+    return personality_test
 
 
-def patch_anonymous_test_score_category(
+async def patch_anonymous_test_score_category(
     data: dict[str, list[PersonalityTestQuestion]],
     personality_test: AnonymousPersonalityTestScore,
-    session: Session,
+    session: AsyncSession,
 ) -> AnonymousPersonalityTestScore:
     """Persist a category update of an personality test"""
     if not data:
@@ -419,16 +407,12 @@ def patch_anonymous_test_score_category(
     if not personality_test:
         raise ValueError("Anonymous patient is not provided")
 
-    personality_test.sqlmodel_update(data)
-
     try:
-        session.add(personality_test)
-        session.commit()
-        session.refresh(personality_test)
+        await save_personality_test_answers(data, personality_test, session)
 
         return personality_test
     except SQLAlchemyError as e:
-        session.rollback()
+        await session.rollback()
         logger.exception(
             "Unable to persist the update anonymous personality test score"
         )
@@ -441,19 +425,11 @@ def get_is_personality_test_complete(
     if not personality_test:
         raise ValueError("A personality test was not provided")
 
-    personality_test_to_obj = personality_test.model_dump()
-
-    total_answers = sum(
-        len(answers)
-        for category, answers in personality_test_to_obj.items()
-        if category in PERSONALITY_TRAITS
-    )
-
-    return total_answers == PERSONALITY_TEST_LENGTH
+    return personality_test.answered_mask.bit_count() == PERSONALITY_TEST_LENGTH
 
 
-def add_therapist_personality_test_score(
-    therapist: Therapist, personality_test_scores: Scores, session: Session
+async def add_therapist_personality_test_score(
+    therapist: Therapist, personality_test_scores: Scores, session: AsyncSession
 ) -> TherapistPersonalityTest | None:
     if not therapist:
         raise ValueError("Therapist not provided")
@@ -471,13 +447,16 @@ def add_therapist_personality_test_score(
             openness=Decimal(personality_test_scores.openness),
         )
         session.add(therapist)
-        session.commit()
-        session.refresh(therapist)
-
-        return therapist.raw_personality_scores
+        await session.exec(upsert_match_vector(therapist, personality_test_scores))
+        await session.commit()
+        await session.refresh(therapist)
     except SQLAlchemyError as e:
-        session.rollback()
+        await session.rollback()
         logger.exception("Unable to update the therapist personality test")
         raise TestScoreUpdateError(
             "Unable to update the therapist personality test"
         ) from e
+
+    therapist_index.upsert_therapist(therapist, personality_test_scores)
+
+    return therapist.raw_personality_scores
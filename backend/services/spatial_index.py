@@ -0,0 +1,106 @@
+"""
+Grid index over therapist coordinates for radius-bounded candidate retrieval.
+
+Coordinates are bucketed into fixed-size latitude/longitude cells numbered row
+by row, so the cells of one latitude band that overlap a query are a contiguous
+range of cell ids. Rows are stored sorted by cell id and a radius query only
+binary-searches the bands covering the query's bounding box before computing
+exact distances for the candidates it found.
+"""
+
+import math
+import numpy as np
+from backend.services.distance import bounding_box_spans, haversine_km
+
+DEFAULT_CELL_SIZE_DEGREES = 0.5
+
+
+class GeoGridIndex:
+    """Latitude/longitude grid over the rows of a coordinate array"""
+
+    def __init__(
+        self,
+        coordinates: np.ndarray,
+        cell_size_degrees: float = DEFAULT_CELL_SIZE_DEGREES,
+    ) -> None:
+        if cell_size_degrees <= 0:
+            raise ValueError("Cell size must be positive")
+
+        self.cell_size_degrees = cell_size_degrees
+        self._lon_cells = math.ceil(360 / cell_size_degrees)
+
+        located = np.flatnonzero(~np.isnan(coordinates).any(axis=1))
+        cell_ids = self._cell_ids(coordinates[located, 0], coordinates[located, 1])
+        order = np.argsort(cell_ids, kind="stable")
+
+        self._cell_ids_sorted = cell_ids[order]
+        self._rows = located[order]
+        self._latitudes = coordinates[self._rows, 0].astype(np.float64)
+        self._longitudes = coordinates[self._rows, 1].astype(np.float64)
+
+    def __len__(self) -> int:
+        return self._rows.size
+
+    def _lat_cell(self, latitudes):
+        cells = np.floor((np.asarray(latitudes) + 90) / self.cell_size_degrees)
+        return np.clip(cells, 0, math.ceil(180 / self.cell_size_degrees) - 1)
+
+    def _lon_cell(self, longitudes):
+        cells = np.floor((np.asarray(longitudes) + 180) / self.cell_size_degrees)
+        return np.mod(cells, self._lon_cells)
+
+    def _cell_ids(self, latitudes, longitudes) -> np.ndarray:
+        return (
+            self._lat_cell(latitudes) * self._lon_cells + self._lon_cell(longitudes)
+        ).astype(np.int64)
+
+    def _lon_cell_ranges(self, longitude: float, lon_span: float):
+        """Inclusive longitude cell ranges covering longitude +- lon_span"""
+        if lon_span >= 180:
+            return [(0, self._lon_cells - 1)]
+
+        first = int(self._lon_cell(longitude - lon_span))
+        last = int(self._lon_cell(longitude + lon_span))
+
+        if first <= last:
+            return [(first, last)]
+
+        # the box crosses the antimeridian
+        return [(first, self._lon_cells - 1), (0, last)]
+
+    def query_radius(
+        self, latitude: float, longitude: float, radius_km: float
+    ) -> np.ndarray:
+        """Rows within radius_km of a point, ordered by row"""
+        lat_span, lon_span = bounding_box_spans(latitude, radius_km)
+        lowest, highest = latitude - lat_span, latitude + lat_span
+
+        slices = []
+        first_band = int(self._lat_cell(lowest))
+        last_band = int(self._lat_cell(highest))
+
+        for band in range(first_band, last_band + 1):
+            for first, last in self._lon_cell_ranges(longitude, lon_span):
+                start = np.searchsorted(
+                    self._cell_ids_sorted, band * self._lon_cells + first, "left"
+                )
+                stop = np.searchsorted(
+                    self._cell_ids_sorted, band * self._lon_cells + last, "right"
+                )
+
+                if start < stop:
+                    slices.append(np.arange(start, stop))
+
+        if not slices:
+            return np.empty(0, dtype=np.intp)
+
+        positions = np.concatenate(slices)
+        distances = haversine_km(
+            latitude,
+            longitude,
+            self._latitudes[positions],
+            self._longitudes[positions],
+            max_km=radius_km,
+        )
+
+        return np.sort(self._rows[positions[distances <= radius_km]])
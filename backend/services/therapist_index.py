@@ -0,0 +1,771 @@
+"""
+Process-resident index of the features used to match therapists.
+
+The index is loaded once from the database and then kept current by the services
+that write therapist profiles and personality test scores, and by polling the
+match vectors written by other processes. The loaded therapists form a base
+segment that is never copied on a write: changes go to a small overlay segment,
+merged into a new base once it grows. Every write swaps in a new immutable
+snapshot under a lock, so readers holding a snapshot never observe a
+half-applied update.
+"""
+
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from functools import cached_property
+from threading import Lock
+from typing import Iterable
+from uuid import UUID
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, col, select
+from backend.models.match import TherapistMatchVector
+from backend.models.user import Therapist
+from backend.schemas.matches import TherapistTraitMatrix
+from backend.schemas.scores import Scores
+from backend.services.spatial_index import GeoGridIndex
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER as TRAIT_ORDER
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# The overlay is merged into the base once it holds this share of the base rows
+COMPACTION_RATIO = 0.05
+COMPACTION_MIN_ROWS = 256
+# Match vectors are stamped with the start time of their transaction, so a
+# refresh reaches back this far for the ones that committed late
+REFRESH_OVERLAP = timedelta(minutes=1)
+
+
+@dataclass(frozen=True)
+class TherapistFeatures:
+    """Match features of a single therapist"""
+
+    therapist_id: UUID
+    traits: tuple[float, ...] | None
+    latitude: float | None
+    longitude: float | None
+    specializations: frozenset[str]
+    is_lgbtq_specialization: bool
+    is_religious_specialization: bool
+    therapist_type: str | None
+    is_profile_complete: bool
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True)
+class TherapistIndexSegment:
+    """
+    Immutable arrays of the match features of a set of therapists.
+
+    Row i of every array describes therapist_ids[i]. Missing traits and
+    coordinates are stored as NaN.
+    """
+
+    therapist_ids: tuple[UUID, ...]
+    traits: np.ndarray
+    coordinates: np.ndarray
+    specializations: tuple[frozenset[str], ...]
+    is_lgbtq_specialization: np.ndarray
+    is_religious_specialization: np.ndarray
+    therapist_types: tuple[str | None, ...]
+    is_profile_complete: np.ndarray
+    positions: dict[UUID, int] = field(repr=False)
+
+    def __len__(self) -> int:
+        return len(self.therapist_ids)
+
+    @cached_property
+    def scored_mask(self) -> np.ndarray:
+        """Mask of therapists with a personality test score"""
+        return _read_only(~np.isnan(self.traits).any(axis=1))
+
+    @cached_property
+    def matchable_mask(self) -> np.ndarray:
+        """Mask of therapists with a completed profile and personality test score"""
+        return _read_only(self.is_profile_complete & self.scored_mask)
+
+    @property
+    def matchable_rows(self) -> np.ndarray:
+        """Rows of therapists with a completed profile and personality test score"""
+        return np.flatnonzero(self.matchable_mask)
+
+    @cached_property
+    def specialization_rows(self) -> dict[str, np.ndarray]:
+        """Rows of the therapists offering each specialization"""
+        rows: dict[str, list[int]] = {}
+
+        for row, specializations in enumerate(self.specializations):
+            for specialization in specializations:
+                rows.setdefault(specialization, []).append(row)
+
+        return {
+            specialization: _read_only(np.array(specialization_rows, dtype=np.intp))
+            for specialization, specialization_rows in rows.items()
+        }
+
+    def rows_matching(
+        self,
+        therapy_needs: Iterable[str] | None = None,
+        is_lgbtq_specialization: bool | None = None,
+        is_religious_specialization: bool | None = None,
+    ) -> np.ndarray:
+        """
+        Matchable rows of therapists offering one of therapy_needs and the
+        LGBTQ and religious specializations that are asked for
+        """
+        mask = self.matchable_mask.copy()
+
+        if therapy_needs:
+            offered = np.zeros(len(self), dtype=bool)
+            for need in therapy_needs:
+                offered[self.specialization_rows.get(need, [])] = True
+            mask &= offered
+
+        if is_lgbtq_specialization:
+            mask &= self.is_lgbtq_specialization
+
+        if is_religious_specialization:
+            mask &= self.is_religious_specialization
+
+        return np.flatnonzero(mask)
+
+    @cached_property
+    def spatial_index(self) -> GeoGridIndex:
+        """Grid index over the coordinates of the therapists"""
+        return GeoGridIndex(self.coordinates)
+
+    def rows_within_radius(
+        self, latitude: float, longitude: float, radius_km: float
+    ) -> np.ndarray:
+        """Matchable rows of therapists located within radius_km of a point"""
+        rows = self.spatial_index.query_radius(latitude, longitude, radius_km)
+        return rows[self.matchable_mask[rows]]
+
+    def trait_matrix(self, rows: np.ndarray) -> TherapistTraitMatrix:
+        """Trait matrix of the given rows"""
+        return TherapistTraitMatrix(
+            therapist_ids=[self.therapist_ids[row] for row in rows],
+            traits=np.ascontiguousarray(self.traits[rows]),
+        )
+
+    def features(self, therapist_id: UUID) -> TherapistFeatures | None:
+        """Features of a single therapist, or None if the therapist is not indexed"""
+        row = self.positions.get(therapist_id)
+
+        if row is None:
+            return None
+
+        traits = self.traits[row]
+        latitude, longitude = self.coordinates[row]
+
+        return TherapistFeatures(
+            therapist_id=therapist_id,
+            traits=None if np.isnan(traits).any() else tuple(traits.tolist()),
+            latitude=None if np.isnan(latitude) else float(latitude),
+            longitude=None if np.isnan(longitude) else float(longitude),
+            specializations=self.specializations[row],
+            is_lgbtq_specialization=bool(self.is_lgbtq_specialization[row]),
+            is_religious_specialization=bool(self.is_religious_specialization[row]),
+            therapist_type=self.therapist_types[row],
+            is_profile_complete=bool(self.is_profile_complete[row]),
+        )
+
+
+_SEGMENT_COLUMNS = (
+    "therapist_ids",
+    "traits",
+    "coordinates",
+    "specializations",
+    "is_lgbtq_specialization",
+    "is_religious_specialization",
+    "therapist_types",
+    "is_profile_complete",
+)
+
+
+def build_segment(rows: list[TherapistFeatures]) -> TherapistIndexSegment:
+    """Build a segment from a list of therapist features"""
+    nan_traits = (np.nan,) * len(TRAIT_ORDER)
+
+    return TherapistIndexSegment(
+        therapist_ids=tuple(row.therapist_id for row in rows),
+        traits=_read_only(
+            np.array(
+                [row.traits or nan_traits for row in rows], dtype=np.float32
+            ).reshape(-1, len(TRAIT_ORDER))
+        ),
+        coordinates=_read_only(
+            np.array(
+                [
+                    (
+                        np.nan if row.latitude is None else row.latitude,
+                        np.nan if row.longitude is None else row.longitude,
+                    )
+                    for row in rows
+                ],
+                dtype=np.float32,
+            ).reshape(-1, 2)
+        ),
+        specializations=tuple(row.specializations for row in rows),
+        is_lgbtq_specialization=_read_only(
+            np.array([row.is_lgbtq_specialization for row in rows], dtype=bool)
+        ),
+        is_religious_specialization=_read_only(
+            np.array([row.is_religious_specialization for row in rows], dtype=bool)
+        ),
+        therapist_types=tuple(row.therapist_type for row in rows),
+        is_profile_complete=_read_only(
+            np.array([row.is_profile_complete for row in rows], dtype=bool)
+        ),
+        positions={row.therapist_id: idx for idx, row in enumerate(rows)},
+    )
+
+
+_EMPTY_SEGMENT = build_segment([])
+
+
+def _merge_segments(
+    base: TherapistIndexSegment, rows: np.ndarray, overlay: TherapistIndexSegment
+) -> TherapistIndexSegment:
+    """Segment of the given base rows followed by every overlay row"""
+
+    def _merge(values, updates):
+        if isinstance(values, tuple):
+            return tuple(values[row] for row in rows) + updates
+        return _read_only(np.concatenate([values[rows], updates]))
+
+    merged = {
+        name: _merge(getattr(base, name), getattr(overlay, name))
+        for name in _SEGMENT_COLUMNS
+    }
+
+    return TherapistIndexSegment(
+        **merged,
+        positions={
+            therapist_id: row
+            for row, therapist_id in enumerate(merged["therapist_ids"])
+        },
+    )
+
+
+@dataclass(frozen=True)
+class TherapistIndexSnapshot:
+    """
+    Immutable view of the therapist index at a given version.
+
+    The base segment holds the therapists as loaded and may be memory-mapped.
+    Therapists changed or added since then are in the overlay segment, and
+    hidden lists the base rows they replace or whose therapist was deleted.
+    """
+
+    version: int
+    base: TherapistIndexSegment
+    overlay: TherapistIndexSegment = _EMPTY_SEGMENT
+    hidden: frozenset[UUID] = frozenset()
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self.hidden) + len(self.overlay)
+
+    @cached_property
+    def base_mask(self) -> np.ndarray:
+        """Mask of the base rows that are not hidden"""
+        mask = np.ones(len(self.base), dtype=bool)
+        mask[
+            [self.base.positions[therapist_id] for therapist_id in self.hidden]
+        ] = False
+        return _read_only(mask)
+
+    @property
+    def scored_therapist_ids(self) -> list[UUID]:
+        """Ids of every indexed therapist with a personality test score"""
+        base_rows = np.flatnonzero(self.base.scored_mask & self.base_mask)
+
+        return [self.base.therapist_ids[row] for row in base_rows] + [
+            self.overlay.therapist_ids[row]
+            for row in np.flatnonzero(self.overlay.scored_mask)
+        ]
+
+    @property
+    def scored_count(self) -> int:
+        """Number of indexed therapists with a personality test score"""
+        return int(
+            np.count_nonzero(self.base.scored_mask & self.base_mask)
+            + np.count_nonzero(self.overlay.scored_mask)
+        )
+
+    @property
+    def therapist_ids(self) -> tuple[UUID, ...]:
+        """Ids of every indexed therapist"""
+        base_ids = self.base.therapist_ids
+
+        if self.hidden:
+            base_ids = tuple(base_ids[row] for row in np.flatnonzero(self.base_mask))
+
+        return base_ids + self.overlay.therapist_ids
+
+    def features(self, therapist_id: UUID) -> TherapistFeatures | None:
+        """Features of a single therapist, or None if the therapist is not indexed"""
+        if therapist_id in self.overlay.positions:
+            return self.overlay.features(therapist_id)
+
+        if therapist_id in self.hidden:
+            return None
+
+        return self.base.features(therapist_id)
+
+    @cached_property
+    def _matchable_trait_matrix(self) -> TherapistTraitMatrix:
+        return self._trait_matrix(self.base.matchable_rows, self.overlay.matchable_rows)
+
+    def trait_matrix(self) -> TherapistTraitMatrix:
+        """Trait matrix of every matchable therapist"""
+        return self._matchable_trait_matrix
+
+    def trait_matrix_within_radius(
+        self, latitude: float, longitude: float, radius_km: float
+    ) -> TherapistTraitMatrix:
+        """Trait matrix of the matchable therapists within radius_km of a point"""
+        return self._trait_matrix(
+            self.base.rows_within_radius(latitude, longitude, radius_km),
+            self.overlay.rows_within_radius(latitude, longitude, radius_km),
+        )
+
+    def trait_matrix_matching(
+        self,
+        therapy_needs: Iterable[str] | None = None,
+        is_lgbtq_specialization: bool | None = None,
+        is_religious_specialization: bool | None = None,
+    ) -> TherapistTraitMatrix:
+        """
+        Trait matrix of the matchable therapists offering one of therapy_needs
+        and the LGBTQ and religious specializations that are asked for
+        """
+        filters = (therapy_needs, is_lgbtq_specialization, is_religious_specialization)
+
+        return self._trait_matrix(
+            self.base.rows_matching(*filters), self.overlay.rows_matching(*filters)
+        )
+
+    def _trait_matrix(
+        self, base_rows: np.ndarray, overlay_rows: np.ndarray
+    ) -> TherapistTraitMatrix:
+        base_rows = base_rows[self.base_mask[base_rows]]
+        base = self.base.trait_matrix(base_rows)
+
+        if not len(overlay_rows):
+            return base
+
+        overlay = self.overlay.trait_matrix(overlay_rows)
+
+        return TherapistTraitMatrix(
+            therapist_ids=base.therapist_ids + overlay.therapist_ids,
+            traits=np.concatenate([base.traits, overlay.traits]),
+        )
+
+
+def _with_changes(
+    snapshot: TherapistIndexSnapshot,
+    version: int,
+    changes: list[TherapistFeatures],
+    deleted: list[UUID],
+) -> TherapistIndexSnapshot:
+    """
+    Apply changed and deleted therapists to the overlay of a snapshot. Only the
+    overlay is rebuilt, unless it outgrows the base and both are merged.
+    """
+    overlay = {
+        therapist_id: snapshot.overlay.features(therapist_id)
+        for therapist_id in snapshot.overlay.therapist_ids
+    }
+
+    for features in changes:
+        overlay[features.therapist_id] = features
+
+    for therapist_id in deleted:
+        overlay.pop(therapist_id, None)
+
+    hidden = snapshot.hidden | {
+        therapist_id
+        for therapist_id in (*overlay, *deleted)
+        if therapist_id in snapshot.base.positions
+    }
+    updated = TherapistIndexSnapshot(
+        version=version,
+        base=snapshot.base,
+        overlay=build_segment(list(overlay.values())),
+        hidden=frozenset(hidden),
+    )
+
+    if len(updated.overlay) <= max(
+        COMPACTION_MIN_ROWS, COMPACTION_RATIO * len(updated.base)
+    ):
+        return updated
+
+    return TherapistIndexSnapshot(
+        version=version,
+        base=_merge_segments(
+            updated.base, np.flatnonzero(updated.base_mask), updated.overlay
+        ),
+    )
+
+
+def _as_stored(features: TherapistFeatures) -> TherapistFeatures:
+    """Features as read back from the float32 arrays of a segment"""
+
+    def _float32(value: float | None) -> float | None:
+        return None if value is None else float(np.float32(value))
+
+    return replace(
+        features,
+        traits=(
+            tuple(np.asarray(features.traits, dtype=np.float32).tolist())
+            if features.traits is not None
+            else None
+        ),
+        latitude=_float32(features.latitude),
+        longitude=_float32(features.longitude),
+    )
+
+
+def _therapist_type_value(therapist_type) -> str | None:
+    if therapist_type is None:
+        return None
+    return getattr(therapist_type, "value", therapist_type)
+
+
+def features_from_therapist(
+    therapist: Therapist, traits: tuple[float, ...] | None
+) -> TherapistFeatures:
+    """Extract the match features from a therapist model"""
+    if not therapist.id:
+        raise ValueError("Therapist id not provided")
+
+    return TherapistFeatures(
+        therapist_id=therapist.id,
+        traits=traits,
+        latitude=therapist.latitude,
+        longitude=therapist.longitude,
+        specializations=frozenset(therapist.specializations or []),
+        is_lgbtq_specialization=bool(therapist.is_lgbtq_specialization),
+        is_religious_specialization=bool(therapist.is_religious_specialization),
+        therapist_type=_therapist_type_value(therapist.therapist_type),
+        is_profile_complete=bool(therapist.is_profile_complete),
+    )
+
+
+def load_therapist_features(
+    session: Session, changed_since: datetime | None = None
+) -> list[TherapistFeatures]:
+    """
+    Load the match features of every therapist with a single column select,
+    taking the float4 trait vectors of the scored ones from their match vector.
+
+    With changed_since only the therapists whose match vector was written
+    after that time are loaded. Every score and profile write of a scored
+    therapist touches its vector, an unscored therapist is not matchable.
+    """
+    statement = select(
+        Therapist.id,
+        Therapist.latitude,
+        Therapist.longitude,
+        Therapist.specializations,
+        Therapist.is_lgbtq_specialization,
+        Therapist.is_religious_specialization,
+        Therapist.therapist_type,
+        Therapist.is_profile_complete,
+        TherapistMatchVector.traits,
+    ).outerjoin(TherapistMatchVector, TherapistMatchVector.therapist_id == Therapist.id)
+
+    if changed_since is not None:
+        statement = statement.where(
+            col(TherapistMatchVector.updated_at) > changed_since
+        )
+
+    return [
+        TherapistFeatures(
+            therapist_id=row[0],
+            traits=tuple(row[8]) if row[8] is not None else None,
+            latitude=row[1],
+            longitude=row[2],
+            specializations=frozenset(row[3] or []),
+            is_lgbtq_specialization=bool(row[4]),
+            is_religious_specialization=bool(row[5]),
+            therapist_type=_therapist_type_value(row[6]),
+            is_profile_complete=bool(row[7]),
+        )
+        for row in session.exec(statement).all()
+    ]
+
+
+def _find_deleted(
+    session: Session,
+    snapshot: TherapistIndexSnapshot,
+    changes: list[TherapistFeatures],
+    vector_count: int,
+) -> list[UUID]:
+    """
+    Scored therapists deleted since the snapshot was synced. Their match vector
+    is removed with them, so they never show up in the changes. The vector ids
+    are only read when there are fewer vectors than scored therapists.
+    """
+
+    def _is_newly_scored(features: TherapistFeatures) -> bool:
+        existing = snapshot.features(features.therapist_id)
+        return features.traits is not None and (
+            existing is None or existing.traits is None
+        )
+
+    if snapshot.scored_count + sum(map(_is_newly_scored, changes)) <= vector_count:
+        return []
+
+    vector_ids = set(session.exec(select(TherapistMatchVector.therapist_id)).all())
+
+    return [
+        therapist_id
+        for therapist_id in snapshot.scored_therapist_ids
+        if therapist_id not in vector_ids
+    ]
+
+
+def _database_now(session: Session) -> datetime:
+    return session.exec(select(func.now())).one()
+
+
+class TherapistFeatureIndex:
+    """Versioned in-memory index of therapist match features"""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._snapshot: TherapistIndexSnapshot | None = None
+        self._version = 0
+        # Database time up to which the match vector writes are applied
+        self._synced_at: datetime | None = None
+        # Writes made while the database is read, replayed over what was read
+        self._reads_in_flight = 0
+        self._writes_during_read: list[tuple[TherapistFeatures, bool]] = []
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the index has been loaded from the database"""
+        return self._snapshot is not None
+
+    @property
+    def version(self) -> int:
+        """Version of the latest snapshot"""
+        return self._version
+
+    def snapshot(self) -> TherapistIndexSnapshot:
+        """Return the current snapshot. Raises if the index is not loaded."""
+        snapshot = self._snapshot
+
+        if snapshot is None:
+            raise RuntimeError("Therapist index has not been loaded")
+
+        return snapshot
+
+    def load(
+        self, features: list[TherapistFeatures], synced_at: datetime | None = None
+    ) -> TherapistIndexSnapshot:
+        """Replace the whole index with the given features"""
+        base = build_segment(features)
+
+        with self._lock:
+            return self._install(base, synced_at)
+
+    def load_snapshot(
+        self, base: TherapistIndexSegment, synced_at: datetime | None = None
+    ) -> TherapistIndexSnapshot:
+        """
+        Replace the whole index with a prebuilt base segment, such as a
+        memory-mapped export, holding the match vectors written before synced_at
+        """
+        with self._lock:
+            return self._install(base, synced_at)
+
+    def _install(
+        self, base: TherapistIndexSegment, synced_at: datetime | None
+    ) -> TherapistIndexSnapshot:
+        self._version += 1
+        self._snapshot = TherapistIndexSnapshot(version=self._version, base=base)
+        self._synced_at = synced_at
+        logger.info(
+            "Therapist index loaded with %s therapists at version %s",
+            len(base),
+            self._version,
+        )
+        return self._snapshot
+
+    def _begin_read(self) -> int:
+        with self._lock:
+            self._reads_in_flight += 1
+            return len(self._writes_during_read)
+
+    def _end_read(self, mark: int) -> list[tuple[TherapistFeatures, bool]]:
+        """Writes made since the read began. Must be called with the lock held."""
+        writes = self._writes_during_read[mark:]
+        self._reads_in_flight -= 1
+
+        if not self._reads_in_flight:
+            self._writes_during_read = []
+
+        return writes
+
+    def _load(self, session: Session, replace_loaded: bool) -> TherapistIndexSnapshot:
+        """
+        Read the whole index from the database and install it. A load that
+        started before a concurrent write replays the write over what it read,
+        so an older read never overwrites a newer update.
+        """
+        mark = self._begin_read()
+
+        try:
+            synced_at = _database_now(session)
+            base = build_segment(load_therapist_features(session))
+        except BaseException:
+            with self._lock:
+                self._end_read(mark)
+            raise
+
+        with self._lock:
+            writes = self._end_read(mark)
+
+            if replace_loaded or self._snapshot is None:
+                self._install(base, synced_at)
+
+                for features, keep_traits in writes:
+                    self._apply_write(features, keep_traits)
+
+            return self._snapshot
+
+    def rebuild(self, session: Session) -> TherapistIndexSnapshot:
+        """Rebuild the whole index from the database"""
+        return self._load(session, replace_loaded=True)
+
+    def ensure_loaded(self, session: Session) -> TherapistIndexSnapshot:
+        """Return the current snapshot, loading the index on first use"""
+        snapshot = self._snapshot
+
+        if snapshot is not None:
+            return snapshot
+
+        return self._load(session, replace_loaded=False)
+
+    def refresh(self, session: Session) -> TherapistIndexSnapshot:
+        """
+        Apply the match vectors written by every process since the last load or
+        refresh. An index that is not loaded, or was loaded without a sync
+        time, is read from the database in full.
+        """
+        snapshot, synced_at = self._snapshot, self._synced_at
+
+        if snapshot is None or synced_at is None:
+            return self.rebuild(session)
+
+        mark = self._begin_read()
+
+        try:
+            refreshed_at = _database_now(session)
+            vector_count = session.exec(
+                select(func.count()).select_from(TherapistMatchVector)
+            ).one()
+            changes = load_therapist_features(
+                session, changed_since=synced_at - REFRESH_OVERLAP
+            )
+            deleted = _find_deleted(session, snapshot, changes, vector_count)
+        except BaseException:
+            with self._lock:
+                self._end_read(mark)
+            raise
+
+        with self._lock:
+            writes = self._end_read(mark)
+
+            # A load or clear meanwhile replaced what the changes apply to
+            if self._snapshot is not None and self._synced_at == synced_at:
+                self._apply(changes, deleted)
+
+                for features, keep_traits in writes:
+                    self._apply_write(features, keep_traits)
+
+                self._synced_at = refreshed_at
+
+            snapshot = self._snapshot
+
+        return snapshot if snapshot is not None else self.ensure_loaded(session)
+
+    def _apply(
+        self, changes: list[TherapistFeatures], deleted: list[UUID] | None = None
+    ):
+        """
+        Swap in a snapshot with the given changes, bumping the version only if
+        a therapist actually changed. Must be called with the lock held.
+        """
+        snapshot = self._snapshot
+        changes = [
+            features
+            for features in map(_as_stored, changes)
+            if snapshot.features(features.therapist_id) != features
+        ]
+        deleted = [
+            therapist_id
+            for therapist_id in deleted or []
+            if snapshot.features(therapist_id) is not None
+        ]
+
+        if not changes and not deleted:
+            return
+
+        self._version += 1
+        self._snapshot = _with_changes(snapshot, self._version, changes, deleted)
+
+    def _apply_write(self, features: TherapistFeatures, keep_traits: bool):
+        if keep_traits:
+            existing = self._snapshot.features(features.therapist_id)
+            features = replace(features, traits=existing.traits if existing else None)
+
+        self._apply([features])
+
+    def upsert(self, features: TherapistFeatures, keep_traits: bool = False):
+        """
+        Apply the features of a single therapist.
+
+        With keep_traits the indexed trait scores of the therapist are preserved.
+        Updates are ignored until the index is loaded, since the load reads the
+        committed state from the database anyway.
+        """
+        with self._lock:
+            if self._reads_in_flight:
+                self._writes_during_read.append((features, keep_traits))
+
+            if self._snapshot is not None:
+                self._apply_write(features, keep_traits)
+
+    def upsert_therapist(self, therapist: Therapist, scores: Scores | None = None):
+        """
+        Push the current state of a therapist into the index.
+
+        The indexed trait scores are kept when no new scores are provided.
+        """
+        traits = (
+            tuple(float(getattr(scores, trait)) for trait in TRAIT_ORDER)
+            if scores is not None
+            else None
+        )
+
+        self.upsert(
+            features_from_therapist(therapist, traits), keep_traits=scores is None
+        )
+
+    def clear(self) -> None:
+        """Drop the loaded snapshot so the next read reloads from the database"""
+        with self._lock:
+            self._snapshot = None
+            self._synced_at = None
+
+
+therapist_index = TherapistFeatureIndex()
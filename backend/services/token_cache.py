@@ -0,0 +1,71 @@
+"""
+Cache of verified access tokens.
+
+The same bearer token and anonymous session cookie are sent with every
+request of a personality test, and each one was decoded and its HMAC
+signature verified again. A token that verified once keeps its claims until
+it expires, so the claims are kept under a digest of the token until its
+exp claim has passed. Tokens without an exp claim are never cached.
+"""
+
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+from time import time
+from backend.core.config import settings
+
+
+def _digest(token: str) -> bytes:
+    return sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache:
+    """Bounded LRU cache of the claims of verified tokens, kept until they expire"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, token: str) -> dict | None:
+        """The claims of a verified token, None when unknown or expired"""
+        key = _digest(token)
+
+        with self._lock:
+            payload = self._entries.get(key)
+
+            if payload is None:
+                return None
+
+            if payload["exp"] <= time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return payload
+
+    def set(self, token: str, payload: dict):
+        """Cache the claims of a token whose signature has been verified"""
+        if self.max_size <= 0 or not isinstance(payload.get("exp"), (int, float)):
+            return
+
+        key = _digest(token)
+
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+verified_token_cache = VerifiedTokenCache(max_size=settings.verified_token_cache_size)
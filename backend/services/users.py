@@ -2,10 +2,12 @@ from typing import TypeVar
 from uuid import UUID
 from datetime import datetime, timedelta, timezone
 import jwt
+from jwt.algorithms import HMACAlgorithm
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session, select, SQLModel
-from sqlalchemy.exc import SQLAlchemyError
-from passlib.context import CryptContext
+from sqlmodel import col, func, select, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import any_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from backend.models.user import Therapist, Patient, User, AnonymousPatient
 from backend.core.logging import get_logger
 from backend.core.config import settings
@@ -13,9 +15,18 @@ from backend.routers.users.user_types import UserOption
 from ..schemas.users import UserCreate, AnonymousSessionPatientBase, TherapistBase
 
 from .location_service import get_coordinates_from_postal_code
+from .match_vectors import update_match_vector_filters
+from .therapist_index import therapist_index
+from .token_cache import verified_token_cache
+from .passwords import (  # pylint: disable=unused-import
+    get_password_hash,
+    password_hasher,
+    verify_password,
+)
 from ..routers.users.exceptions import (
     PatientCreationError,
     UserCreationError,
+    UserAlreadyExistsError,
     TherapistUpdateError,
     PatientNotFoundError,
     InvalidPostalCodeError,
@@ -27,9 +38,10 @@ logger = get_logger(__name__)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 SECRET_KEY = settings.secret_key
+# The HMAC key is encoded once rather than on every encode and decode
+SIGNING_KEY = HMACAlgorithm(HMACAlgorithm.SHA256).prepare_key(SECRET_KEY)
 T = TypeVar("T", bound=SQLModel)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
@@ -53,9 +65,9 @@ class AnonymousSessionToken(SQLModel):
     user_id: str
 
 
-def create_user(user_data: UserCreate, session: Session) -> User:
+async def create_user(user_data: UserCreate, session: AsyncSession) -> User:
     """creates a user"""
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     user_type = user_data.user_type
     user = User(
         **{
@@ -66,28 +78,32 @@ def create_user(user_data: UserCreate, session: Session) -> User:
     )
     try:
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
+    except IntegrityError as e:
+        await session.rollback()
+        logger.warning("User already exists: %s", user_data.email_address)
+        raise UserAlreadyExistsError("User already exists") from e
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.exception("Failed to create new user")
         raise UserCreationError("Failed to create new user") from e
 
     return user
 
 
-def create_anonymous_patient_session(
-    anonymous_session_id: str, session: Session
+async def create_anonymous_patient_session(
+    anonymous_session_id: str, session: AsyncSession
 ) -> AnonymousPatient:
     """creates an anonymous patient session"""
     patient = AnonymousPatient(session_id=anonymous_session_id)
 
     try:
         session.add(patient)
-        session.commit()
-        session.refresh(patient)
+        await session.commit()
+        await session.refresh(patient)
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.exception("Failed to create anonymous patient")
         raise ValueError("Unable to create anonymous patient session") from e
 
@@ -100,8 +116,8 @@ def _get_is_therapist_profile_complete(profile: Therapist) -> bool:
     return None not in profile_dict.values()
 
 
-def patch_therapist_model(
-    therapist: Therapist, data: TherapistBase, session: Session
+async def patch_therapist_model(
+    therapist: Therapist, data: TherapistBase, session: AsyncSession
 ) -> Therapist:
     """patches a therapist model with new data and commits to the database"""
     if not therapist:
@@ -131,15 +147,18 @@ def patch_therapist_model(
 
     try:
         session.add(therapist)
-        session.commit()
-        session.refresh(therapist)
+        await session.exec(update_match_vector_filters(therapist))
+        await session.commit()
+        await session.refresh(therapist)
     except SQLAlchemyError as e:
-        session.rollback()
+        await session.rollback()
         logger.exception("Failed to update therapist")
         raise TherapistUpdateError(
             "An internal database error prevented the update."
         ) from e
 
+    therapist_index.upsert_therapist(therapist)
+
     return therapist
 
 
@@ -162,10 +181,10 @@ def _get_coordinates(postal_code: str | None) -> dict[str, float]:
     return location
 
 
-def patch_anonymous_patient_session(
+async def patch_anonymous_patient_session(
     patient: AnonymousPatient,
     data: AnonymousSessionPatientBase,
-    session: Session,
+    session: AsyncSession,
 ):
     """updates an anonymous patient session via session id and patch data"""
 
@@ -185,26 +204,26 @@ def patch_anonymous_patient_session(
 
     logger.info("Committing changes to the DB")
 
-    committed_patient_to_db = commit_to_db(session, patient)
+    committed_patient_to_db = await commit_to_db(session, patient)
 
     return committed_patient_to_db
 
 
-def commit_to_db(session: Session, obj: T) -> T:
+async def commit_to_db(session: AsyncSession, obj: T) -> T:
     """Commits an object to the database and refreshes the instance."""
     try:
         session.add(obj)
-        session.commit()
-        session.refresh(obj)
+        await session.commit()
+        await session.refresh(obj)
         return obj
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         entity_name = type(obj).__name__
         logger.exception("Failed to commit %s to the database", entity_name)
         raise ValueError(f"Cannot commit {entity_name} to the database") from e
 
 
-def update_user_roles(user: User, role: UserOption, session: Session):
+async def update_user_roles(user: User, role: UserOption, session: AsyncSession):
     """updates user roles"""
 
     if not user or not role:
@@ -217,13 +236,13 @@ def update_user_roles(user: User, role: UserOption, session: Session):
     user_roles.append(role.value)
     user.roles = user_roles
 
-    updated_user = commit_to_db(session, user)
+    updated_user = await commit_to_db(session, user)
 
     return updated_user
 
 
-def create_therapist(
-    user_data: UserCreate, user_id: UUID | None, session: Session
+async def create_therapist(
+    user_data: UserCreate, user_id: UUID | None, session: AsyncSession
 ) -> Therapist:
     """creates a therapist"""
     if not user_id:
@@ -231,44 +250,57 @@ def create_therapist(
 
     therapist = Therapist(**{**user_data.model_dump(), "user_id": user_id})
 
-    therapist = commit_to_db(session, therapist)
+    therapist = await commit_to_db(session, therapist)
     return therapist
 
 
-def get_user_by_email(email_address: str | None, session: Session) -> User | None:
-    """Retrieve a user by email."""
+def _email_matches(email_address: str):
+    """Case insensitive email condition, served by ix_users_email_address_lower"""
+    return func.lower(User.email_address) == email_address.lower()
+
+
+async def get_user_by_email(
+    email_address: str | None, session: AsyncSession
+) -> User | None:
+    """Retrieve a user by email, ignoring case."""
 
     if not email_address:
         return None
-    user = session.exec(select(User).where(User.email_address == email_address)).first()
+    user = (
+        await session.exec(select(User).where(_email_matches(email_address)))
+    ).first()
     return user
 
 
-def get_user_by_id(user_id: UUID | None, session: Session) -> User | None:
+async def get_user_by_id(user_id: UUID | None, session: AsyncSession) -> User | None:
     """Retrieve a user by ID."""
 
     if not user_id:
         return None
-    user = session.exec(select(User).where(User.id == user_id)).first()
+    user = (await session.exec(select(User).where(User.id == user_id))).first()
     return user
 
 
-def get_user_by_email_and_type(
-    email_address: str | None, user_type: str | None, session: Session
+async def get_user_by_email_and_type(
+    email_address: str | None, user_type: str | None, session: AsyncSession
 ) -> User | None:
     """Retrieve a user by email if they have the specified role."""
 
     if not email_address or not user_type:
         return None
-    user = session.exec(select(User).where(User.email_address == email_address)).first()
-
-    if user and user_type in user.roles:
-        return user
-
-    return None
+    user = (
+        await session.exec(
+            select(User).where(
+                _email_matches(email_address), user_type == any_(col(User.roles))
+            )
+        )
+    ).first()
+    return user
 
 
-def create_patient(user_data: AnonymousPatient, user_id, session: Session) -> Patient:
+async def create_patient(
+    user_data: AnonymousPatient, user_id, session: AsyncSession
+) -> Patient:
     """creates a patient"""
 
     if not user_data.personality_test:
@@ -287,29 +319,16 @@ def create_patient(user_data: AnonymousPatient, user_id, session: Session) -> Pa
         )
 
         session.add(patient)
-        session.commit()
-        session.refresh(patient)
+        await session.commit()
+        await session.refresh(patient)
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.exception("Failed to create patient")
         raise PatientCreationError("Cannot create a patient") from e
 
     return patient
 
 
-def verify_password(plain_password, hashed_password):
-    """verify inputted user password to hashed password"""
-    try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception as e:
-        raise e
-
-
-def get_password_hash(password):
-    """hash user password"""
-    return pwd_context.hash(password)
-
-
 def get_user(db, email_address: str):
     """get user from db"""
     try:
@@ -320,16 +339,16 @@ def get_user(db, email_address: str):
         raise e
 
 
-def authenticate_user(session, email_address: str, password: str):
+async def authenticate_user(session: AsyncSession, email_address: str, password: str):
     """Authenticate user"""
 
-    user = get_user_by_email(email_address, session)
+    user = await get_user_by_email(email_address, session)
 
     if not user:
         logger.warning("Unable to find user to authenticate")
         raise ValueError("Could not retrieve user.")
 
-    if not verify_password(password, user.password):
+    if not await password_hasher.verify(password, user.password):
         logger.warning("Authentication failed for user_id: %s", user.id)
         raise ValueError("Invalid email or password.")
 
@@ -346,6 +365,20 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
 
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SIGNING_KEY, algorithm=ALGORITHM)
 
     return encoded_jwt
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify an access token and return its claims. A token is only verified
+    again once it has dropped out of the verified token cache.
+    """
+    payload = verified_token_cache.get(token)
+
+    if payload is None:
+        payload = jwt.decode(token, SIGNING_KEY, algorithms=[ALGORITHM])
+        verified_token_cache.set(token, payload)
+
+    return dict(payload)
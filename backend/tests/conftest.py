@@ -1,11 +1,24 @@
+# pylint: disable=wrong-import-position
+import os
+
+# The statement budget tests read the X-Query-Count header of every response
+os.environ.setdefault("QUERY_COUNT_HEADER", "true")
+
 from unittest.mock import MagicMock
 import pytest
 from sqlmodel import create_engine, Session, SQLModel
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.testclient import TestClient
 from sqlalchemy.exc import ProgrammingError
-from backend.core.database import get_session
+from backend.core.database import get_session, get_async_session
 from backend.main import app
+from backend.services.therapist_index import therapist_index
+from backend.services.identity_cache import identity_cache
+from backend.services.token_cache import verified_token_cache
+from backend.services.location_service import geocoder
 from backend.tests.test_utils import USER_ID
 
 # Test database configuration
@@ -62,6 +75,31 @@ def session_fixture():
     engine.dispose()
 
 
+@pytest.fixture(autouse=True)
+def reset_therapist_index():
+    """Drop the process-wide therapist index between tests"""
+    therapist_index.clear()
+    yield
+    therapist_index.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_identity_caches():
+    """Drop the profiles and tokens cached by a test"""
+    identity_cache.clear()
+    verified_token_cache.clear()
+    yield
+    identity_cache.clear()
+    verified_token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_geocoder():
+    """Unload the postal code table loaded by a test"""
+    yield
+    geocoder.clear()
+
+
 @pytest.fixture
 def mock_jwt_decode(monkeypatch):
     """Patch jwt.decode to always return a fixed payload."""
@@ -87,10 +125,35 @@ def mock_auth_headers(mock_jwt_decode):
 
 
 @pytest.fixture(scope="function")
-def client_fixture(session_fixture: Session):
+def async_engine_fixture(session_fixture: Session):
+    """
+    Async engine on the test database. Connections are not pooled since the
+    test client runs every request on a new event loop.
+    """
+    async_engine = create_async_engine(
+        f"postgresql+asyncpg://{TEST_DB_CONFIG['user']}:{TEST_DB_CONFIG['password']}"
+        f"@{TEST_DB_CONFIG['host']}:{TEST_DB_CONFIG['port']}/{TEST_DB_CONFIG['database']}",
+        poolclass=NullPool,
+    )
+    yield async_engine
+    async_engine.sync_engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def client_fixture(session_fixture: Session, async_engine_fixture):
     """Pass the client to the test routes"""
+
+    async def get_test_async_session():
+        async with AsyncSession(
+            async_engine_fixture, expire_on_commit=False
+        ) as async_session:
+            yield async_session
+
     app.dependency_overrides[get_session] = lambda: session_fixture
+    app.dependency_overrides[get_async_session] = get_test_async_session
 
     client = TestClient(app)
+    # The routes write on their own connection, reload test objects afterwards
+    client.event_hooks["response"].append(lambda _: session_fixture.expire_all())
     yield client
     app.dependency_overrides.clear()
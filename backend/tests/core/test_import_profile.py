@@ -0,0 +1,62 @@
+import subprocess
+import sys
+import pytest
+from backend.core.import_profile import (
+    PROJECT_ROOT,
+    get_package_import_times,
+    parse_import_times,
+    profile_imports,
+)
+
+IMPORT_TIME_REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     numpy.version
+import time:      1500 |       1620 |   numpy
+import time:       300 |       1920 | backend.services.scores
+"""
+
+
+def test_parse_import_times():
+    timings = parse_import_times(IMPORT_TIME_REPORT.splitlines())
+
+    assert [timing.module for timing in timings] == [
+        "numpy.version",
+        "numpy",
+        "backend.services.scores",
+    ]
+    assert [timing.depth for timing in timings] == [2, 1, 0]
+    assert timings[1].self_seconds == 0.0015
+    assert timings[2].cumulative_seconds == 0.00192
+
+
+def test_get_package_import_times_totals_self_time():
+    package_times = get_package_import_times(
+        parse_import_times(IMPORT_TIME_REPORT.splitlines())
+    )
+
+    assert list(package_times) == ["numpy", "backend"]
+    assert package_times["numpy"] == pytest.approx(0.00162)
+
+
+def test_profile_imports_reports_imported_module():
+    timings = profile_imports("backend.core.import_profile")
+
+    assert "backend.core.import_profile" in [timing.module for timing in timings]
+
+
+def test_api_boot_does_not_import_migration_or_geocoding_dependencies():
+    lazy_modules = ("alembic", "pgeocode", "pandas", "passlib")
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, backend.main; "
+            f"print(*[m for m in {lazy_modules!r} if m in sys.modules])",
+        ],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == ""
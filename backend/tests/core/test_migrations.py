@@ -0,0 +1,48 @@
+import pytest
+from alembic import command
+from sqlalchemy import text
+from backend.core.migrations import (
+    MIGRATION_LOCK_KEY,
+    SchemaRevisionError,
+    check_schema_revision,
+    get_alembic_config,
+    get_current_revisions,
+    get_head_revisions,
+    run_migrations,
+)
+
+
+@pytest.fixture
+def test_engine(session_fixture):
+    return session_fixture.get_bind()
+
+
+def stamp_head(engine):
+    with engine.begin() as connection:
+        command.stamp(get_alembic_config(connection), "heads")
+
+
+def test_check_schema_revision_rejects_unstamped_database(test_engine):
+    with pytest.raises(SchemaRevisionError, match="python -m backend.cli migrate"):
+        check_schema_revision(test_engine)
+
+
+def test_check_schema_revision_accepts_database_at_head(test_engine):
+    stamp_head(test_engine)
+
+    check_schema_revision(test_engine)
+
+
+def test_run_migrations_at_head_releases_lock(test_engine):
+    stamp_head(test_engine)
+
+    run_migrations(test_engine)
+
+    with test_engine.connect() as connection:
+        assert get_current_revisions(connection) == get_head_revisions()
+        assert connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+        ).scalar()
+        connection.execute(
+            text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY}
+        )
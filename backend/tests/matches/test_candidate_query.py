@@ -0,0 +1,129 @@
+from uuid import uuid4
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from backend.routers.users.user_types import TherapistTypeOption
+from backend.services.matching import select_candidate_therapists
+from backend.tests.test_utils import add_test_therapist, add_test_user
+
+
+# A pool of therapists shaped like production: most profiles are complete,
+# each therapist lists two of 40 specializations, 10% specialize in LGBTQ
+# clients and 5% in religious clients
+SEED_THERAPISTS = """
+INSERT INTO therapists (id, specializations, is_profile_complete,
+    is_lgbtq_specialization, is_religious_specialization, therapist_type)
+SELECT
+    gen_random_uuid(),
+    ARRAY['need' || (n % 40), 'need' || ((n / 40) % 40)],
+    n % 10 < 8,
+    n % 10 = 3,
+    n % 20 = 5,
+    (ARRAY['PSYCHOLOGIST', 'PSYCHOTHERAPIST', 'SOCIAL_WORKER',
+        'REGISTERED_PRACTITIONER'])[1 + (n / 7) % 4]::therapisttypeoption
+FROM generate_series(1, 20000) AS n
+"""
+
+
+@pytest.fixture
+def therapist_pool(session_fixture):
+    """A production sized therapist pool with fresh planner statistics"""
+    session_fixture.exec(text(SEED_THERAPISTS))
+    session_fixture.commit()
+
+    with session_fixture.get_bind().connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(
+            text("VACUUM ANALYZE therapists")
+        )
+
+    return session_fixture
+
+
+def _explain_index_names(session, statement) -> set[str]:
+    """Indexes used by the plan of a statement"""
+    sql = statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    plan = session.exec(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+
+    def index_names(node):
+        names = {node["Index Name"]} if "Index Name" in node else set()
+
+        for child in node.get("Plans", []):
+            names |= index_names(child)
+
+        return names
+
+    return index_names(plan[0]["Plan"])
+
+
+def _add_therapist(session_fixture, **overrides):
+    user = add_test_user(
+        session_fixture, {"id": uuid4(), "email_address": f"{uuid4().hex[:8]}@b.com"}
+    )
+
+    return add_test_therapist(session_fixture, {"user_id": user.id, **overrides})
+
+
+@pytest.mark.parametrize(
+    "filters, index_names",
+    [
+        # 80% of the profiles are complete, a scan beats any index
+        ({}, set()),
+        ({"therapy_needs": ["need7"]}, {"ix_therapists_specializations"}),
+        (
+            {"is_lgbtq_specialization": True},
+            {"ix_therapists_profile_complete_filters"},
+        ),
+        (
+            {"is_lgbtq_specialization": True, "is_religious_specialization": True},
+            {"ix_therapists_profile_complete_filters"},
+        ),
+        (
+            {
+                "is_lgbtq_specialization": True,
+                "therapist_type": TherapistTypeOption.PSYCHOLOGIST,
+            },
+            {"ix_therapists_profile_complete_filters"},
+        ),
+    ],
+)
+def test_candidate_query_uses_therapist_indexes(therapist_pool, filters, index_names):
+    statement = select_candidate_therapists(**filters)
+
+    assert _explain_index_names(therapist_pool, statement) == index_names
+
+
+def test_candidate_query_applies_patient_filters(session_fixture):
+    matching = _add_therapist(
+        session_fixture,
+        is_profile_complete=True,
+        specializations=["anxiety", "grief"],
+        is_lgbtq_specialization=True,
+    )
+    _add_therapist(
+        session_fixture,
+        is_profile_complete=False,
+        specializations=["anxiety"],
+        is_lgbtq_specialization=True,
+    )
+    _add_therapist(
+        session_fixture,
+        is_profile_complete=True,
+        specializations=["depression"],
+        is_lgbtq_specialization=True,
+    )
+    _add_therapist(
+        session_fixture,
+        is_profile_complete=True,
+        specializations=["anxiety"],
+        is_lgbtq_specialization=False,
+    )
+
+    therapist_ids = session_fixture.exec(
+        select_candidate_therapists(
+            therapy_needs=["anxiety", "stress"], is_lgbtq_specialization=True
+        )
+    ).all()
+
+    assert therapist_ids == [matching.id]
@@ -0,0 +1,88 @@
+import math
+import numpy as np
+import pytest
+from backend.services.distance import (
+    bounding_box_spans,
+    haversine_km,
+    pairwise_haversine_km,
+)
+
+TORONTO = (43.6532, -79.3832)
+OTTAWA = (45.4215, -75.6972)
+VANCOUVER = (49.2827, -123.1207)
+TORONTO_TO_OTTAWA_KM = 351.8
+
+
+def _reference_km(lat1, lon1, lat2, lon2):
+    """scalar haversine used to check the vectorized kernels"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+
+def test_haversine_km_one_to_many():
+    """distances from one point are float32 kilometres"""
+    distances = haversine_km(
+        *TORONTO,
+        np.array([TORONTO[0], OTTAWA[0], np.nan]),
+        np.array([TORONTO[1], OTTAWA[1], np.nan]),
+    )
+
+    assert distances.dtype == np.float32
+    assert distances[0] == 0
+    assert distances[1] == pytest.approx(TORONTO_TO_OTTAWA_KM, abs=0.5)
+    assert np.isnan(distances[2])
+
+
+def test_haversine_km_max_km_skips_points_outside_the_box():
+    """points outside the bounding box are inf, the others keep exact distances"""
+    latitudes = np.array([OTTAWA[0], VANCOUVER[0], np.nan])
+    longitudes = np.array([OTTAWA[1], VANCOUVER[1], np.nan])
+
+    distances = haversine_km(*TORONTO, latitudes, longitudes, max_km=500)
+
+    assert distances[0] == pytest.approx(TORONTO_TO_OTTAWA_KM, abs=0.5)
+    assert np.isinf(distances[1])
+    assert np.isinf(distances[2])
+
+
+def test_bounding_box_contains_the_whole_circle():
+    """every point of the circle lies inside its bounding box"""
+    rng = np.random.default_rng(3)
+
+    for latitude, radius_km in [(0.0, 100), (60.0, 1000), (-75.0, 300), (89.5, 80)]:
+        lat_span, lon_span = bounding_box_spans(latitude, radius_km)
+        latitudes = rng.uniform(-90, 90, 20000)
+        longitudes = rng.uniform(-180, 180, 20000)
+        inside = haversine_km(latitude, 0.0, latitudes, longitudes) <= radius_km
+
+        assert np.all(np.abs(latitudes[inside] - latitude) <= lat_span)
+        assert np.all(np.abs(longitudes[inside]) <= lon_span)
+
+
+def test_pairwise_haversine_km():
+    """the many-to-many kernel matches the scalar formula"""
+    points_a = np.array([TORONTO, OTTAWA])
+    points_b = np.array([OTTAWA, VANCOUVER, (0.0, 179.9)])
+
+    distances = pairwise_haversine_km(
+        points_a[:, 0], points_a[:, 1], points_b[:, 0], points_b[:, 1]
+    )
+    limited = pairwise_haversine_km(
+        points_a[:, 0], points_a[:, 1], points_b[:, 0], points_b[:, 1], max_km=500
+    )
+
+    assert distances.shape == (2, 3)
+
+    for row, point_a in enumerate(points_a):
+        for column, point_b in enumerate(points_b):
+            assert distances[row, column] == pytest.approx(
+                _reference_km(*point_a, *point_b), rel=1e-5
+            )
+
+    assert limited[0, 0] == pytest.approx(distances[0, 0])
+    assert limited[1, 0] == 0
+    assert np.isinf(limited[:, 1:]).all()
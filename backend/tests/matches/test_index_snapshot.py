@@ -0,0 +1,157 @@
+from dataclasses import replace
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+import numpy as np
+import pytest
+from backend.routers.matches.exceptions import IndexSnapshotFormatError
+from backend.schemas.scores import Scores
+from backend.services.index_snapshot import (
+    export_index_snapshot,
+    read_index_snapshot,
+    warm_start_therapist_index,
+    write_index_snapshot,
+)
+from backend.services.match_vectors import upsert_match_vector
+from backend.services.therapist_index import (
+    TherapistFeatureIndex,
+    TherapistFeatures,
+    build_segment,
+)
+from backend.tests.test_utils import (
+    add_test_user,
+    add_test_therapist,
+    add_therapist_personality_test_score,
+)
+
+EXPORTED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+THERAPIST_SCORES = Scores(
+    extroversion=2.0,
+    conscientiousness=3.0,
+    openness=3.5,
+    neuroticism=1.5,
+    agreeableness=3.0,
+)
+
+
+def _features(therapist_id: UUID, **overrides) -> TherapistFeatures:
+    return TherapistFeatures(
+        **{
+            "therapist_id": therapist_id,
+            "traits": (1.0, 2.0, 3.0, 4.0, 0.5),
+            "latitude": 43.6555,
+            "longitude": -79.3626,
+            "specializations": frozenset(["anxiety"]),
+            "is_lgbtq_specialization": False,
+            "is_religious_specialization": False,
+            "therapist_type": "psychologist",
+            "is_profile_complete": True,
+            **overrides,
+        }
+    )
+
+
+def _add_scored_therapist(session_fixture, scores: Scores):
+    user = add_test_user(
+        session_fixture,
+        {"id": uuid4(), "email_address": f"{uuid4().hex[:8]}@b.com"},
+    )
+    therapist = add_test_therapist(
+        session_fixture, {"user_id": user.id, "is_profile_complete": True}
+    )
+
+    return add_therapist_personality_test_score(therapist, scores, session_fixture)
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    """every feature survives the export and the traits stay memory-mapped"""
+    features = [
+        _features(UUID(int=1)),
+        _features(
+            UUID(int=2),
+            traits=None,
+            latitude=None,
+            longitude=None,
+            specializations=frozenset(["grief", "stress"]),
+            is_lgbtq_specialization=True,
+            therapist_type=None,
+            is_profile_complete=False,
+        ),
+        _features(
+            UUID(int=3), is_religious_specialization=True, specializations=frozenset()
+        ),
+    ]
+    path = str(tmp_path / "therapist-index.idx")
+
+    exported = build_segment(features)
+
+    write_index_snapshot(exported, path, EXPORTED_AT)
+    stored = read_index_snapshot(path)
+
+    assert stored.exported_at == EXPORTED_AT
+    assert isinstance(stored.segment.traits.base, np.memmap)
+    assert [stored.segment.features(row.therapist_id) for row in features] == [
+        exported.features(row.therapist_id) for row in features
+    ]
+    assert stored.segment.matchable_rows.tolist() == [0, 2]
+
+
+def test_empty_snapshot_file_round_trip(tmp_path):
+    path = str(tmp_path / "therapist-index.idx")
+
+    write_index_snapshot(build_segment([]), path, EXPORTED_AT)
+
+    assert len(read_index_snapshot(path).segment) == 0
+
+
+def test_read_rejects_other_files(tmp_path):
+    path = tmp_path / "therapist-index.idx"
+    path.write_bytes(b"not a snapshot at all")
+
+    with pytest.raises(IndexSnapshotFormatError):
+        read_index_snapshot(str(path))
+
+
+def test_load_snapshot_keeps_the_mapped_arrays(tmp_path):
+    path = str(tmp_path / "therapist-index.idx")
+    write_index_snapshot(build_segment([_features(UUID(int=1))]), path, EXPORTED_AT)
+    stored = read_index_snapshot(path)
+
+    snapshot = TherapistFeatureIndex().load_snapshot(stored.segment)
+
+    assert snapshot.base is stored.segment
+
+
+def test_warm_start_applies_the_changes_since_the_export(session_fixture, tmp_path):
+    """
+    therapists scored after the export are loaded from the database and the
+    deleted ones are dropped, while the mapped arrays stay the base
+    """
+    rescored = _add_scored_therapist(session_fixture, THERAPIST_SCORES)
+    unchanged = _add_scored_therapist(session_fixture, THERAPIST_SCORES)
+    deleted = _add_scored_therapist(session_fixture, THERAPIST_SCORES)
+    path = str(tmp_path / "therapist-index.idx")
+
+    export_index_snapshot(session_fixture, path)
+    session_fixture.commit()
+
+    session_fixture.exec(
+        upsert_match_vector(rescored, replace(THERAPIST_SCORES, openness=1.0))
+    )
+    session_fixture.delete(deleted)
+    session_fixture.commit()
+    added = _add_scored_therapist(session_fixture, THERAPIST_SCORES)
+
+    index = TherapistFeatureIndex()
+    snapshot = warm_start_therapist_index(session_fixture, path, index)
+
+    assert index.snapshot() is snapshot
+    assert isinstance(snapshot.base.traits.base, np.memmap)
+    assert set(snapshot.therapist_ids) == {rescored.id, unchanged.id, added.id}
+    assert snapshot.features(deleted.id) is None
+    assert snapshot.features(rescored.id).traits == (2.0, 3.0, 1.0, 1.5, 3.0)
+    assert snapshot.features(added.id).traits == (2.0, 3.0, 3.5, 1.5, 3.0)
+    assert set(snapshot.trait_matrix().therapist_ids) == {
+        rescored.id,
+        unchanged.id,
+        added.id,
+    }
@@ -0,0 +1,103 @@
+from dataclasses import replace
+import pytest
+from sqlmodel import select
+from backend.models.match import TherapistMatchVector
+from backend.routers.users.user_types import UserOption
+from backend.schemas.scores import Scores
+from backend.services.match_vectors import upsert_match_vector
+from backend.services.rescoring import rescore_personality_tests
+from backend.services.scores import format_personality_test
+from backend.services.therapist_index import therapist_index
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER
+from backend.tests.test_utils import (
+    MOCK_PERSONALITY_TEST,
+    add_test_user,
+    add_test_therapist,
+    add_therapist_personality_test,
+    add_therapist_personality_test_score,
+)
+
+THERAPIST_SCORES = Scores(
+    extroversion=2.0,
+    conscientiousness=3.0,
+    openness=3.5,
+    neuroticism=1.5,
+    agreeableness=3.0,
+)
+
+
+def _get_match_vector(session_fixture, therapist_id) -> TherapistMatchVector:
+    session_fixture.expire_all()
+
+    return session_fixture.exec(
+        select(TherapistMatchVector).where(
+            TherapistMatchVector.therapist_id == therapist_id
+        )
+    ).one()
+
+
+def test_upsert_match_vector_replaces_the_traits(session_fixture):
+    """scoring a therapist again overwrites its vector in trait order"""
+    add_test_user(session_fixture)
+    therapist = add_test_therapist(session_fixture, {"is_profile_complete": True})
+    add_therapist_personality_test_score(therapist, THERAPIST_SCORES, session_fixture)
+
+    rescored = replace(THERAPIST_SCORES, openness=1.25)
+    session_fixture.exec(upsert_match_vector(therapist, rescored))
+    session_fixture.commit()
+
+    match_vector = _get_match_vector(session_fixture, therapist.id)
+
+    assert match_vector.traits == [2.0, 3.0, 1.25, 1.5, 3.0]
+    assert match_vector.is_profile_complete is True
+    assert match_vector.specializations == therapist.specializations
+
+
+def test_patch_therapist_profile_updates_match_vector_filters(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """the filter columns follow the therapist profile"""
+    add_test_user(session_fixture, {"roles": [UserOption.THERAPIST.value]})
+    therapist = add_test_therapist(session_fixture)
+    add_therapist_personality_test_score(therapist, THERAPIST_SCORES, session_fixture)
+
+    response = client_fixture.patch(
+        "/therapists/me",
+        headers=mock_auth_headers,
+        json={"is_lgbtq_specialization": True, "specializations": ["grief"]},
+    )
+
+    assert response.status_code == 200
+
+    match_vector = _get_match_vector(session_fixture, therapist.id)
+
+    assert match_vector.is_lgbtq_specialization is True
+    assert match_vector.specializations == ["grief"]
+    assert match_vector.traits == [2.0, 3.0, 3.5, 1.5, 3.0]
+
+
+def test_rescoring_updates_match_vectors(session_fixture):
+    """rescored traits are written to the match vectors in the same chunk"""
+    add_test_user(session_fixture)
+    therapist = add_test_therapist(session_fixture)
+    personality_test = add_therapist_personality_test(
+        session_fixture, {"therapist_id": therapist.id, **MOCK_PERSONALITY_TEST}
+    )
+    add_therapist_personality_test_score(therapist, THERAPIST_SCORES, session_fixture)
+    scored_at = _get_match_vector(session_fixture, therapist.id).updated_at
+    therapist_index.ensure_loaded(session_fixture)
+
+    rescore_personality_tests(session_fixture)
+
+    expected = format_personality_test(personality_test)
+    match_vector = _get_match_vector(session_fixture, therapist.id)
+
+    assert match_vector.traits == pytest.approx(
+        [float(getattr(expected, trait)) for trait in PERSONALITY_TRAIT_ORDER],
+        abs=1e-3,
+    )
+    # other workers pick the rescored traits up on their next index refresh
+    assert match_vector.updated_at > scored_at
+    assert therapist_index.snapshot().features(therapist.id).traits == pytest.approx(
+        match_vector.traits
+    )
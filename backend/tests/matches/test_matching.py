@@ -0,0 +1,112 @@
+from uuid import UUID, uuid4
+import numpy as np
+from backend.schemas.matches import TherapistTraitMatrix
+from backend.schemas.scores import Scores
+from backend.services.matching import (
+    rank_therapists,
+    get_top_therapist_matches,
+    top_k_indices,
+)
+from backend.services.therapist_index import therapist_index
+from backend.tests.test_utils import (
+    add_test_user,
+    add_test_therapist,
+    add_therapist_personality_test_score,
+)
+
+PATIENT_SCORES = Scores(
+    extroversion=2.0,
+    conscientiousness=3.0,
+    openness=3.5,
+    neuroticism=1.5,
+    agreeableness=3.0,
+)
+
+
+def _add_scored_therapist(session_fixture, scores: Scores, mock_overrides=None):
+    """add a therapist with a user and a calculated personality test score"""
+    user = add_test_user(
+        session_fixture,
+        {"id": uuid4(), "email_address": f"{uuid4().hex[:8]}@b.com"},
+    )
+    therapist = add_test_therapist(
+        session_fixture,
+        {"user_id": user.id, "is_profile_complete": True, **(mock_overrides or {})},
+    )
+
+    return add_therapist_personality_test_score(therapist, scores, session_fixture)
+
+
+def test_top_k_indices_returns_descending_order():
+    """top k indices are ordered from the highest to the lowest score"""
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3], dtype=np.float32)
+
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 4, 0]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_rank_therapists_empty_pool():
+    """an empty trait matrix returns no matches"""
+    trait_matrix = TherapistTraitMatrix(
+        therapist_ids=[], traits=np.empty((0, 5), dtype=np.float32)
+    )
+
+    assert not rank_therapists(PATIENT_SCORES, trait_matrix)
+
+
+def test_rank_therapists_orders_by_similarity():
+    """the closest trait vector is ranked first"""
+    ids = [UUID(int=1), UUID(int=2), UUID(int=3)]
+    trait_matrix = TherapistTraitMatrix(
+        therapist_ids=ids,
+        traits=np.array(
+            [
+                [0.0, 0.0, 0.0, 0.0, 0.0],
+                [2.0, 3.0, 3.5, 1.5, 3.0],
+                [2.5, 3.0, 3.5, 1.5, 3.0],
+            ],
+            dtype=np.float32,
+        ),
+    )
+
+    matches = rank_therapists(PATIENT_SCORES, trait_matrix, limit=2)
+
+    assert [match.therapist_id for match in matches] == [ids[1], ids[2]]
+    assert [match.rank for match in matches] == [1, 2]
+    assert matches[0].score == 1.0
+    assert matches[1].score < matches[0].score
+
+
+def test_index_trait_matrix_skips_incomplete_profiles(session_fixture):
+    """only therapists with a completed profile and a score are ranked"""
+    complete = _add_scored_therapist(session_fixture, PATIENT_SCORES)
+    _add_scored_therapist(
+        session_fixture, PATIENT_SCORES, {"is_profile_complete": False}
+    )
+
+    trait_matrix = therapist_index.ensure_loaded(session_fixture).trait_matrix()
+
+    assert trait_matrix.therapist_ids == [complete.id]
+    assert trait_matrix.traits.dtype == np.float32
+    assert trait_matrix.traits.flags["C_CONTIGUOUS"]
+    assert trait_matrix.traits.tolist() == [[2.0, 3.0, 3.5, 1.5, 3.0]]
+
+
+def test_get_top_therapist_matches(session_fixture):
+    """the best matching therapist is returned first"""
+    far = _add_scored_therapist(
+        session_fixture,
+        Scores(
+            extroversion=4.0,
+            conscientiousness=0.5,
+            openness=1.0,
+            neuroticism=4.0,
+            agreeableness=0.5,
+        ),
+    )
+    close = _add_scored_therapist(session_fixture, PATIENT_SCORES)
+
+    matches = get_top_therapist_matches(PATIENT_SCORES, session_fixture, limit=5)
+
+    assert [match.therapist_id for match in matches] == [close.id, far.id]
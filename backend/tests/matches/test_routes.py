@@ -0,0 +1,470 @@
+from uuid import uuid4
+import pytest
+from sqlmodel import select
+from backend.core.query_counter import QUERY_COUNT_HEADER
+from backend.models.match import Match
+from backend.models.user import User
+from backend.routers.users.user_types import UserOption
+from backend.schemas.scores import Scores
+from backend.services import matching
+from backend.services.token_cache import verified_token_cache
+from backend.services.therapist_index import therapist_index
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER
+from backend.tests.test_utils import (
+    add_anonymous_patient,
+    add_anonymous_personality_test_score,
+    add_test_patient,
+    add_test_user,
+    add_test_therapist,
+    add_therapist_personality_test_score,
+    MOCK_PERSONALITY_TEST,
+)
+
+MOCK_EXTROVERSION_SCORE = 1.4
+
+
+def _add_scored_therapist(session_fixture, extroversion: float, mock_overrides=None):
+    """add a therapist with a completed profile and personality test score"""
+    user = add_test_user(
+        session_fixture,
+        {"id": uuid4(), "email_address": f"{uuid4().hex[:8]}@b.com"},
+    )
+    therapist = add_test_therapist(
+        session_fixture,
+        {"user_id": user.id, "is_profile_complete": True, **(mock_overrides or {})},
+    )
+
+    return add_therapist_personality_test_score(
+        therapist,
+        Scores(
+            extroversion=extroversion,
+            conscientiousness=1.0,
+            openness=1.0,
+            neuroticism=1.0,
+            agreeableness=1.0,
+        ),
+        session_fixture,
+    )
+
+
+def _add_anonymous_patient_with_test(
+    session_fixture, answers: dict, mock_overrides=None
+):
+    patient = add_anonymous_patient(session_fixture, mock_overrides)
+    add_anonymous_personality_test_score(
+        session_fixture, {"anonymous_patient_id": patient.id, **answers}
+    )
+
+    return patient
+
+
+def test_get_matches_without_personality_test(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """An anonymous patient without a personality test has no matches"""
+    add_anonymous_patient(session_fixture)
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches", headers=mock_auth_headers
+    )
+
+    assert response.status_code == 404
+    assert response.json() == {
+        "detail": "Personality test not found on the anonymous patient"
+    }
+
+
+def test_get_matches_without_completed_category(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """A personality test without a completed category cannot be matched"""
+    _add_anonymous_patient_with_test(
+        session_fixture,
+        {"extroversion": MOCK_PERSONALITY_TEST["extroversion"][:9]},
+    )
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches", headers=mock_auth_headers
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "At least one personality test category must be completed"
+    }
+
+
+def test_get_matches_for_partial_test_is_paginated(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """Matches of a partial test are ranked on completed categories page by page"""
+    _add_anonymous_patient_with_test(
+        session_fixture, {"extroversion": MOCK_PERSONALITY_TEST["extroversion"]}
+    )
+
+    farthest = _add_scored_therapist(session_fixture, MOCK_EXTROVERSION_SCORE + 2)
+    closest = _add_scored_therapist(session_fixture, MOCK_EXTROVERSION_SCORE)
+    middle = _add_scored_therapist(session_fixture, MOCK_EXTROVERSION_SCORE + 1)
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches",
+        params={"limit": 2},
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 200
+    first_page = response.json()
+
+    assert [match["therapist_id"] for match in first_page["matches"]] == [
+        str(closest.id),
+        str(middle.id),
+    ]
+    assert [match["rank"] for match in first_page["matches"]] == [1, 2]
+    assert first_page["matches"][0]["score"] == 1.0
+    assert first_page["next_cursor"] is not None
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches",
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 200
+    second_page = response.json()
+
+    assert [match["therapist_id"] for match in second_page["matches"]] == [
+        str(farthest.id)
+    ]
+    assert second_page["matches"][0]["rank"] == 3
+    assert second_page["matches"][0]["score"] == pytest.approx(1 / 3)
+    assert second_page["next_cursor"] is None
+
+
+def test_get_matches_invalid_cursor(client_fixture, session_fixture, mock_auth_headers):
+    """An undecodable cursor is rejected"""
+    _add_anonymous_patient_with_test(
+        session_fixture, {"extroversion": MOCK_PERSONALITY_TEST["extroversion"]}
+    )
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches",
+        params={"cursor": "not-a-cursor"},
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid match cursor"}
+
+
+def test_get_matches_cursor_resumes_after_the_pool_changed(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """A cursor resumes after its last match on an index of another version"""
+    _add_anonymous_patient_with_test(
+        session_fixture, {"extroversion": MOCK_PERSONALITY_TEST["extroversion"]}
+    )
+    closest = _add_scored_therapist(session_fixture, MOCK_EXTROVERSION_SCORE + 1)
+    farthest = _add_scored_therapist(session_fixture, MOCK_EXTROVERSION_SCORE + 3)
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches",
+        params={"limit": 1},
+        headers=mock_auth_headers,
+    )
+    first_page = response.json()
+    assert [match["therapist_id"] for match in first_page["matches"]] == [
+        str(closest.id)
+    ]
+
+    # a closer therapist ranks above the cursor and a worker rebuilt from
+    # scratch numbers its index differently, neither affects the next page
+    _add_scored_therapist(session_fixture, MOCK_EXTROVERSION_SCORE)
+    middle = _add_scored_therapist(session_fixture, MOCK_EXTROVERSION_SCORE + 2)
+    therapist_index.clear()
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches",
+        params={"limit": 1, "cursor": first_page["next_cursor"]},
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 200
+    second_page = response.json()
+    assert [match["therapist_id"] for match in second_page["matches"]] == [
+        str(middle.id)
+    ]
+    assert second_page["matches"][0]["rank"] == 2
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches",
+        params={"limit": 1, "cursor": second_page["next_cursor"]},
+        headers=mock_auth_headers,
+    )
+
+    third_page = response.json()
+    assert [match["therapist_id"] for match in third_page["matches"]] == [
+        str(farthest.id)
+    ]
+    assert third_page["next_cursor"] is None
+
+
+def test_get_matches_breaks_score_ties_by_therapist_id(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """Therapists with the same score are paged in id order without overlap"""
+    _add_anonymous_patient_with_test(
+        session_fixture, {"extroversion": MOCK_PERSONALITY_TEST["extroversion"]}
+    )
+    tied = [
+        _add_scored_therapist(session_fixture, MOCK_EXTROVERSION_SCORE)
+        for _ in range(5)
+    ]
+
+    seen = []
+    cursor = None
+
+    for _ in range(len(tied)):
+        response = client_fixture.get(
+            "/anonymous-sessions/matches",
+            params={"limit": 2, **({"cursor": cursor} if cursor else {})},
+            headers=mock_auth_headers,
+        )
+        page = response.json()
+        seen += [match["therapist_id"] for match in page["matches"]]
+        cursor = page["next_cursor"]
+
+        if cursor is None:
+            break
+
+    assert seen == sorted(str(therapist.id) for therapist in tied)
+
+
+def test_get_matches_within_radius(client_fixture, session_fixture, mock_auth_headers):
+    """Only therapists within the radius of the patient are ranked"""
+    _add_anonymous_patient_with_test(
+        session_fixture,
+        {"extroversion": MOCK_PERSONALITY_TEST["extroversion"]},
+        {"latitude": 43.6532, "longitude": -79.3832},
+    )
+
+    nearby = _add_scored_therapist(
+        session_fixture,
+        MOCK_EXTROVERSION_SCORE + 1,
+        {"latitude": 43.5890, "longitude": -79.6441},
+    )
+    _add_scored_therapist(
+        session_fixture,
+        MOCK_EXTROVERSION_SCORE,
+        {"latitude": 49.2827, "longitude": -123.1207},
+    )
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches",
+        params={"radius_km": 50},
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+
+    assert [match["therapist_id"] for match in data["matches"]] == [str(nearby.id)]
+    assert data["next_cursor"] is None
+
+
+def test_get_matches_within_radius_without_location(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """Filtering by distance requires the patient's location"""
+    _add_anonymous_patient_with_test(
+        session_fixture, {"extroversion": MOCK_PERSONALITY_TEST["extroversion"]}
+    )
+
+    response = client_fixture.get(
+        "/anonymous-sessions/matches",
+        params={"radius_km": 50},
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "A postal code is required to filter matches by distance"
+    }
+
+
+def test_register_patient_stores_ranked_matches(
+    client_fixture, session_fixture, mock_auth_headers, mock_jwt_decode
+):
+    """Registration stores the ranked therapists read by the patient dashboard"""
+    therapists = [
+        _add_scored_therapist(session_fixture, extroversion)
+        for extroversion in (0.5, 2.5, 4.0)
+    ]
+    _add_scored_therapist(session_fixture, 2.0, {"is_profile_complete": False})
+    _add_anonymous_patient_with_test(
+        session_fixture,
+        {trait: MOCK_PERSONALITY_TEST[trait] for trait in PERSONALITY_TRAIT_ORDER},
+    )
+
+    response = client_fixture.post(
+        "/patients",
+        json={
+            "first_name": "User",
+            "last_name": "Last",
+            "email_address": "patient@b.com",
+            "password": "Hashedpassword1",
+            "user_type": UserOption.PATIENT.value,
+        },
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 201
+
+    stored = session_fixture.exec(select(Match).order_by(Match.rank)).all()
+
+    assert [match.rank for match in stored] == [1, 2, 3]
+    assert {match.therapist_id for match in stored} == {
+        therapist.id for therapist in therapists
+    }
+    assert {str(match.patient_id) for match in stored} == {response.json()["id"]}
+
+    user = session_fixture.exec(
+        select(User).where(User.email_address == "patient@b.com")
+    ).one()
+    mock_jwt_decode.return_value = {"sub": str(user.id), "exp": 9999999999}
+    # The same bearer token was verified for the anonymous session
+    verified_token_cache.clear()
+
+    response = client_fixture.get("/patients/me/matches", headers=mock_auth_headers)
+    matches = response.json()
+
+    assert response.status_code == 200
+    assert int(response.headers[QUERY_COUNT_HEADER]) == 2
+    assert [match["therapist_id"] for match in matches] == [
+        str(match.therapist_id) for match in stored
+    ]
+    assert [match["score"] for match in matches] == sorted(
+        (match["score"] for match in matches), reverse=True
+    )
+
+
+def test_register_patient_matches_only_therapists_passing_its_filters(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """The therapy needs and preferences of the patient filter the candidates"""
+    matching = _add_scored_therapist(
+        session_fixture,
+        2.5,
+        {"specializations": ["grief"], "is_lgbtq_specialization": True},
+    )
+    _add_scored_therapist(
+        session_fixture,
+        2.5,
+        {"specializations": ["stress"], "is_lgbtq_specialization": True},
+    )
+    _add_scored_therapist(
+        session_fixture,
+        2.5,
+        {"specializations": ["grief"], "is_lgbtq_specialization": False},
+    )
+    _add_anonymous_patient_with_test(
+        session_fixture,
+        {trait: MOCK_PERSONALITY_TEST[trait] for trait in PERSONALITY_TRAIT_ORDER},
+        {"therapy_needs": ["grief", "anxiety"], "is_lgbtq_therapist_preference": True},
+    )
+
+    response = client_fixture.post(
+        "/patients",
+        json={
+            "first_name": "User",
+            "last_name": "Last",
+            "email_address": "patient@b.com",
+            "password": "Hashedpassword1",
+            "user_type": UserOption.PATIENT.value,
+        },
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 201
+    assert session_fixture.exec(select(Match.therapist_id)).all() == [matching.id]
+
+
+def test_register_patient_matches_therapists_scored_elsewhere(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """Therapists scored through another worker are matched at registration"""
+    therapist_index.ensure_loaded(session_fixture)
+    session_fixture.commit()
+
+    # Scored after this worker loaded its index, without pushing into it
+    nearby = _add_scored_therapist(
+        session_fixture, 2.5, {"latitude": 43.5890, "longitude": -79.6441}
+    )
+    far_away = _add_scored_therapist(
+        session_fixture, 2.5, {"latitude": 49.2827, "longitude": -123.1207}
+    )
+    _add_anonymous_patient_with_test(
+        session_fixture,
+        {trait: MOCK_PERSONALITY_TEST[trait] for trait in PERSONALITY_TRAIT_ORDER},
+        {"latitude": 43.6532, "longitude": -79.3832},
+    )
+
+    response = client_fixture.post(
+        "/patients",
+        json={
+            "first_name": "User",
+            "last_name": "Last",
+            "email_address": "patient@b.com",
+            "password": "Hashedpassword1",
+            "user_type": UserOption.PATIENT.value,
+        },
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 201
+    assert set(session_fixture.exec(select(Match.therapist_id)).all()) == {
+        nearby.id,
+        far_away.id,
+    }
+
+
+def test_register_patient_without_matches_when_ranking_fails(
+    client_fixture, session_fixture, mock_auth_headers, monkeypatch
+):
+    """A patient is still registered when the matches cannot be computed"""
+    _add_scored_therapist(session_fixture, 2.5)
+    _add_anonymous_patient_with_test(
+        session_fixture,
+        {trait: MOCK_PERSONALITY_TEST[trait] for trait in PERSONALITY_TRAIT_ORDER},
+    )
+
+    def _fail():
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(matching, "_refresh_therapist_index", _fail)
+
+    response = client_fixture.post(
+        "/patients",
+        json={
+            "first_name": "User",
+            "last_name": "Last",
+            "email_address": "patient@b.com",
+            "password": "Hashedpassword1",
+            "user_type": UserOption.PATIENT.value,
+        },
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 201
+    assert not session_fixture.exec(select(Match)).all()
+
+
+def test_get_patient_matches_without_matches(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """A patient registered before any therapist was scored has no matches"""
+    add_test_user(session_fixture)
+    add_test_patient(session_fixture)
+
+    response = client_fixture.get("/patients/me/matches", headers=mock_auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from backend.services.distance import haversine_km
+from backend.services.spatial_index import GeoGridIndex
+
+TORONTO = (43.6532, -79.3832)
+MISSISSAUGA = (43.5890, -79.6441)
+OTTAWA = (45.4215, -75.6972)
+VANCOUVER = (49.2827, -123.1207)
+
+
+def _brute_force(coordinates, latitude, longitude, radius_km):
+    distances = haversine_km(latitude, longitude, coordinates[:, 0], coordinates[:, 1])
+    return np.flatnonzero(distances <= radius_km)
+
+
+def test_query_radius_returns_rows_within_radius():
+    """only the rows inside the radius are returned, skipping missing coordinates"""
+    coordinates = np.array(
+        [TORONTO, VANCOUVER, (np.nan, np.nan), MISSISSAUGA, OTTAWA],
+        dtype=np.float32,
+    )
+    index = GeoGridIndex(coordinates)
+
+    assert len(index) == 4
+    assert index.query_radius(*TORONTO, 50).tolist() == [0, 3]
+    assert index.query_radius(*TORONTO, 400).tolist() == [0, 3, 4]
+    assert index.query_radius(*TORONTO, 0.001).tolist() == [0]
+
+
+def test_query_radius_across_the_antimeridian():
+    """a query box wrapping around longitude 180 finds rows on both sides"""
+    coordinates = np.array([(0.0, 179.9), (0.0, -179.9), (0.0, 0.0)])
+    index = GeoGridIndex(coordinates)
+
+    assert index.query_radius(0.0, 179.95, 50).tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("cell_size_degrees", [0.1, 0.5, 5.0])
+def test_query_radius_matches_brute_force(cell_size_degrees):
+    """the grid returns exactly the rows a full scan would return"""
+    rng = np.random.default_rng(7)
+    coordinates = np.column_stack(
+        [rng.uniform(-89, 89, 2000), rng.uniform(-180, 180, 2000)]
+    )
+    index = GeoGridIndex(coordinates, cell_size_degrees)
+
+    for latitude, longitude, radius_km in [
+        (43.65, -79.38, 800),
+        (85.0, 10.0, 1500),
+        (-10.0, 179.0, 2500),
+    ]:
+        assert (
+            index.query_radius(latitude, longitude, radius_km).tolist()
+            == _brute_force(coordinates, latitude, longitude, radius_km).tolist()
+        )
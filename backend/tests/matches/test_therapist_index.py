@@ -0,0 +1,201 @@
+from uuid import UUID
+import numpy as np
+import pytest
+from backend.routers.users.user_types import UserOption
+from backend.schemas.scores import Scores
+from backend.services import therapist_index as therapist_index_module
+from backend.services.therapist_index import (
+    COMPACTION_MIN_ROWS,
+    TherapistFeatureIndex,
+    TherapistFeatures,
+    therapist_index,
+)
+from backend.tests.test_utils import (
+    add_test_user,
+    add_test_therapist,
+    add_therapist_personality_test_score,
+)
+
+THERAPIST_SCORES = Scores(
+    extroversion=2.0,
+    conscientiousness=3.0,
+    openness=3.5,
+    neuroticism=1.5,
+    agreeableness=3.0,
+)
+
+
+def _features(therapist_id: UUID, **overrides) -> TherapistFeatures:
+    return TherapistFeatures(
+        **{
+            "therapist_id": therapist_id,
+            "traits": (1.0, 2.0, 3.0, 4.0, 0.5),
+            "latitude": 43.6555,
+            "longitude": -79.3626,
+            "specializations": frozenset(["anxiety"]),
+            "is_lgbtq_specialization": False,
+            "is_religious_specialization": False,
+            "therapist_type": "psychologist",
+            "is_profile_complete": True,
+            **overrides,
+        }
+    )
+
+
+def test_snapshot_requires_a_loaded_index():
+    """reading an index that was never loaded raises"""
+    with pytest.raises(RuntimeError):
+        TherapistFeatureIndex().snapshot()
+
+
+def test_upsert_is_ignored_before_load():
+    """updates before the first load are dropped"""
+    index = TherapistFeatureIndex()
+    index.upsert(_features(UUID(int=1)))
+
+    assert not index.is_loaded
+
+
+def test_upsert_replaces_a_row_in_a_new_snapshot():
+    """an update bumps the version and leaves older snapshots untouched"""
+    index = TherapistFeatureIndex()
+    first = index.load([_features(UUID(int=1)), _features(UUID(int=2))])
+
+    index.upsert(_features(UUID(int=2), is_profile_complete=False, latitude=None))
+    second = index.snapshot()
+
+    assert second.version == first.version + 1
+    assert first.features(UUID(int=2)).is_profile_complete is True
+    assert second.features(UUID(int=2)).is_profile_complete is False
+    assert second.features(UUID(int=2)).latitude is None
+    assert second.trait_matrix().therapist_ids == [UUID(int=1)]
+    assert not second.overlay.traits.flags.writeable
+
+
+def test_upsert_leaves_the_base_arrays_untouched():
+    """writes go to the overlay, which is merged into the base once it grows"""
+    index = TherapistFeatureIndex()
+    base = index.load([_features(UUID(int=row)) for row in range(1, 4)]).base
+
+    index.upsert(_features(UUID(int=2), traits=(2.0, 2.0, 2.0, 2.0, 2.0)))
+    snapshot = index.snapshot()
+
+    assert snapshot.base is base
+    assert snapshot.hidden == frozenset([UUID(int=2)])
+    assert len(snapshot) == 3
+    assert snapshot.trait_matrix().therapist_ids == [
+        UUID(int=1),
+        UUID(int=3),
+        UUID(int=2),
+    ]
+
+    for row in range(4, 4 + COMPACTION_MIN_ROWS):
+        index.upsert(_features(UUID(int=row)))
+
+    compacted = index.snapshot()
+
+    assert compacted.base is not base
+    assert len(compacted.overlay) == 0
+    assert len(compacted) == len(compacted.base) == 3 + COMPACTION_MIN_ROWS
+    assert compacted.features(UUID(int=2)).traits == (2.0, 2.0, 2.0, 2.0, 2.0)
+
+
+def test_upsert_without_changes_keeps_the_version():
+    index = TherapistFeatureIndex()
+    snapshot = index.load([_features(UUID(int=1))])
+
+    index.upsert(_features(UUID(int=1)))
+
+    assert index.snapshot() is snapshot
+
+
+def test_upsert_during_a_load_survives_the_older_read(session_fixture, monkeypatch):
+    """a write made while the index is read is replayed over the read"""
+    index = TherapistFeatureIndex()
+    read = therapist_index_module.load_therapist_features
+
+    def _read_then_write(session, changed_since=None):
+        features = read(session, changed_since)
+        index.upsert(_features(UUID(int=1)))
+        return features
+
+    monkeypatch.setattr(
+        therapist_index_module, "load_therapist_features", _read_then_write
+    )
+
+    snapshot = index.ensure_loaded(session_fixture)
+
+    assert snapshot.features(UUID(int=1)) is not None
+
+
+def test_upsert_appends_new_therapists_and_keeps_traits():
+    """a new therapist is appended and keep_traits preserves indexed scores"""
+    index = TherapistFeatureIndex()
+    index.load([_features(UUID(int=1))])
+
+    index.upsert(_features(UUID(int=2)))
+    index.upsert(_features(UUID(int=1), traits=None), keep_traits=True)
+
+    snapshot = index.snapshot()
+
+    assert snapshot.therapist_ids == (UUID(int=1), UUID(int=2))
+    assert snapshot.features(UUID(int=1)).traits == (1.0, 2.0, 3.0, 4.0, 0.5)
+    assert snapshot.trait_matrix().therapist_ids == [UUID(int=1), UUID(int=2)]
+
+
+def test_index_loads_scored_therapists(session_fixture):
+    """the index converts the decimal trait scores to float32"""
+    add_test_user(session_fixture, {"roles": [UserOption.THERAPIST.value]})
+    therapist = add_test_therapist(session_fixture, {"is_profile_complete": True})
+    add_therapist_personality_test_score(therapist, THERAPIST_SCORES, session_fixture)
+
+    snapshot = therapist_index.ensure_loaded(session_fixture)
+    features = snapshot.features(therapist.id)
+
+    assert snapshot.base.traits.dtype == np.float32
+    assert features.traits == (2.0, 3.0, 3.5, 1.5, 3.0)
+    assert features.specializations == frozenset(["anxiety", "depression"])
+    assert features.therapist_type == "psychologist"
+
+
+def test_therapist_patch_updates_the_index(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """patching a therapist profile pushes the change into a loaded index"""
+    add_test_user(session_fixture, {"roles": [UserOption.THERAPIST.value]})
+    therapist = add_test_therapist(session_fixture)
+
+    version = therapist_index.ensure_loaded(session_fixture).version
+
+    response = client_fixture.patch(
+        "/therapists/me",
+        json={"specializations": ["grief"], "is_lgbtq_specialization": True},
+        headers=mock_auth_headers,
+    )
+
+    assert response.status_code == 200
+
+    snapshot = therapist_index.snapshot()
+    features = snapshot.features(therapist.id)
+
+    assert snapshot.version == version + 1
+    assert features.specializations == frozenset(["grief"])
+    assert features.is_lgbtq_specialization is True
+
+
+def test_refresh_applies_match_vectors_written_elsewhere(session_fixture):
+    """a refresh picks up the scores written by another process"""
+    add_test_user(session_fixture, {"roles": [UserOption.THERAPIST.value]})
+    therapist = add_test_therapist(session_fixture, {"is_profile_complete": True})
+
+    index = TherapistFeatureIndex()
+    loaded = index.ensure_loaded(session_fixture)
+    session_fixture.commit()
+
+    add_therapist_personality_test_score(therapist, THERAPIST_SCORES, session_fixture)
+    refreshed = index.refresh(session_fixture)
+
+    assert loaded.features(therapist.id).traits is None
+    assert refreshed.version == loaded.version + 1
+    assert refreshed.features(therapist.id).traits == (2.0, 3.0, 3.5, 1.5, 3.0)
+    assert index.refresh(session_fixture) is refreshed
@@ -0,0 +1,75 @@
+import threading
+import time
+import pytest
+from sqlalchemy import create_engine, exc, text
+from backend.core.pool_metrics import InstrumentedQueuePool, PoolMetrics
+
+
+@pytest.fixture
+def instrumented_engine(session_fixture):
+    """A one connection pool on the test database reporting to its metrics"""
+    engine = create_engine(
+        session_fixture.get_bind().url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+    )
+    metrics = PoolMetrics(engine)
+    metrics.listen()
+
+    yield engine, metrics
+
+    engine.dispose()
+
+
+def test_pool_metrics_count_checkouts_and_connections(instrumented_engine):
+    engine, metrics = instrumented_engine
+
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    stats = metrics.stats()
+
+    assert stats.pool_class == "InstrumentedQueuePool"
+    assert stats.size == 1
+    assert stats.max_overflow == 0
+    assert stats.checkouts == 3
+    assert stats.checkins == 3
+    assert stats.checked_out == 0
+    assert stats.peak_checked_out == 1
+    assert stats.connections_opened == 1
+    assert stats.open_connections == 1
+    assert stats.max_connection_age_seconds >= 0
+
+
+def test_pool_metrics_record_waits_and_timeouts(instrumented_engine):
+    engine, metrics = instrumented_engine
+    connection = engine.connect()
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    release = threading.Timer(0.05, connection.close)
+    release.start()
+    started = time.perf_counter()
+
+    with engine.connect():
+        waited = time.perf_counter() - started
+
+    release.join()
+    stats = metrics.stats()
+
+    assert stats.timeouts == 1
+    assert stats.waits >= 2
+    assert stats.max_wait_seconds >= waited * 0.9
+
+
+def test_get_database_pool_stats(client_fixture):
+    response = client_fixture.get("/monitoring/database-pools")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"sync_pool", "async_pool"}
+    assert data["async_pool"]["pool_class"] == "InstrumentedAsyncQueuePool"
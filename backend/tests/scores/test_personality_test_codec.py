@@ -0,0 +1,53 @@
+from backend.schemas.scores import TherapistPersonalityTestRead
+from backend.types.personality_test_codec import (
+    PERSONALITY_TEST_LENGTH,
+    decode_category,
+    encode_category,
+    encode_personality_test,
+    get_answered_mask,
+)
+from backend.tests.test_utils import MOCK_PERSONALITY_TEST
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER
+
+
+def test_encode_category_places_scores_by_question_id():
+    scores = encode_category(
+        [
+            {"id": "10", "category": "openness", "score": 4},
+            None,
+            {"id": "2", "category": "openness", "score": 1},
+        ]
+    )
+
+    assert scores == [None, 1, None, None, None, None, None, None, None, 4]
+    assert encode_category(scores) == scores
+
+
+def test_decode_category_renders_answered_questions():
+    assert decode_category("openness", [None, 1] + [None] * 7 + [4]) == [
+        {"id": "2", "category": "openness", "score": 1},
+        {"id": "10", "category": "openness", "score": 4},
+    ]
+
+
+def test_answered_mask_counts_every_answer():
+    encoded = encode_personality_test(MOCK_PERSONALITY_TEST)
+
+    assert encoded["answered_mask"].bit_count() == PERSONALITY_TEST_LENGTH
+    assert get_answered_mask({"openness": [None, 1] + [None] * 8}).bit_count() == 1
+
+
+def test_read_schema_renders_encoded_test_in_api_shape():
+    encoded = encode_personality_test(
+        {trait: MOCK_PERSONALITY_TEST[trait] for trait in PERSONALITY_TRAIT_ORDER}
+    )
+
+    personality_test = TherapistPersonalityTestRead(
+        id="c303282d-f2e6-46ca-a04a-35d3d873712d", **encoded
+    )
+
+    for trait in PERSONALITY_TRAIT_ORDER:
+        assert [
+            answer.model_dump(mode="json")
+            for answer in getattr(personality_test, trait)
+        ] == MOCK_PERSONALITY_TEST[trait]
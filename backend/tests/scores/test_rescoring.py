@@ -0,0 +1,77 @@
+from decimal import Decimal
+from uuid import uuid4
+import pytest
+from sqlmodel import select
+from backend.models.user import PersonalityTestScore
+from backend.schemas.scores import Scores
+from backend.services.rescoring import rescore_personality_tests
+from backend.services.scores import format_personality_test
+from backend.tests.test_utils import (
+    MOCK_PERSONALITY_TEST,
+    add_test_user,
+    add_test_therapist,
+    add_therapist_personality_test,
+    add_therapist_personality_test_score,
+)
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER
+
+STALE_SCORES = Scores(
+    extroversion=0.0,
+    conscientiousness=0.0,
+    openness=0.0,
+    neuroticism=0.0,
+    agreeableness=0.0,
+)
+
+
+def _add_therapist_with_test(session_fixture, answers: dict):
+    """add a therapist with raw answers and an outdated calculated score"""
+    user = add_test_user(
+        session_fixture,
+        {"id": uuid4(), "email_address": f"{uuid4().hex[:8]}@b.com"},
+    )
+    therapist = add_test_therapist(session_fixture, {"user_id": user.id})
+    personality_test = add_therapist_personality_test(
+        session_fixture, {"therapist_id": therapist.id, **answers}
+    )
+    add_therapist_personality_test_score(therapist, STALE_SCORES, session_fixture)
+
+    return therapist, personality_test
+
+
+def test_rescore_personality_tests_updates_every_chunk(session_fixture):
+    answers = {trait: MOCK_PERSONALITY_TEST[trait] for trait in PERSONALITY_TRAIT_ORDER}
+    scored = [_add_therapist_with_test(session_fixture, answers) for _ in range(5)]
+    incomplete, _ = _add_therapist_with_test(
+        session_fixture, {**answers, "openness": answers["openness"][:4]}
+    )
+
+    summary = rescore_personality_tests(session_fixture, chunk_size=2)
+
+    assert summary.rescored == 5
+    assert summary.skipped == 1
+
+    session_fixture.expire_all()
+    expected = format_personality_test(scored[0][1])
+    for therapist, _ in scored:
+        score = session_fixture.exec(
+            select(PersonalityTestScore).where(
+                PersonalityTestScore.therapist_id == therapist.id
+            )
+        ).one()
+        for trait in PERSONALITY_TRAIT_ORDER:
+            assert getattr(score, trait) == Decimal(
+                str(round(getattr(expected, trait), 3))
+            )
+
+    untouched = session_fixture.exec(
+        select(PersonalityTestScore).where(
+            PersonalityTestScore.therapist_id == incomplete.id
+        )
+    ).one()
+    assert untouched.openness == 0
+
+
+def test_rescore_personality_tests_rejects_empty_chunks(session_fixture):
+    with pytest.raises(ValueError):
+        rescore_personality_tests(session_fixture, chunk_size=0)
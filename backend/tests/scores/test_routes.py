@@ -33,6 +33,7 @@ def test_create_therapist_personality_test(
         {
             "roles": [UserOption.THERAPIST.value],
             "id": UUID("b658ffce-d810-4341-a8ef-2d3651489daf"),
+            "email_address": "other@b.com",
         },
     )
 
@@ -561,3 +562,97 @@ def test_patch_therapist_personality_test_score_complete_test(
     assert data["conscientiousness"] is not None
     assert data["agreeableness"] is not None
     assert therapist_record.personality_test is not None
+
+
+def test_patch_anonymous_session_test_score_batch(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """test that a batch of answers is saved in one request"""
+    patient = add_anonymous_patient(session_fixture)
+    add_anonymous_personality_test_score(
+        session_fixture,
+        {
+            "anonymous_patient_id": patient.id,
+            "openness": [
+                {"id": "1", "category": PersonalityTestCategory.OPENNESS, "score": 3},
+            ],
+        },
+    )
+
+    access_token = create_access_token({"sub": USER_ID}, timedelta(minutes=60))
+
+    response = client_fixture.patch(
+        "/anonymous-sessions/personality-tests/batch",
+        headers={**mock_auth_headers, "Cookie": f"anonymous_session={access_token}"},
+        json=[
+            {"id": "2", "category": "agreeableness", "score": 2},
+            {"id": "1", "category": "agreeableness", "score": 5},
+            {"id": "1", "category": "openness", "score": 4},
+        ],
+    )
+
+    data = response.json()
+    assert response.status_code == 200
+    assert data == {
+        "extroversion": [],
+        "conscientiousness": [],
+        "openness": [
+            {"id": "1", "category": PersonalityTestCategory.OPENNESS, "score": 4},
+        ],
+        "neuroticism": [],
+        "agreeableness": [
+            {"id": "1", "category": PersonalityTestCategory.AGREEABLENESS, "score": 5},
+            {"id": "2", "category": PersonalityTestCategory.AGREEABLENESS, "score": 2},
+        ],
+        "id": data["id"],
+    }
+
+
+def test_patch_anonymous_session_test_score_batch_empty(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """test that an empty batch is rejected"""
+    patient = add_anonymous_patient(session_fixture)
+    add_anonymous_personality_test_score(
+        session_fixture, {"anonymous_patient_id": patient.id}
+    )
+
+    access_token = create_access_token({"sub": USER_ID}, timedelta(minutes=60))
+
+    response = client_fixture.patch(
+        "/anonymous-sessions/personality-tests/batch",
+        headers={**mock_auth_headers, "Cookie": f"anonymous_session={access_token}"},
+        json=[],
+    )
+
+    assert response.status_code == 422
+
+
+def test_patch_therapist_personality_test_batch_completes_test(
+    client_fixture, session_fixture, mock_auth_headers
+):
+    """Test that a batch answering every question calculates the test scores"""
+    add_test_user(session_fixture, {"roles": [UserOption.THERAPIST.value]})
+    therapist = add_test_therapist(session_fixture)
+    add_therapist_personality_test(session_fixture, {"therapist_id": therapist.id})
+
+    answers = [
+        answer
+        for category in PersonalityTestCategory
+        for answer in MOCK_PERSONALITY_TEST[category.value]
+    ]
+
+    response = client_fixture.patch(
+        "/therapists/me/personality-test/batch",
+        headers={**mock_auth_headers},
+        json=answers,
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["neuroticism"]) == 10
+
+    therapist_record = session_fixture.exec(
+        select(Therapist).where(Therapist.id == therapist.id)
+    ).first()
+
+    assert therapist_record.personality_test is not None
@@ -0,0 +1,202 @@
+from uuid import uuid4
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+from backend.models.user import TherapistPersonalityTest
+from backend.schemas.scores import AggregateScores, PersonalityTestQuestion
+from backend.services.scores import (
+    calculate_test_scores,
+    calculate_completed_trait_scores,
+    get_answer_column_updates,
+    score_answer_matrix,
+    set_personality_test_answers,
+    update_therapist_personality_test_category,
+)
+from backend.types.personality_test_codec import (
+    empty_category,
+    encode_category,
+    encode_personality_test,
+    get_answer_bit,
+)
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER
+
+
+def _reference_extroversion(scores):
+    """the extroversion formula as written in the original instrument"""
+    return (
+        20
+        + scores[0]
+        - scores[1]
+        + scores[2]
+        - scores[3]
+        + scores[4]
+        - scores[5]
+        + scores[6]
+        - scores[7]
+        + scores[8]
+        - scores[9]
+    ) / 10
+
+
+def test_score_answer_matrix_scores_every_row():
+    rng = np.random.default_rng(7)
+    answers = rng.integers(1, 6, size=(25, 50)).astype(float)
+
+    trait_scores = score_answer_matrix(answers)
+
+    assert trait_scores.shape == (25, 5)
+    extroversion = PERSONALITY_TRAIT_ORDER.index("extroversion")
+    for row in range(25):
+        start = extroversion * 10
+        assert trait_scores[row, extroversion] == pytest.approx(
+            _reference_extroversion(answers[row, start : start + 10])
+        )
+
+
+def test_score_answer_matrix_leaves_incomplete_traits_nan():
+    answers = np.full(50, 3.0)
+    answers[PERSONALITY_TRAIT_ORDER.index("openness") * 10 + 4] = np.nan
+
+    trait_scores = score_answer_matrix(answers)[0]
+
+    assert np.isnan(trait_scores[PERSONALITY_TRAIT_ORDER.index("openness")])
+    assert np.isfinite(trait_scores).sum() == 4
+
+
+def test_calculate_test_scores_matches_scoring_key():
+    scores = calculate_test_scores(
+        AggregateScores(
+            extroversion=[5, 1] * 5,
+            conscientiousness=[3] * 10,
+            openness=[3] * 10,
+            neuroticism=[3] * 10,
+            agreeableness=[3] * 10,
+        )
+    )
+
+    assert scores.extroversion == 4.0
+    assert scores.conscientiousness == pytest.approx(2.0)
+    assert scores.openness == pytest.approx(2.0)
+    assert scores.neuroticism == pytest.approx(2.0)
+    assert scores.agreeableness == pytest.approx(2.0)
+
+
+def test_calculate_test_scores_raises_for_short_trait():
+    with pytest.raises(HTTPException) as exc_info:
+        calculate_test_scores(
+            AggregateScores(
+                extroversion=[3] * 10,
+                conscientiousness=[3] * 10,
+                openness=[3] * 9,
+                neuroticism=[3] * 10,
+                agreeableness=[3] * 10,
+            )
+        )
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail.startswith("Openness score")
+
+
+def test_calculate_completed_trait_scores_places_answers_by_question_id():
+    class PersonalityTest:
+        extroversion = encode_category(
+            [
+                {
+                    "id": str(question),
+                    "category": "extroversion",
+                    "score": 5 - question % 2 * 4,
+                }
+                for question in reversed(range(1, 11))
+            ]
+        )
+        conscientiousness = empty_category()
+        openness = encode_category([{"id": "1", "category": "openness", "score": 3}])
+        neuroticism = empty_category()
+        agreeableness = empty_category()
+
+    trait_scores = calculate_completed_trait_scores(PersonalityTest())
+
+    assert trait_scores == {"extroversion": pytest.approx(0.0)}
+
+
+def test_update_category_places_answer_in_question_slot():
+    personality_test = TherapistPersonalityTest(
+        **encode_personality_test(
+            {
+                "therapist_id": uuid4(),
+                "openness": [{"id": "3", "category": "openness", "score": 2}],
+            }
+        )
+    )
+
+    updated_category = update_therapist_personality_test_category(
+        PersonalityTestQuestion(id="10", category="openness", score=4),
+        personality_test,
+    )
+
+    assert updated_category == {
+        "openness": [None, None, 2, None, None, None, None, None, None, 4]
+    }
+
+
+def test_update_category_rejects_unknown_question_id():
+    with pytest.raises(ValueError, match="Invalid question id"):
+        update_therapist_personality_test_category(
+            PersonalityTestQuestion(id="11", category="openness", score=4),
+            TherapistPersonalityTest(therapist_id=uuid4()),
+        )
+
+
+def test_answer_column_updates_set_only_changed_elements():
+    personality_test = TherapistPersonalityTest(therapist_id=uuid4())
+    updated_categories = set_personality_test_answers(
+        [
+            PersonalityTestQuestion(id="2", category="openness", score=4),
+            PersonalityTestQuestion(id="7", category="openness", score=1),
+            PersonalityTestQuestion(id="1", category="extroversion", score=3),
+        ],
+        personality_test,
+    )
+
+    values, answered_mask = get_answer_column_updates(
+        personality_test, updated_categories
+    )
+    sql = str(
+        update(TherapistPersonalityTest)
+        .values(values)
+        .compile(dialect=postgresql.dialect())
+    )
+
+    assert "openness[%(openness_1)s]" in sql
+    assert "openness[%(openness_2)s]" in sql
+    assert "extroversion[%(extroversion_1)s]" in sql
+    assert "answered_mask=(therapist_personality_tests.answered_mask |" in sql
+    assert answered_mask == (
+        get_answer_bit("openness", 1)
+        | get_answer_bit("openness", 6)
+        | get_answer_bit("extroversion", 0)
+    )
+
+
+def test_answer_column_updates_skip_unchanged_answers():
+    personality_test = TherapistPersonalityTest(
+        **encode_personality_test(
+            {
+                "therapist_id": uuid4(),
+                "openness": [{"id": "3", "category": "openness", "score": 2}],
+            }
+        )
+    )
+    updated_categories = set_personality_test_answers(
+        [PersonalityTestQuestion(id="3", category="openness", score=2)],
+        personality_test,
+    )
+
+    values, answered_mask = get_answer_column_updates(
+        personality_test, updated_categories
+    )
+
+    assert values == {}
+    assert answered_mask == personality_test.answered_mask
@@ -15,6 +15,9 @@ from backend.models.user import (
 from backend.schemas.scores import Scores
 from backend.routers.users.user_types import UserOption
 from backend.services.users import get_password_hash
+from backend.services.location_service import build_postal_code_table, geocoder
+from backend.services.match_vectors import upsert_match_vector
+from backend.types.personality_test_codec import encode_personality_test
 
 MOCK_PERSONALITY_TEST = {
     "anonymous_patient_id": "c303282d-f2e6-46ca-a04a-35d3d873712d",
@@ -207,7 +210,9 @@ def add_anonymous_personality_test_score(session_fixture, mock_overrides=None):
     """add an anonymous personality test score for the tests"""
     if not mock_overrides:
         mock_overrides = {}
-    test_score = AnonymousPersonalityTestScore(**{**mock_overrides})
+    test_score = AnonymousPersonalityTestScore(
+        **encode_personality_test(mock_overrides)
+    )
     session_fixture.add(test_score)
     session_fixture.commit()
     session_fixture.refresh(test_score)
@@ -230,6 +235,7 @@ def add_therapist_personality_test_score(
     )
 
     session_fixture.add(therapist)
+    session_fixture.exec(upsert_match_vector(therapist, personality_test_scores))
     session_fixture.commit()
     session_fixture.refresh(therapist)
 
@@ -238,10 +244,17 @@ def add_therapist_personality_test_score(
 
 def add_therapist_personality_test(session_fixture, mock_overrides=None):
     """Add a personality test record to the therapist personality test table"""
-    personality_test = TherapistPersonalityTest(**(mock_overrides or {}))
+    personality_test = TherapistPersonalityTest(
+        **encode_personality_test(mock_overrides or {})
+    )
 
     session_fixture.add(personality_test)
     session_fixture.commit()
     session_fixture.refresh(personality_test)
 
     return personality_test
+
+
+def load_test_postal_code_table(coordinates: dict[str, tuple[float, float]]):
+    """Load a postal code table with the given coordinates into the geocoder"""
+    geocoder.load_table(build_postal_code_table(coordinates))
@@ -0,0 +1,36 @@
+from uuid import UUID
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+from backend.models.user import User
+from backend.services.users import _email_matches
+from backend.tests.test_utils import add_test_user, TEST_USER_BASE
+
+
+def test_email_lookup_uses_lower_email_index(session_fixture):
+    """The planner can serve the email lookup from the functional index"""
+    session_fixture.exec(text("SET LOCAL enable_seqscan = off"))
+    sql = (
+        select(User)
+        .where(_email_matches("A@b.com"))
+        .compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    )
+
+    plan = session_fixture.exec(text(f"EXPLAIN {sql}")).scalars().all()
+
+    assert any("ix_users_email_address_lower" in line for line in plan)
+
+
+def test_email_addresses_are_unique_regardless_of_case(session_fixture):
+    """A second user cannot register the same email in another case"""
+    add_test_user(session_fixture)
+
+    with pytest.raises(Exception, match="ix_users_email_address_lower"):
+        add_test_user(
+            session_fixture,
+            {
+                "id": UUID("b658ffce-d810-4341-a8ef-2d3651489daf"),
+                "email_address": TEST_USER_BASE["email_address"].upper(),
+            },
+        )
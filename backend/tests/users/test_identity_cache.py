@@ -0,0 +1,75 @@
+from unittest.mock import patch
+from backend.models.user import Therapist, TherapistPersonalityTest
+from backend.services.identity_cache import IdentityCache, detached_copy
+from backend.tests.test_utils import USER_ID
+
+MODULE = "backend.services.identity_cache"
+
+
+def test_get_returns_cached_profile():
+    cache = IdentityCache(max_size=2, ttl_seconds=5)
+    profile = Therapist(user_id=USER_ID)
+
+    cache.set(USER_ID, "therapist", profile)
+
+    assert cache.get(USER_ID, "therapist") is profile
+    assert cache.get(USER_ID, "patient") is None
+
+
+def test_get_drops_expired_profile():
+    cache = IdentityCache(max_size=2, ttl_seconds=5)
+
+    with patch(f"{MODULE}.monotonic", return_value=100.0):
+        cache.set(USER_ID, "therapist", Therapist(user_id=USER_ID))
+
+    with patch(f"{MODULE}.monotonic", return_value=105.0):
+        assert cache.get(USER_ID, "therapist") is None
+
+
+def test_set_evicts_least_recently_used_profile():
+    cache = IdentityCache(max_size=2, ttl_seconds=5)
+
+    cache.set("a", "therapist", Therapist())
+    cache.set("b", "therapist", Therapist())
+    cache.get("a", "therapist")
+    cache.set("c", "therapist", Therapist())
+
+    assert cache.get("a", "therapist") is not None
+    assert cache.get("b", "therapist") is None
+    assert cache.get("c", "therapist") is not None
+
+
+def test_invalidate_drops_every_variant_of_subject():
+    cache = IdentityCache(max_size=4, ttl_seconds=5)
+
+    cache.set(USER_ID, "therapist", Therapist())
+    cache.set(USER_ID, "therapist-with-tests", Therapist())
+    cache.set("other", "therapist", Therapist())
+    cache.invalidate(USER_ID)
+
+    assert cache.get(USER_ID, "therapist") is None
+    assert cache.get(USER_ID, "therapist-with-tests") is None
+    assert cache.get("other", "therapist") is not None
+
+
+def test_zero_ttl_disables_cache():
+    cache = IdentityCache(max_size=2, ttl_seconds=0)
+
+    cache.set(USER_ID, "therapist", Therapist())
+
+    assert cache.get(USER_ID, "therapist") is None
+
+
+def test_detached_copy_copies_relationships():
+    therapist = Therapist(user_id=USER_ID)
+    therapist.raw_personality_scores = TherapistPersonalityTest(
+        therapist_id=therapist.id
+    )
+
+    copy = detached_copy(therapist, ("raw_personality_scores", "personality_test"))
+
+    assert copy is not therapist
+    assert copy.id == therapist.id
+    assert copy.raw_personality_scores.therapist_id == therapist.id
+    assert copy.raw_personality_scores is not therapist.raw_personality_scores
+    assert copy.personality_test is None
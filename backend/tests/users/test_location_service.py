@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from backend.routers.users.exceptions import GeocodingServiceError
+from backend.services import location_service
+from backend.services.location_service import (
+    PostalCodeGeocoder,
+    build_postal_code_table,
+    get_fsa_slot,
+    normalize_postal_code,
+)
+
+MOCK_LATITUDE = 43.6555
+MOCK_LONGITUDE = -79.3626
+
+
+def test_normalize_postal_code():
+    """separators and case do not affect the normalized postal code"""
+    assert normalize_postal_code("m5a 4l1") == "M5A4L1"
+    assert normalize_postal_code("M5A-4L1") == "M5A4L1"
+
+
+def test_fsa_slots_are_unique_and_bounded():
+    """every forward sortation area maps to its own slot"""
+    assert get_fsa_slot("A0A") == 0
+    assert get_fsa_slot("Z9Z 9Z9") == location_service.FSA_SLOTS - 1
+    assert get_fsa_slot("M5A 4L1") == get_fsa_slot("m5a")
+    assert get_fsa_slot("M5B") != get_fsa_slot("M5A")
+    assert get_fsa_slot("5MA") is None
+    assert get_fsa_slot("M5") is None
+
+
+def test_geocoder_memory_maps_a_compiled_table(tmp_path):
+    """a compiled table on disk is memory mapped and queried by postal code"""
+    table_path = tmp_path / "postal-codes.npy"
+    np.save(
+        table_path, build_postal_code_table({"M5A": (MOCK_LATITUDE, MOCK_LONGITUDE)})
+    )
+
+    geocoder = PostalCodeGeocoder(str(table_path))
+
+    assert geocoder.lookup("M5A 4L1") == (MOCK_LATITUDE, MOCK_LONGITUDE)
+    assert geocoder.lookup("L4J 6B6") is None
+    assert isinstance(geocoder.load(), np.memmap)
+
+
+def test_geocoder_never_compiles_a_missing_table(tmp_path, monkeypatch):
+    """a missing table makes geocoding unavailable without compiling it"""
+
+    def _compile(output_path):
+        raise AssertionError("The table must not be compiled on a lookup")
+
+    monkeypatch.setattr(location_service, "compile_postal_code_table", _compile)
+    geocoder = PostalCodeGeocoder(str(tmp_path / "missing.npy"))
+
+    with pytest.raises(GeocodingServiceError):
+        geocoder.lookup("M5A 4L1")
+
+    assert not geocoder.is_loaded
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from backend.routers.users.exceptions import PasswordHashingBusyError
+from backend.services.passwords import PasswordHasher, verify_password
+
+
+@pytest.fixture
+def hasher():
+    """A password hasher with one worker process"""
+    password_hasher = PasswordHasher(max_workers=1, max_pending=2)
+    yield password_hasher
+    password_hasher.shutdown()
+
+
+def test_password_hasher_hashes_and_verifies(hasher):
+    async def hash_and_verify():
+        hashed_password = await hasher.hash("Secret123")
+
+        return (
+            hashed_password,
+            await hasher.verify("Secret123", hashed_password),
+            await hasher.verify("Wrong123", hashed_password),
+        )
+
+    hashed_password, is_valid, is_wrong_valid = asyncio.run(hash_and_verify())
+
+    assert verify_password("Secret123", hashed_password)
+    assert is_valid is True
+    assert is_wrong_valid is False
+    assert hasher.pending == 0
+
+
+def test_password_hasher_rejects_beyond_max_pending(hasher):
+    async def hash_many():
+        return await asyncio.gather(
+            *(hasher.hash("Secret123") for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(hash_many())
+
+    assert sum(isinstance(r, PasswordHashingBusyError) for r in results) == 1
+    assert sum(isinstance(r, str) for r in results) == 2
+    assert hasher.pending == 0
@@ -0,0 +1,146 @@
+"""Statement budgets of the endpoints polled by the frontend"""
+
+from datetime import timedelta
+import pytest
+from backend.core.query_counter import QUERY_COUNT_HEADER
+from backend.routers.users.user_types import UserOption
+from backend.services.users import create_access_token
+from backend.tests.test_utils import (
+    add_test_user,
+    add_test_therapist,
+    add_therapist_personality_test,
+    add_anonymous_patient,
+    add_anonymous_personality_test_score,
+    MOCK_PERSONALITY_TEST,
+    USER_ID,
+)
+
+
+@pytest.fixture
+def therapist_with_test(session_fixture):
+    """A therapist user with an incomplete personality test"""
+    add_test_user(session_fixture, {"roles": [UserOption.THERAPIST.value]})
+    therapist = add_test_therapist(session_fixture)
+    add_therapist_personality_test(
+        session_fixture, {"therapist_id": therapist.id, **MOCK_PERSONALITY_TEST}
+    )
+
+    return therapist
+
+
+@pytest.fixture
+def anonymous_session_headers(session_fixture, mock_auth_headers):
+    """Headers of an anonymous session with a personality test"""
+    patient = add_anonymous_patient(session_fixture)
+    add_anonymous_personality_test_score(
+        session_fixture, {"anonymous_patient_id": patient.id}
+    )
+    access_token = create_access_token({"sub": USER_ID}, timedelta(minutes=60))
+
+    return {**mock_auth_headers, "Cookie": f"anonymous_session={access_token}"}
+
+
+@pytest.mark.parametrize(
+    "path, budget",
+    [
+        ("/therapists/me", 1),
+        ("/therapists/me/dashboard", 1),
+        ("/therapists/me/personality-test", 1),
+    ],
+)
+def test_therapist_endpoint_query_budget(
+    client_fixture, therapist_with_test, mock_auth_headers, path, budget
+):
+    response = client_fixture.get(path, headers=mock_auth_headers)
+
+    assert response.status_code == 200
+    assert int(response.headers[QUERY_COUNT_HEADER]) == budget
+
+
+def test_get_anonymous_personality_test_query_budget(
+    client_fixture, anonymous_session_headers
+):
+    response = client_fixture.get(
+        "/anonymous-sessions/personality-tests", headers=anonymous_session_headers
+    )
+
+    assert response.status_code == 200
+    assert int(response.headers[QUERY_COUNT_HEADER]) == 1
+
+
+def test_patch_anonymous_personality_test_query_budget(
+    client_fixture, anonymous_session_headers
+):
+    response = client_fixture.patch(
+        "/anonymous-sessions/personality-tests",
+        headers=anonymous_session_headers,
+        json={"id": "1", "category": "openness", "score": 3},
+    )
+
+    assert response.status_code == 200
+    # select with the test joined, in place update of the answer
+    assert int(response.headers[QUERY_COUNT_HEADER]) == 2
+
+
+def test_repeated_therapist_dashboard_is_served_from_identity_cache(
+    client_fixture, therapist_with_test, mock_auth_headers
+):
+    client_fixture.get("/therapists/me/dashboard", headers=mock_auth_headers)
+    response = client_fixture.get("/therapists/me/dashboard", headers=mock_auth_headers)
+
+    assert response.status_code == 200
+    assert int(response.headers[QUERY_COUNT_HEADER]) == 0
+
+
+def test_patch_therapist_profile_invalidates_identity_cache(
+    client_fixture, therapist_with_test, mock_auth_headers
+):
+    client_fixture.get("/therapists/me", headers=mock_auth_headers)
+    client_fixture.patch(
+        "/therapists/me",
+        headers=mock_auth_headers,
+        json={"is_lgbtq_specialization": True},
+    )
+    response = client_fixture.get("/therapists/me", headers=mock_auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["is_lgbtq_specialization"] is True
+    assert int(response.headers[QUERY_COUNT_HEADER]) == 1
+
+
+def test_patch_personality_test_invalidates_identity_cache(
+    client_fixture, therapist_with_test, mock_auth_headers
+):
+    client_fixture.get("/therapists/me/personality-test", headers=mock_auth_headers)
+    client_fixture.patch(
+        "/therapists/me/personality-test",
+        headers=mock_auth_headers,
+        json={"id": "1", "category": "openness", "score": 3},
+    )
+    response = client_fixture.get(
+        "/therapists/me/personality-test", headers=mock_auth_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["openness"][0]["score"] == 3
+
+
+def test_patch_personality_test_reads_past_identity_cache(
+    client_fixture, session_fixture, therapist_with_test, mock_auth_headers
+):
+    """a write never starts from answers cached before another worker saved some"""
+    client_fixture.get("/therapists/me/dashboard", headers=mock_auth_headers)
+
+    personality_test = therapist_with_test.raw_personality_scores
+    personality_test.openness = [5, *personality_test.openness[1:]]
+    session_fixture.add(personality_test)
+    session_fixture.commit()
+
+    response = client_fixture.patch(
+        "/therapists/me/personality-test",
+        headers=mock_auth_headers,
+        json={"id": "1", "category": "extroversion", "score": 2},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["openness"][0]["score"] == 5
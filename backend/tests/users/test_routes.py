@@ -1,6 +1,4 @@
 from uuid import UUID
-import numpy as np
-import pandas as pd
 from sqlmodel import select
 from backend.routers.users.user_types import UserOption
 from backend.tests.test_utils import (
@@ -14,8 +12,10 @@ from backend.tests.test_utils import (
     TEST_USER_PASSWORD,
     TEST_THERAPIST_BASE,
     MOCK_PERSONALITY_TEST,
+    load_test_postal_code_table,
 )
 from backend.models.user import GenderOption, AnonymousPatient, User
+from backend.services.passwords import password_hasher
 
 MOCK_LONGITUDE = -79.3626
 MOCK_LATITUDE = 43.6555
@@ -65,6 +65,23 @@ def test_login_invalid_password(client_fixture, session_fixture):
     assert data["detail"] == "Invalid credentials"
 
 
+def test_login_password_hashing_busy(client_fixture, session_fixture, monkeypatch):
+    """Test that logins beyond the password hashing queue are turned away"""
+    add_test_user(session_fixture)
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client_fixture.post(
+        "/token",
+        data={
+            "username": TEST_USER_BASE["email_address"],
+            "password": TEST_USER_PASSWORD,
+        },
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
 def test_login_invalid_email(client_fixture, session_fixture):
     """Test user login route with invalid email"""
     add_test_user(session_fixture)
@@ -80,6 +97,46 @@ def test_login_invalid_email(client_fixture, session_fixture):
     assert data["detail"] == "Invalid credentials"
 
 
+def test_login_ignores_email_case(client_fixture, session_fixture):
+    """Test user login matches the email address regardless of case"""
+    add_test_user(session_fixture)
+
+    response = client_fixture.post(
+        "/token",
+        data={
+            "username": TEST_USER_BASE["email_address"].upper(),
+            "password": TEST_USER_PASSWORD,
+        },
+    )
+
+    assert response.status_code == 200
+
+
+def test_create_therapist_adds_role_to_user_with_email_in_other_case(
+    client_fixture, session_fixture
+):
+    """Test registering with an existing email in another case reuses the user"""
+    add_test_user(session_fixture)
+
+    response = client_fixture.post(
+        "/therapists",
+        json={
+            "first_name": "Therapist",
+            "last_name": "Last",
+            "email_address": "A@B.com",
+            "password": "HashedPassword1",
+            "user_type": UserOption.THERAPIST.value,
+        },
+    )
+
+    assert response.status_code == 201
+
+    users = session_fixture.exec(select(User)).all()
+
+    assert len(users) == 1
+    assert set(users[0].roles) == {UserOption.THERAPIST.value, UserOption.PATIENT.value}
+
+
 def test_therapist_login(client_fixture, session_fixture):
     """Test user login route"""
     add_test_user(
@@ -207,7 +264,10 @@ def test_authenticated_patient_not_found(
     test_alternative_user_id = UUID("b658ffce-d810-4341-a8ef-2d3651489daf")
 
     add_test_user(session_fixture)
-    add_test_user(session_fixture, {"id": test_alternative_user_id})
+    add_test_user(
+        session_fixture,
+        {"id": test_alternative_user_id, "email_address": "other@b.com"},
+    )
 
     add_test_patient(session_fixture)
 
@@ -231,7 +291,13 @@ def test_authenticated_user_not_found(
     test_alternative_user_id = UUID("b758ffce-d810-4341-a8ef-2d3651489daf")
 
     add_test_user(session_fixture)
-    add_test_user(session_fixture, {"id": UUID("b658ffce-d810-4341-a8ef-2d3651489daf")})
+    add_test_user(
+        session_fixture,
+        {
+            "id": UUID("b658ffce-d810-4341-a8ef-2d3651489daf"),
+            "email_address": "other@b.com",
+        },
+    )
 
     add_test_patient(session_fixture)
 
@@ -731,9 +797,7 @@ def test_patch_therapist_age(client_fixture, session_fixture, mock_auth_headers)
     assert data["specializations"] == TEST_THERAPIST_BASE["specializations"]
 
 
-def test_patch_therapist_location(
-    client_fixture, session_fixture, mock_auth_headers, mocker
-):
+def test_patch_therapist_location(client_fixture, session_fixture, mock_auth_headers):
     """Test patch request to update location updates the record and does not affect other fields"""
     updated_latitude_value = 41.8781
     updated_longitude_value = -87.6298
@@ -741,15 +805,6 @@ def test_patch_therapist_location(
     add_test_user(session_fixture)
     add_test_therapist(session_fixture)
 
-    mock_location = pd.Series(
-        {
-            "latitude": np.float64(updated_latitude_value),
-            "longitude": np.float64(updated_longitude_value),
-        }
-    )
-
-    mocker.patch("pgeocode.Nominatim.query_postal_code", return_value=mock_location)
-
     response = client_fixture.patch(
         "/therapists/me",
         json={
@@ -866,18 +921,11 @@ def test_patch_anonymous_patient_overwrites_previous_patch(
 
 
 def test_patch_anonymous_patient_saves_location_coordinates(
-    client_fixture, session_fixture, mock_auth_headers, mocker
+    client_fixture, session_fixture, mock_auth_headers
 ):
     """Check that a postal code saves lon and lat coordinates"""
 
-    mock_location = pd.Series(
-        {
-            "latitude": np.float64(MOCK_LATITUDE),
-            "longitude": np.float64(MOCK_LONGITUDE),
-        }
-    )
-
-    mocker.patch("pgeocode.Nominatim.query_postal_code", return_value=mock_location)
+    load_test_postal_code_table({"M5A": (MOCK_LATITUDE, MOCK_LONGITUDE)})
 
     add_anonymous_patient(session_fixture)
 
@@ -917,19 +965,12 @@ def test_patch_anonymous_patient_invalid_location_coordinates(
 
 
 def test_patch_anonymous_patient_no_location(
-    client_fixture, session_fixture, mock_auth_headers, mocker
+    client_fixture, session_fixture, mock_auth_headers
 ):
     """Test that patching with an unresolvable postal code returns an error"""
     add_anonymous_patient(session_fixture)
 
-    mock_location = pd.Series(
-        {
-            "latitude": np.nan,
-            "longitude": np.nan,
-        }
-    )
-
-    mocker.patch("pgeocode.Nominatim.query_postal_code", return_value=mock_location)
+    load_test_postal_code_table({"M5A": (MOCK_LATITUDE, MOCK_LONGITUDE)})
 
     response = client_fixture.patch(
         "/anonymous-sessions",
@@ -945,20 +986,13 @@ def test_patch_anonymous_patient_no_location(
 
 
 def test_patch_therapist_valid_postal_code(
-    client_fixture, session_fixture, mock_auth_headers, mocker
+    client_fixture, session_fixture, mock_auth_headers
 ):
     """Test that patching with a valid postal code updates the postal code and location"""
     add_test_user(session_fixture, {"roles": [UserOption.THERAPIST.value]})
     add_test_therapist(session_fixture)
 
-    mock_location = pd.Series(
-        {
-            "latitude": np.float64(MOCK_LATITUDE),
-            "longitude": np.float64(MOCK_LONGITUDE),
-        }
-    )
-
-    mocker.patch("pgeocode.Nominatim.query_postal_code", return_value=mock_location)
+    load_test_postal_code_table({"M5A": (MOCK_LATITUDE, MOCK_LONGITUDE)})
 
     response = client_fixture.patch(
         "/therapists/me",
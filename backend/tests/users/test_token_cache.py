@@ -0,0 +1,70 @@
+from datetime import timedelta
+from unittest.mock import patch
+import jwt
+import pytest
+from backend.services.token_cache import VerifiedTokenCache, verified_token_cache
+from backend.services.users import create_access_token, decode_access_token
+from backend.tests.test_utils import USER_ID
+
+MODULE = "backend.services.token_cache"
+
+
+def test_get_returns_cached_claims_until_expiry():
+    cache = VerifiedTokenCache(max_size=2)
+    cache.set("token", {"sub": USER_ID, "exp": 200})
+
+    with patch(f"{MODULE}.time", return_value=199.0):
+        assert cache.get("token") == {"sub": USER_ID, "exp": 200}
+
+    with patch(f"{MODULE}.time", return_value=200.0):
+        assert cache.get("token") is None
+
+    assert len(cache) == 0
+
+
+def test_set_skips_claims_without_expiry():
+    cache = VerifiedTokenCache(max_size=2)
+    cache.set("token", {"sub": USER_ID})
+
+    assert cache.get("token") is None
+
+
+def test_set_evicts_least_recently_used_token():
+    cache = VerifiedTokenCache(max_size=2)
+
+    cache.set("a", {"exp": 9999999999})
+    cache.set("b", {"exp": 9999999999})
+    cache.get("a")
+    cache.set("c", {"exp": 9999999999})
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_decode_access_token_verifies_signature_once():
+    token = create_access_token({"sub": USER_ID}, timedelta(minutes=5))
+
+    with patch("backend.services.users.jwt.decode", wraps=jwt.decode) as decode:
+        first = decode_access_token(token)
+        second = decode_access_token(token)
+
+    assert first["sub"] == second["sub"] == USER_ID
+    assert decode.call_count == 1
+
+
+def test_decode_access_token_rejects_tampered_token():
+    token = create_access_token({"sub": USER_ID}, timedelta(minutes=5))
+    decode_access_token(token)
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        decode_access_token(token[:-2] + ("AA" if token[-2:] != "AA" else "BB"))
+
+
+def test_decode_access_token_does_not_cache_expired_token():
+    token = create_access_token({"sub": USER_ID}, timedelta(seconds=-1))
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_access_token(token)
+
+    assert len(verified_token_cache) == 0
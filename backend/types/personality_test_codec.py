@@ -0,0 +1,96 @@
+"""
+Compact encoding of personality test answers.
+
+Each category is stored as a smallint[10] array holding the score of
+question n at index n - 1, NULL while unanswered. A 50 bit mask records the
+answered questions, bit t * 10 + n - 1 for question n of the trait at index t
+of PERSONALITY_TRAIT_ORDER, so a completeness check is a popcount. The API
+keeps returning answers as {"id", "category", "score"} objects, which are
+rebuilt from the slot index and the column name.
+"""
+
+from typing import Mapping
+from backend.types.scores_types import PERSONALITY_TRAIT_ORDER
+
+QUESTIONS_PER_CATEGORY = 10
+PERSONALITY_TEST_LENGTH = QUESTIONS_PER_CATEGORY * len(PERSONALITY_TRAIT_ORDER)
+
+
+def empty_category() -> list[int | None]:
+    """An unanswered category, one slot per question"""
+    return [None] * QUESTIONS_PER_CATEGORY
+
+
+def get_question_slot(question_id: str) -> int | None:
+    """Zero based slot of a question within its category"""
+    try:
+        slot = int(question_id) - 1
+    except (TypeError, ValueError):
+        return None
+
+    return slot if 0 <= slot < QUESTIONS_PER_CATEGORY else None
+
+
+def get_answer_bit(category: str, slot: int) -> int:
+    """Bit of the answered mask set once a question has been answered"""
+    return 1 << (
+        PERSONALITY_TRAIT_ORDER.index(category) * QUESTIONS_PER_CATEGORY + slot
+    )
+
+
+def encode_category(category_answers: list) -> list[int | None]:
+    """
+    Encode a category given as question objects, in any order, into its
+    question slots. A category that is already encoded is returned as is.
+    """
+    if len(category_answers) == QUESTIONS_PER_CATEGORY and all(
+        answer is None or isinstance(answer, int) for answer in category_answers
+    ):
+        return list(category_answers)
+
+    scores = empty_category()
+
+    for answer in category_answers:
+        slot = get_question_slot(answer["id"]) if answer else None
+
+        if slot is not None:
+            scores[slot] = answer["score"]
+
+    return scores
+
+
+def decode_category(category: str, scores: list[int | None]) -> list[dict]:
+    """The answered questions of an encoded category in the API shape"""
+    return [
+        {"id": str(slot + 1), "category": category, "score": score}
+        for slot, score in enumerate(scores)
+        if score is not None
+    ]
+
+
+def get_answered_mask(categories: Mapping[str, list[int | None]]) -> int:
+    """Answered mask of encoded categories, a missing category is unanswered"""
+    mask = 0
+
+    for category in PERSONALITY_TRAIT_ORDER:
+        for slot, score in enumerate(categories.get(category) or ()):
+            if score is not None:
+                mask |= get_answer_bit(category, slot)
+
+    return mask
+
+
+def encode_personality_test(data: Mapping) -> dict:
+    """
+    Encode the categories of personality test data together with the answered
+    mask, leaving every other field untouched
+    """
+    encoded = dict(data)
+
+    for category in PERSONALITY_TRAIT_ORDER:
+        if category in encoded:
+            encoded[category] = encode_category(encoded[category])
+
+    encoded["answered_mask"] = get_answered_mask(encoded)
+
+    return encoded
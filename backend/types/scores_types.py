@@ -7,3 +7,13 @@ class PersonalityTestCategory(str, Enum):
     CONSCIENTIOUSNESS = "conscientiousness"
     EXTROVERSION = "extroversion"
     OPENNESS = "openness"
+
+
+# Order of the traits in every trait vector and matrix.
+PERSONALITY_TRAIT_ORDER = (
+    PersonalityTestCategory.EXTROVERSION.value,
+    PersonalityTestCategory.CONSCIENTIOUSNESS.value,
+    PersonalityTestCategory.OPENNESS.value,
+    PersonalityTestCategory.NEUROTICISM.value,
+    PersonalityTestCategory.AGREEABLENESS.value,
+)